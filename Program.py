@@ -1,13 +1,35 @@
 #GUI-RAMMEVERK
+import sys                                       #Leser --profile-startup før resten importeres, så importene kan måles
+from oppstart import Oppstartsprofil             #Måler importene og tiden til vinduet vises (python Program.py --profile-startup)
+profil = Oppstartsprofil() if "--profile-startup" in sys.argv else None
+if profil:
+    profil.mål_importer()
+
+import argparse                                  #Leser flaggene programmet startes med
 import tkinter as tk                             #Her bruker vi tkinter som GUI-rammeverk og importerer det
 from tkinter import messagebox                   #Her importerer vi modulen messagebox som vi senere skal bruke til en popup messagebox for å spørre om brukeren vil avslutte vinduet
 from tkinter import ttk                          #Her importerer vi modulen ttk som vi senere skal bruke til treeview (linjer/result i db spørringer)
+from bakgrunn import Bakgrunn                    #Kjører databasekall i bakgrunnstråder og leverer svaret tilbake i hovedtråden
 from database.database_program_staticmethod import Database   #Her importerer vi db som vi har laget i mappen "database", fra filen database_program.py. Class (klassen) i filen heter "Database". 
-from pdf_generator import PDFGenerator           #Vi har valgt å prøve oss på valgfri del og har derfor laget en PDF generator som vi importerer her. 
+from database.metrics import get_metrics                 #Tidsmålinger for databasekallene, vises under Hjelp
+from database.totaler import prosent               #Viser MVA-satsene som "25 %"
+from database.paging import ordre_pager, vare_pager, kunde_pager   #Henter tabellene side for side i stedet for alt på en gang
+from database.queries import QUERIES             #Spørringen som henter alle ordrene til søkeindeksen
+from database.varesok import VareSøk              #Fritekstsøk i varenavn med FULLTEXT-indeksen i databasen
+from database.replika import ReplikaDatabase, REPLIKA_FIL   #Lokal kopi av databasen i SQLite, slås på med LOKAL_REPLIKA i .env
+from forhandshenter import ForhåndsHenter          #Henter ordredetaljer i bakgrunnen før brukeren åpner ordren
+from sokeindeks import SøkeIndeks, Søkefelt      #Søk mens man skriver i ordre- og kundelisten
+from treeview_tabell import TreeviewTabell       #Treeview som laster flere rader etter hvert som man scroller
+from validering import sjekk_kunde               #Felles regler for å sjekke kundefeltene
+#PDF-generatoren (og hele ReportLab) importeres først når en faktura lages, de fleste øktene skriver aldri ut
+
+if profil:
+    profil.stopp_importer()
 
 #CLASS GUI - klasse for å konstruere applikasjon/programmet. 
 class GUI:
-    def __init__(self):                                                     #Denne kjøres automatisk når du konstruerer/lager et objekt. Denne initialiserer/genererer programmet.  
+    def __init__(self, profil=None):                                        #Denne kjøres automatisk når du konstruerer/lager et objekt. Denne initialiserer/genererer programmet.  
+        self.profil = profil                                                #Oppstartsprofil fra --profile-startup, ellers None
         self.root = tk.Tk()                                                 #Oppretter hovedvinduet
         self.root.geometry("800x1000")                                      #Setter størrelsen på vinduet
         self.root.title("Tverrfaglig prosjekt")                             #Setter tittelen på vinduet
@@ -24,15 +46,17 @@ class GUI:
         self.hjelpmeny = tk.Menu(self.menubar, tearoff=0)                   #Oppretter hjelp i menylinjen
         self.menubar.add_cascade(label="Hjelp", menu=self.hjelpmeny)        #Legger til hjelpen i menylinjen
         self.hjelpmeny.add_command(label="Om", command=self.omVindu)        #Legger til kommandoen "Om" i undermenyen
+        self.hjelpmeny.add_command(label="Databasestatistikk", command=self.databaseStatistikkVindu)  #Viser tidsmålingene for databasekallene
 
         self.root.columnconfigure(0, weight=0)                              #Konfigurerer kolonne 0
         self.root.columnconfigure(1, weight=1)                              #Konfigurerer kolonne 1
         
-        self.root.rowconfigure(0, weight=1)                                 #Konfigurerer rad 0
+        self.root.rowconfigure(0, weight=0)                                 #Konfigurerer rad 0 (søkefeltet)
+        self.root.rowconfigure(1, weight=1)                                 #Konfigurerer rad 1 (treet)
 
         # Oppretter en ramme for knappene
         button_frame = tk.Frame(self.root)                                  #Oppretter en ramme for knappene
-        button_frame.grid(row=0, column=0, sticky="ns", padx=10, pady=10)   #Setter størrelse og plassering i GUI.
+        button_frame.grid(row=0, column=0, rowspan=2, sticky="ns", padx=10, pady=10)  #Setter størrelse og plassering i GUI.
         button_frame.columnconfigure(0, weight=1)                           #Konfigurerer kolonne 0 i knapperammen, weight=1 betyr at den skal ta opp all tilgjengelig plass i kolonnen
 
         # Oppretter knapper med tilhørende kommandoer
@@ -47,39 +71,91 @@ class GUI:
             button.grid(row=i, column=0, sticky="ew", pady=5)                                                           #Plasserer knappene i grid
         self.info = tk.Label(master=button_frame, text="For mer informasjon om en ordre\n dobbelklikk på ordrelinjen")  #Lager label med info om hvordan få mer informasjon om en ordre
         self.info.grid(row=4, column=0, sticky="ew", pady=5)                                                            #Plasserer labelen i grid
+        self.opptatt = ttk.Progressbar(master=button_frame, mode="indeterminate")                                       #Opptatt-indikator som vises mens databasen jobber
+        self.opptatt.grid(row=5, column=0, sticky="ew", pady=5)                                                         #Plasserer indikatoren under infoteksten
+        self.opptatt.grid_remove()                                                                                      #Skjult til noe er i gang
+        self.bakgrunn = Bakgrunn(self.root, GUI.visFeil, self.visOpptatt)                                               #Trådpool for databasekall, feil vises med samme messagebox som sikkerhetsSjekk
         
+        # Søkefelt over ordrelisten
+        søk_frame = tk.Frame(self.root)                                                             #Ramme for søkefeltet
+        søk_frame.grid(row=0, column=1, sticky="ew", padx=10, pady=(10, 0))                         #Plassering i grid, over treet
+        tk.Label(søk_frame, text="Søk (ordrenummer/kundenummer):").pack(side="left")                #Forteller hva man kan søke på
+        ordre_søk_boks = ttk.Entry(søk_frame)                                                       #Lager entryboks for søket
+        ordre_søk_boks.pack(side="left", fill="x", expand=True, padx=(5, 0))                        #Fyller resten av bredden
+
         # Treeview opprettelse for å vise resultat fra SQL spørringer
         self.tree = ttk.Treeview(self.root, show="headings")                                        #Oppretter tre for å vise data
-        self.tree.grid(row=0, column=1, padx=10, pady=10, sticky="nsew")                            #Setter størrelse og plassering i GUI. North, South, East, West (nsew)
+        self.tree.grid(row=1, column=1, padx=10, pady=10, sticky="nsew")                            #Setter størrelse og plassering i GUI. North, South, East, West (nsew)
         self.vsb = ttk.Scrollbar(self.root, orient="vertical", command=self.tree.yview)             #Vertical scrollbar (vsb)
-        self.vsb.grid(row=0, column=2, sticky="ns", padx=(0, 10))                                   #Plassering i grid
-        self.tree.configure(yscrollcommand=self.vsb.set)                                            #Knytter vertical scrollbar til treeview 
+        self.vsb.grid(row=1, column=2, sticky="ns", padx=(0, 10))                                   #Plassering i grid
+        self.ordreliste = TreeviewTabell(self.tree, self.vsb, bakgrunn=self.bakgrunn)                                     #Knytter vertical scrollbar til treeview og laster ordrer side for side
         self.tree.bind("<Double-1>", self.påTreKlikk)                                               #Binder dobbeltklikk til funksjonen påTreKlikk
+        self.ordre_søk = Søkefelt(ordre_søk_boks, self.ordreliste, lambda: ordre_pager(self.db))    #Søker i ordrene mens man skriver, hele listen vises igjen når feltet er tomt
+        self.kunde_søk = None                                                                       #Søkefeltet i kundevinduet, lages når vinduet åpnes
+        self.kunde_indeks = None                                                                    #Søkeindeks for kundene, bygges første gang kundevinduet åpnes
 
-        self.db = Database()                                                                        #Initialiserer databaseobjektet
+        if REPLIKA_FIL:                                                                             #Leser fra en lokal kopi som synkes i bakgrunnen, skriving går fortsatt til serveren
+            self.db = ReplikaDatabase(REPLIKA_FIL, pooled=True, cached=True)
+        else:
+            self.db = Database(pooled=True, cached=True)                                            #Initialiserer databaseobjektet med tilkoblingspool og resultatcache, så hvert klikk slipper ny oppkobling
+        self.vare_søk = VareSøk(self.db)                                                            #Søk i varenavn, de siste søkene huskes en liten stund
+        self.ordre_forhånd = ForhåndsHenter(self.bakgrunn, self.db.ordre_detaljer)                  #Valgt ordre og naboene hentes i bakgrunnen, så detaljvinduet åpnes med en gang
+        self.ordre_forhånd.koble(self.tree)                                                         #Lytter på <<TreeviewSelect>> og musen over treet
 
         self.root.protocol("WM_DELETE_WINDOW", self.terminate)                                      #Håndterer lukking av vinduet
-        self.hentAlleOrdrer()
+        self.root.bind("<Map>", self.førsteVisning, add="+")                                        #Ordrene hentes når vinduet er vist, så det ikke venter på databasen
+        if self.profil:
+            self.profil.merk("vindu laget")
+            self.tree.bind("<<SideLastet>>", self.førsteSideLastet, add="+")
         self.root.mainloop()                                                                        #Starter hovedløkken
    
     #Dette er en dekoratør, den brukes for å legge til feilhåndtering uten å endre den opprinnelige funksjonen direkte. Vi benytter en wrapper som tar imot alle argumentene som sendes til den opprinnelige funksjonen og prøver å kjøre funksjonen med argumentene. Hvis det oppstår en feil vil wrapperen fange feilen og printe beskjed til terminalen da det er det vi sagt den skal gjøre dersom det oppstår en feil. 
+    #Feil som skjer i bakgrunnstrådene sendes til visFeil av Bakgrunn, og vises dermed på samme måte.
     @staticmethod                                                                            
     def sikkerhetsSjekk(func):                                                                      #Funksjon for å sjekke om det skjer feil med funksjonen 
         def wrapper(*args, **kwargs):                                                               #Wrapper funksjoner for å håndtere feil
             try:
                 return func(*args, **kwargs)                                                        #Kjører funksjonen som er sendt inn, med parametere
             except Exception as e:                                                                  #Hvis det skjer en feil, så kjører vi koden under
-                print(f"feil på funksjon {func.__name__}: {e}")                                     #Printer feilmeldingen i terminal og viser hvilken funksjon det er snakk om
-                messagebox.showerror("Feil", f"Det skjedde en feil: {e}")                           #Viser feilmeldingen i en messagebox
+                GUI.visFeil(func.__name__, e)                                                       #Viser feilen i terminal og messagebox
+        wrapper.__name__ = func.__name__                                                            #Beholder navnet så feilmeldinger fra bakgrunnsjobber viser riktig funksjon
         return wrapper                                                                              #Returnerer wrapperen
+
+    @staticmethod
+    def visFeil(navn, e):                                                                           #Felles visning av feil, brukes av sikkerhetsSjekk og av bakgrunnsjobbene
+        print(f"feil på funksjon {navn}: {e}")                                                      #Printer feilmeldingen i terminal og viser hvilken funksjon det er snakk om
+        messagebox.showerror("Feil", f"Det skjedde en feil: {e}")                                   #Viser feilmeldingen i en messagebox
+
+    def visOpptatt(self, opptatt):                                                                  #Viser eller skjuler opptatt-indikatoren, kalles av Bakgrunn
+        if opptatt:
+            self.opptatt.grid()                                                                     #Viser indikatoren
+            self.opptatt.start(10)                                                                  #Starter animasjonen
+            self.root.config(cursor="watch")                                                        #Viser ventemarkør
+        else:
+            self.opptatt.stop()                                                                     #Stopper animasjonen
+            self.opptatt.grid_remove()                                                              #Skjuler indikatoren
+            self.root.config(cursor="")                                                             #Vanlig markør igjen
     
     def terminate(self):                                                                            #Funksjon for å avslutte/terminere programmet
         if messagebox.askyesno("Avslutt", "Er du sikker på at du vil avslutte?"):                   #Spør om brukeren er sikker, opprettet vindu med messagebox modul
+            self.bakgrunn.avslutt()                                                                 #Stopper bakgrunnstrådene
             self.root.destroy()                                                                     #Lukker vinduet
 
+    def førsteVisning(self, event):                                                                 #Kjøres når hovedvinduet vises første gang
+        if event.widget is not self.root:                                                           #<Map> kommer også for widgetene i vinduet
+            return
+        self.root.unbind("<Map>")
+        if self.profil:
+            self.root.after_idle(self.profil.merk, "vindu vist")                                    #Når vinduet er tegnet
+        self.root.after_idle(self.hentAlleOrdrer)                                                   #Første side hentes i bakgrunnen, vinduet kan brukes imens
+
+    def førsteSideLastet(self, _):                                                                  #Bare med --profile-startup, skriver ut målingene når ordrene vises
+        self.tree.unbind("<<SideLastet>>")
+        self.profil.merk("første side med ordrer")
+        print(self.profil.rapport())
+
     def tømTre(self):                                                                               #Funksjon for å fjerne alle tidligere resultat og kunne vise nye i treeview
-        for i in self.tree.get_children():                                                          #for loop for å gå gjennom alle underelementer
-            self.tree.delete(i)                                                                     #Sletter elementet
+        self.ordreliste.tøm()                                                                       #Sletter alle elementene og stopper sidevis lasting
 
     def oppdaterKolonner(self, kolonner):                                                           #Setter opp kolonnene i treet
         self.tree["columns"] = kolonner                                                             #Oppdaterer kolonnene i treet
@@ -93,6 +169,13 @@ class GUI:
         varelager_window = tk.Toplevel(self.root)                                                               #Lager popupvindu
         varelager_window.title("Varer")                                                                         #Setter navn på popupvindu
         varelager_window.geometry("1080x400")                                                                   #Setter størrelse på popupvinduet
+
+        # Søkefelt over varelisten
+        søk_frame = tk.Frame(varelager_window)                                                                  #Ramme for søkefeltet
+        søk_frame.pack(fill="x", padx=10)                                                                       #Over treet, hele bredden
+        tk.Label(søk_frame, text="Søk (varenavn):").pack(side="left")                                           #Forteller hva man kan søke på
+        vare_søk_boks = ttk.Entry(søk_frame)                                                                    #Lager entryboks for søket
+        vare_søk_boks.pack(side="left", fill="x", expand=True, padx=(5, 0))                                     #Fyller resten av bredden
                                                               
         # Treeview varedetaljer detaljer
         self.vare_tree = ttk.Treeview(varelager_window, show="headings")                                        #Lager Treeview for å vise vare detaljer
@@ -101,30 +184,33 @@ class GUI:
         # Legger til scrollbar for Treeview i nytt vindu
         vare_vsb = ttk.Scrollbar(varelager_window, orient="vertical", command=self.vare_tree.yview)             #Lager Treeview for å vise vare detaljer i nytt vindu
         vare_vsb.pack(side="right", fill="y")                                                                   #Setter størrelse og plassering i GUI.
-        self.vare_tree.configure(yscrollcommand=vare_vsb.set)                                                   #Kobler sammen treet og scrollbaren
+        self.vare_liste = TreeviewTabell(self.vare_tree, vare_vsb, bakgrunn=self.bakgrunn)                                            #Kobler sammen treet og scrollbaren, og laster varer side for side
 
         # Henter varer
-        self.vare_tree["columns"] = ("varenummer", "Betegnelse", "Pris", "Antall")                              #Setter inn kolonner
-        for col in self.vare_tree["columns"]:                                                                   #for loop som den kjører gjennom
-            self.vare_tree.heading(col, text=col)                                                               #Setter overskrift
-            self.vare_tree.column(col, width=100, anchor="center")                                              #Setter størrelse på varetreet
-        data = self.db.fetch_all("SELECT * FROM vare WHERE antall > 0 ORDER BY antall DESC;")                   #Variabel som lagrer data som er hentet fra databasen og sier at den skal vise i synkende rekkefølge når den senere kalles. 
-        for i in data:                                                                                          #Henter dataene som ligger i data
-            self.vare_tree.insert("", "end", values=i)                                                          #Setter inn data i treet
+        self.vare_liste.settKolonner(("varenummer", "Betegnelse", "Pris", "Antall"))                            #Setter inn kolonner
+        self.vare_liste.visSider(vare_pager(self.db))                                                           #Viser varene i synkende rekkefølge på antall, én side av gangen
+        vare_søkefelt = Søkefelt(vare_søk_boks, self.vare_liste, lambda: vare_pager(self.db), bakgrunn=self.bakgrunn)  #Søket går mot databasen, så det kjøres i bakgrunnen
+        vare_søkefelt.settIndeks(self.vare_søk)                                                                 #Treffene sorteres på relevans
 
     @sikkerhetsSjekk
     def hentAlleOrdrer(self):                                                                             #Funksjon for å hente orderer
         self.tømTre()                                                                                     #Kjører funksjonen for å tømme treet
         self.oppdaterKolonner(("Ordrenummer", "Ordre dato", "Dato sendt", "Betalt Dato", "Kundenummer"))  #Oppdaterer kolonnene
-        data = self.db.fetch_all("SELECT * FROM ordre;")                                                  #Henter data fra databasen
-        for i in data:                                                                                    #Henter dataene som ligger i data
-            self.tree.insert("", "end", values=i)                                                         #Setter inn data i treet
+        self.ordre_søk.tøm()                                                                              #Viser hele listen, ikke søketreff
+        self.ordreliste.visSider(ordre_pager(self.db))                                                    #Henter første side med ordrer, resten lastes når man scroller
+        self.bakgrunn.kjør(self.byggOrdreIndeks, ferdig=self.ordre_søk.settIndeks, nøkkel=id(self.ordre_søk))  #Bygger søkeindeksen på nytt i bakgrunnen, så nye ordrer kommer med
+
+    def byggOrdreIndeks(self):                                                                            #Kjøres i bakgrunnstråd, søk på ordrenummer og kundenummer
+        return SøkeIndeks(felt=(4,)).bygg(self.db.stream_rows(QUERIES["alle_ordrer"].sql))
 
     @sikkerhetsSjekk
     def visInfoOmOrdre(self, ordreNr):                                                              #Funksjon som tar ett parameter som er ordrenummeret den skal hente informasjon om
         self.tømTre()                                                                               #Kjører funksjonen for å tømme treet
         self.oppdaterKolonner(("Ordrenummer", "Varenummer", "Enhetspris", "Antall"))                #Oppdaterer kolonnene
-        data = self.db.fetch_all("SELECT * FROM ordrelinje WHERE OrdreNr = %s;", (ordreNr,))        #Henter data fra databasen med beskyttet parameter for SQL-injeksjon
+        self.bakgrunn.kjør(self.db.query, "ordrelinjer", (ordreNr,), ferdig=self.visRaderITre, nøkkel=id(self.ordreliste))  #Henter data fra databasen i bakgrunnen med beskyttet parameter for SQL-injeksjon, spørringen ligger i database/queries.py
+
+    @sikkerhetsSjekk
+    def visRaderITre(self, data):                                                                   #Setter inn rader i hovedtreet når de er hentet
         for i in data:                                                                              #Henter dataene som ligger i data
             self.tree.insert("", "end", values=i)                                                   #Setter inn data i treet
 
@@ -136,16 +222,21 @@ class GUI:
             return                                                                                  #Avslutter funksjonen
 
         ordreNr = self.tree.item(selected_item[0], "values")[0]                                     #Lagrer ordrenummeret brukeren har klikket på
+        self.ordre_forhånd.hent(ordreNr, ferdig=lambda detaljer: self.visOrdreDetaljer(ordreNr, detaljer))  #Fra forhåndshentingen hvis den er ferdig, ellers henter den ordre, kunde, linjer og totaler med én spørring i bakgrunnen
 
+    @sikkerhetsSjekk
+    def visOrdreDetaljer(self, ordreNr, detaljer):                                                  #Kjøres i hovedtråden når detaljene er hentet
+        if detaljer is None:                                                                        #Ordren kan være slettet etter at listen ble lastet
+            messagebox.showwarning("Finnes ikke", f"Fant ikke ordre {ordreNr}.")
+            return
+        kundedata = detaljer.kunde                                                                  #Kunden med poststed, hentet i samme spørring som ordrelinjene
         # Lager nytt vindu for ordre detaljer
         details_window = tk.Toplevel(self.root)                                                     #Lager popupvindu
         details_window.title(f"Ordre detaljer - OrdreNr: {ordreNr}")                                #Setter navn på popupvindu basert på ordrenummer
         details_window.geometry("1000x400")                                                         #Setter størrelse på popupvinduet
 
         # Legge til kundeinfo i ordrevindu
-        kundenummer = self.tree.item(selected_item[0], "values")[4]                                                                                                                     #Variabel for å lagre brukervalg i ordre
-        kundedata = self.db.fetch_one("SELECT * ,Poststed.Poststed FROM kunde inner join Poststed on Kunde.PostNr = Poststed.PostNr WHERE KNr = %s;", (kundenummer,))                   #Variabel som lagrer resultat fra SQL-spørring. Her skal vi vise adresse til kunde og må koble sammen postnummer og poststed for å få riktig visning slik vi vil ha det. Dette gjør vi med inner join og henter fra to tabeller "poststed" og "kunde".    
-        kundelabel = tk.Label(details_window, text = f"Kundenummer: {kundedata[0]}\nNavn: {kundedata[1]} {kundedata[2]}\n Adresse: {kundedata[3]}, {kundedata[4]} {kundedata[6]}")      #Viser kundeprofil        
+        kundelabel = tk.Label(details_window, text = f"Kundenummer: {kundedata.KNr}\nNavn: {kundedata.Fornavn} {kundedata.Etternavn}\n Adresse: {kundedata.Adresse}, {kundedata.PostNr} {kundedata.Poststed}")      #Viser kundeprofil        
         kundelabel.pack(pady = 100, side="left")                                                                                                                                        #Pakker det hele sammen. Vi velger også å vise kundedataene til venstre i visningsvinduet
 
         # Legger til en knapp for å generere faktura
@@ -167,15 +258,12 @@ class GUI:
             details_tree.heading(col, text=col)                                                     #Setter overskrift
             details_tree.column(col, width=100, anchor="center")                                    #Forteller at kolonnen skal være 100px bred og midtstilt
         
-        data = self.db.fetch_all("SELECT ordrelinje.VNr, vare.Betegnelse, ordrelinje.PrisPrEnhet, ordrelinje.Antall, ordrelinje.PrisPrEnhet * ordrelinje.Antall as Sum FROM ordrelinje INNER JOIN vare ON ordrelinje.VNr = vare.VNr WHERE ordrelinje.OrdreNr = %s;", (ordreNr,))  # Henter fra ordrenummer variabelen ordrenummer og er beskyttet mot SQL injeksjon
-        for i in data:                                                                                                                                                                                                                                                # Henter dataene som ligger i data
+        for i in detaljer.linjer:                                                                                                                                                                                                                                     # Henter ordrelinjene
             details_tree.insert("", "end", values=i)                                                                                                                                                                                                                  # Legger til verdiene som er hentet fra databasen
  
-        #Legge til label for totalsum
-        Totalsum = 0                                                                                #Variabel som lages for å ha en plass å lagre informasjon i forloopen
-        for i in data:                                                                              #Forloop for å velge alle elementene i ordren
-            Totalsum += i[3]                                                                        #Kode for å gå gjennom elementene i kolonnen sum (den 4 kolonnen, den skrives som 3 da det telles fra 0) og legge dem sammen
-        Totalsumlabel = tk.Label(details_window, text = f"Totalsum: {Totalsum}")                    #Her lager vi label som vi kaller Totalsumlabel, den viser innholdet i utregningen over
+        #Legge til label for totalsum, totalene er regnet ut av databasen og er de samme som på fakturaen
+        mva_linjer = "".join(f"\n{prosent(sats)} MVA: {mva:,.2f}" for sats, _, mva in detaljer.totaler.per_sats)                       #Én linje per MVA-sats (satsen avhenger av varekategorien)
+        Totalsumlabel = tk.Label(details_window, text = f"Totalsum: {detaljer.netto:,.2f}{mva_linjer}\nTotal inkl. MVA: {detaljer.brutto:,.2f}")   #Her lager vi label som vi kaller Totalsumlabel
         Totalsumlabel.pack(pady = 100)                                                              #Her definierer vi hvor labelen skal være i visningsvinduet
 
     @sikkerhetsSjekk
@@ -186,14 +274,23 @@ class GUI:
             return                                                                                  #Avslutter funksjonen
 
         ordreNr = self.tree.item(selected_item[0], "values")[0]                                                                                                                    #Variabel som lagrer ordrenummeret for faktura som vi skal skrive ut
-        ordrelinjer = self.db.fetch_all("SELECT ordrelinje.*, vare.betegnelse FROM ordrelinje JOIN vare ON ordrelinje.VNr = vare.VNr WHERE ordrelinje.ordreNr = %s;", (ordreNr,))  #Henter ordrelinjer fra databasen med beskyttet parameter for SQL-injeksjon.
-        ordre = self.db.fetch_one("SELECT * FROM ordre WHERE OrdreNr = %s;", (ordreNr,))                                                                                           #Henter ordre data fra databasen med beskyttet parameter for SQL-injeksjon.
-        kunde = self.db.fetch_one("SELECT * FROM kunde WHERE knr = %s;", (ordre[4],))                                                                                              #Henter kunde data fra databasen med beskyttet parameter for SQL-injeksjon.
-        faktura_nummer = self.db.insert_faktura(ordre[0],kunde[0])                                                                                                                 #Lager faktura i databasen med ordrenummer og kundenummer.
+        self.bakgrunn.kjør(self.lagFaktura, ordreNr, self.ordre_forhånd.fraCache(ordreNr), ferdig=self.visFaktura)                                                                 #Lager fakturaen i bakgrunnen så vinduet ikke fryser mens PDF-en lages, med detaljene fra forhåndshentingen hvis de finnes
+
+    def lagFaktura(self, ordreNr, detaljer=None):                                                                                                                                  #Kjøres i bakgrunnstråd, henter data, lagrer faktura og lager PDF
+        detaljer = detaljer or self.db.ordre_detaljer(ordreNr)                                                                                                                     #Samme ordre, kunde, linjer og totaler som ordredetaljene viser, ofte rett fra cachen.
+        if detaljer is None:
+            raise ValueError(f"Fant ikke ordre {ordreNr}")
+        ordre, ordrelinjer, kunde = detaljer.ordre, detaljer.fakturalinjer, detaljer.kunde
+        faktura_nummer = self.db.insert_faktura(ordre.OrdreNr, kunde.KNr)                                                                                                          #Lager faktura i databasen med ordrenummer og kundenummer.
         #print(f"faktura_nummer: {faktura_nummer}")                                                                                                                                #debugging print, vi lar denne stå for å vise hvordan vi jobbet med å finne rett måte å velge rett index.
         #print(f"ordre {ordre},ordrelinje {ordrelinjer}, kunde {kunde}")                                                                                                           #debugging print, vi lar denne stå for å vise hvordan vi jobbet med å finne rett måte å velge rett index.
+        from pdf_generator import PDFGenerator                                                                                                                                     #Importeres her, ReportLab tar lang tid å laste og trengs bare når noen skriver ut
         pdfgen = PDFGenerator()                                                                                                                                                    #Initialiserer/kjører PDF-generatoren
-        pdfgen.generate_invoice(ordre,ordrelinjer,kunde,faktura_nummer)                                                                                                            #Genererer PDF med informasjon lagret i variablene over
+        return pdfgen.generate_invoice(ordre,ordrelinjer,kunde,faktura_nummer,open_file=False,totaler=detaljer.totaler)                                                           #Genererer PDF med informasjon lagret i variablene over, feil vises med visFeil
+
+    def visFaktura(self, pdf_filename):                                                                                                                                            #Kjøres i hovedtråden når PDF-en er laget
+        from pdf_generator import åpne_fil                                                                                                                                         #Allerede lastet av lagFaktura
+        åpne_fil(pdf_filename)                                                                                                                                                     #Åpner fakturaen
 
     @sikkerhetsSjekk    
     def hentAlleKunder(self):                                                                               #Funksjon for å se kundedb med stored procedures
@@ -206,6 +303,15 @@ class GUI:
         LeggTilKunde.pack(pady=10)                                                              
         AdministrerKunde = tk.Button(kunde_window, text="Administrer kunde", command=lambda: self.administrerKundeVindu())  #Lager knapp som heter "Administrer kunde" og kjører funksjonen update_kunde() i db.py
         AdministrerKunde.pack(pady=10) 
+        OppdaterListe = tk.Button(kunde_window, text="Oppdater liste", command=lambda: self.oppdaterKundeliste())  #Henter hele kundelisten på nytt, f.eks. etter endringer gjort fra en annen maskin
+        OppdaterListe.pack(pady=10)
+
+        # Søkefelt over kundelisten
+        søk_frame = tk.Frame(kunde_window)                                                                  #Ramme for søkefeltet
+        søk_frame.pack(fill="x", padx=10)                                                                   #Over treet, hele bredden
+        tk.Label(søk_frame, text="Søk (navn, adresse eller kundenummer):").pack(side="left")                #Forteller hva man kan søke på
+        kunde_søk_boks = ttk.Entry(søk_frame)                                                               #Lager entryboks for søket
+        kunde_søk_boks.pack(side="left", fill="x", expand=True, padx=(5, 0))                                #Fyller resten av bredden
                                                               
         # Treeview kundedetaljer detaljer
         self.kunde_tree = ttk.Treeview(kunde_window, show="headings")                                       #Lager Treeview for å vise ordre detaljer
@@ -214,17 +320,30 @@ class GUI:
         # Legger til scrollbar for Treeview i nytt vindu
         kunde_vsb = ttk.Scrollbar(kunde_window, orient="vertical", command=self.kunde_tree.yview)           #Lager Treeview for å vise ordre detaljer i nytt vindu
         kunde_vsb.pack(side="right", fill="y")                                                              #Setter størrelse og plassering i GUI.
-        self.kunde_tree.configure(yscrollcommand=kunde_vsb.set)                                             #Kobler sammen treet og scrollbaren
+        self.kunde_liste = TreeviewTabell(self.kunde_tree, kunde_vsb, bakgrunn=self.bakgrunn)                                     #Kobler sammen treet og scrollbaren, og laster kunder side for side
 
         # Henter kunder
-        self.kunde_tree["columns"] = ("Kundenummer", "Fornavn", "Etternavn", "Adresse", "Post Nummer")      #Setter inn kolonner
-        for col in self.kunde_tree["columns"]:                                                              #for loop som den kjører gjennom
-            self.kunde_tree.heading(col, text=col)                                                          #Setter overskrift
-            self.kunde_tree.column(col, width=100, anchor="center")                                         #Forteller at kolonnen skal være 100px bred og midtstilt
-                                                                                                            #Kaller på funksjonen som henter alle kunder fra databasen
-        data = self.db.call_procedure("hent_alle_kunder")                                                   #Henter data fra databasen med følgende store procedures: "SELECT * FROM varehusdb.kunde;"
-        for i in data:                                                                                      #Henter dataene som ligger i variablen data
-            self.kunde_tree.insert("", "end", values=i)
+        self.kunde_liste.settKolonner(("Kundenummer", "Fornavn", "Etternavn", "Adresse", "Post Nummer"))   #Setter inn kolonner
+        self.kunde_liste.visSider(kunde_pager(self.db))                                                     #Henter aktive kunder (samme utvalg som hent_alle_kunder), én side av gangen
+        self.kunde_søk = Søkefelt(kunde_søk_boks, self.kunde_liste, lambda: kunde_pager(self.db))           #Søker i kundene mens man skriver
+        if self.kunde_indeks is None:                                                                       #Indeksen bygges bare første gang, etterpå holdes den oppdatert
+            self.bakgrunn.kjør(self.byggKundeIndeks, ferdig=self.kundeIndeksBygget, nøkkel="kundeindeks")
+        else:
+            self.kunde_søk.settIndeks(self.kunde_indeks)
+
+    def byggKundeIndeks(self):                                                                              #Kjøres i bakgrunnstråd, søk på navn, adresse og kundenummer
+        return SøkeIndeks(felt=(1, 2, 3)).bygg(self.db.call_procedure("hent_alle_kunder", cached=True))
+
+    def kundeIndeksBygget(self, indeks):                                                                    #Kjøres i hovedtråden når indeksen er bygget
+        self.kunde_indeks = indeks
+        if self.kunde_søk is not None:
+            self.kunde_søk.settIndeks(indeks)
+
+    @sikkerhetsSjekk
+    def oppdaterKundeliste(self):                                                                           #Henter kundelisten og søkeindeksen på nytt
+        self.kunde_søk.tøm()
+        self.kunde_liste.fullSynk()                                                                         #Hele listen fra første side, også når søketreff vises
+        self.bakgrunn.kjør(self.byggKundeIndeks, ferdig=self.kundeIndeksBygget, nøkkel="kundeindeks")
                      
     def omVindu(self):                                                                                                                  #Funksjon for å vise informasjon om programmet
         # Lager nytt vindu for å vise informasjon om programmet
@@ -236,6 +355,39 @@ class GUI:
         close_button = tk.Button(about_window, text="Lukk", command=about_window.destroy)                                               #Lager lukkeknapp i vinduet    
         close_button.pack(padx=10)                                                                                                      #Setter lukkeknapp i vinduet
 
+    def databaseStatistikkVindu(self):                                                                    #Funksjon for å vise tidsmålingene for databasekallene
+        statistikk_window = tk.Toplevel(self.root)                                                        #Lager popupvindu
+        statistikk_window.title("Databasestatistikk")                                                     #Setter navn på popupvindu
+        statistikk_window.geometry("1000x400")                                                            #Setter størrelse på popupvinduet
+        tekst = tk.Text(statistikk_window, wrap="none", font=("Courier", 9))                              #Fast bredde på tegnene, så kolonnene står under hverandre
+        tekst.pack(fill="both", expand=True, padx=10, pady=10)
+
+        def oppdater():                                                                                   #Skriver målingene inn i tekstfeltet på nytt
+            pool, cache = self.db.pool_stats(), self.db.cache_stats()
+            linjer = [get_metrics().rapport(), ""]
+            if pool:
+                linjer.append("Pool: " + ", ".join(f"{navn} {verdi}" for navn, verdi in pool.items()))
+            if cache:
+                linjer.append("Cache: " + ", ".join(f"{navn} {verdi}" for navn, verdi in cache.items()))
+            replika = self.db.replika_stats()                                                            #Etterslep og rader hentet per synk, bare med LOKAL_REPLIKA
+            if replika:
+                linjer.append("Replika: " + ", ".join(f"{navn} {verdi}" for navn, verdi in replika.items()))
+                for synk in self.db.replika.siste_synker():
+                    linjer.append(f"  {synk['tid']:%H:%M:%S}  {synk['rader']} rader, {synk['slettet']} slettet, {synk['sekunder']:.2f} s  (" + ", ".join(f"{tabell} {antall}" for tabell, antall in synk["per_tabell"].items()) + ")")
+            forhånd = self.ordre_forhånd.get_stats()                                                     #Hvor ofte ordredetaljene var hentet før de ble åpnet
+            linjer.append(f"Forhåndshenting av ordredetaljer: treffrate {forhånd['treffrate']:.0%}, " + ", ".join(f"{navn} {verdi}" for navn, verdi in forhånd.items() if navn != "treffrate"))
+            tekst.config(state="normal")
+            tekst.delete("1.0", "end")
+            tekst.insert("1.0", "\n".join(linjer))
+            tekst.config(state="disabled")
+
+        knapper = tk.Frame(statistikk_window)
+        knapper.pack(pady=(0, 10))
+        tk.Button(knapper, text="Oppdater", command=oppdater).pack(side="left", padx=5)                  #Henter de nyeste målingene
+        tk.Button(knapper, text="Nullstill", command=lambda: (get_metrics().clear(), oppdater())).pack(side="left", padx=5)
+        tk.Button(knapper, text="Lukk", command=statistikk_window.destroy).pack(side="left", padx=5)
+        oppdater()
+
     def administrerKundeVindu(self):                                                                      #Funksjon for å se kundedb med stored procedures
         selected_item = self.kunde_tree.selection()                                                       #Lagrer valget ditt (klikket ditt) i variablen selected_item
         if not selected_item:                                                                             #En if statement som kjører dersom du ikke velger noe/klikker på et tomt element
@@ -295,25 +447,14 @@ class GUI:
 
     @sikkerhetsSjekk    
     def oppdaterKundeiDb(self):                                                                                                             #Funksjon for å oppdatere kunde i databasen
-        if self.fornavn_box.get() == "" or self.etternavn_box.get() == "" or self.addresse_box.get() == "" or self.postnr_box.get() == "":  #Sjekker om noen av feltene er tomme
-            messagebox.showwarning("Ingen valgt", "Vennligst fyll ut alle feltene.")                                                        #Oppretter varsel dersom noen av feltene er tomme
+        feil = sjekk_kunde(self.fornavn_box.get(), self.etternavn_box.get(), self.addresse_box.get(), self.postnr_box.get())           #Sjekker tomme felt og tall i navn, samme regler som CSV-importen
+        if feil:
+            messagebox.showwarning(*feil)                                                                                                   #Oppretter varsel med hva som er feil
             return                                                                                                                          #Avslutter funksjonen
-        elif any(char.isdigit() for char in self.fornavn_box.get()) or any(char.isdigit() for char in self.etternavn_box.get()):            #Sjekker om noen av feltene inneholder tall
-            messagebox.showwarning("Feil","Ikke lov å bruke tall i Fornavn eller Etternavn, vennligst prøv igjen.")                         #Oppretter varsel dersom noen av feltene inneholder tall
-            return                                                                                                                          #Avslutter funksjonen 
         else:
-            self.db.update_one("UPDATE kunde SET Fornavn = %s, Etternavn = %s, Adresse = %s, PostNr = %s WHERE KNr = %s;", (self.fornavn_box.get(), self.etternavn_box.get(), self.addresse_box.get(), self.postnr_box.get(), self.kundenummer_box.get()))  #Lager entryboks for fornavn
-            self.kunde_tree.delete(*self.kunde_tree.get_children())                                                                         #Tømmer kunde_tree før oppdatering
-            # Henter kunder
-            self.kunde_tree["columns"] = ("Kundenummer", "Fornavn", "Etternavn", "Adresse", "Post Nummer")                                  #Setter inn kolonner
-            for col in self.kunde_tree["columns"]:                                                                                          #for loop som den kjører gjennom
-                self.kunde_tree.heading(col, text=col)                                                                                      #Setter overskrift
-                self.kunde_tree.column(col, width=100, anchor="center")                                                                     #Forteller at kolonnen skal være 100px bred og midtstilt
-            
-            data = self.db.call_procedure("hent_alle_kunder")                                                                               #Henter data fra databasen med følgende store procedures: "SELECT * FROM varehusdb.kunde;"
-            for i in data:                                                                                                                  #Henter dataene som ligger i variablen data
-                self.kunde_tree.insert("", "end", values=i)                                                                                 #Setter inn data i treet
-            self.kunde_window.destroy()                                                                                                     #Lukker vinduet etter oppdatering
+            self.lagreKunde.config(state="disabled")                                                                                        #Hindrer dobbel lagring mens databasen jobber
+            rad = (int(self.kundenummer_box.get()), self.fornavn_box.get(), self.etternavn_box.get(), self.addresse_box.get(), self.postnr_box.get())  #Verdiene leses fra entryboksene her i hovedtråden
+            self.bakgrunn.kjør(self.db.update_kunde, *rad, ferdig=lambda _: self.kundeEndret(rad), feilet=self.slåPå(self.lagreKunde))   #Oppdaterer kunden i bakgrunnen (og raden i cachen)
 
     def opprettKunde(self):                                                                                            #Funksjon for å se kundedb med stored procedures
         #Lager nytt vindu for ordre detaljer
@@ -355,41 +496,63 @@ class GUI:
 
     @sikkerhetsSjekk                                                                        
     def lagreKundeiDb(self):  
-        if self.fornavn_box.get() == "" or self.etternavn_box.get() == "" or self.addresse_box.get() == "" or self.postnr_box.get() == "":  #Sjekker om noen av feltene er tomme
-            messagebox.showwarning("Ingen valgt", "Vennligst fyll ut alle feltene.")                                                        #Oppretter varsel dersom noen av feltene er tomme
+        feil = sjekk_kunde(self.fornavn_box.get(), self.etternavn_box.get(), self.addresse_box.get(), self.postnr_box.get())           #Sjekker tomme felt og tall i navn, samme regler som CSV-importen
+        if feil:
+            messagebox.showwarning(*feil)                                                                                                   #Oppretter varsel med hva som er feil
             return                                                                                                                          #Avslutter funksjonen
-        elif any(char.isdigit() for char in self.fornavn_box.get()) or any(char.isdigit() for char in self.etternavn_box.get()):            #Sjekker om noen av feltene inneholder tall
-            messagebox.showwarning("Feil","Ikke lov å bruke tall i Fornavn eller Etternavn, vennligst prøv igjen.")                         #Oppretter varsel dersom noen av feltene inneholder tall
-            return                                                                                                                          #Avslutter funksjonen 
         else:
-            self.db.insert_kunde(self.fornavn_box.get(), self.etternavn_box.get(), self.addresse_box.get(), self.postnr_box.get())          #Lager informasjonen fra entryboksene i databasen med funksjonen insert_kunde() i db.py
-            self.kunde_window.destroy()                                                                                                     #Lukker vinduet etter oppdatering
-            self.kunde_tree.delete(*self.kunde_tree.get_children())                                                                         #Tømmer kunde_tree før oppdatering
-            # Henter kunder
-            self.kunde_tree["columns"] = ("Kundenummer", "Fornavn", "Etternavn", "Adresse", "Post Nummer")                                  #Setter inn kolonner
-            for col in self.kunde_tree["columns"]:                                                                                          #for loop som den kjører gjennom
-                self.kunde_tree.heading(col, text=col)                                                                                      #Setter overskrift
-                self.kunde_tree.column(col, width=100, anchor="center")                                                                     #Forteller at kolonnen skal være 100px bred og midtstilt
-
-            data = self.db.call_procedure("hent_alle_kunder")                                                                               #Henter data fra databasen med følgende store procedures: "SELECT * FROM varehusdb.kunde;"
-            for i in data:                                                                                                                  #Henter dataene som ligger i variablen data
-                self.kunde_tree.insert("", "end", values=i)                                                                                 #Setter inn data i treet
+            self.lagreKunde.config(state="disabled")                                                                                        #Hindrer dobbel lagring mens databasen jobber
+            verdier = (self.fornavn_box.get(), self.etternavn_box.get(), self.addresse_box.get(), self.postnr_box.get())
+            self.bakgrunn.kjør(self.db.insert_kunde, *verdier, ferdig=lambda kNr: self.kundeLagtTil((kNr,) + verdier), feilet=self.slåPå(self.lagreKunde))  #Lager informasjonen fra entryboksene i databasen med funksjonen insert_kunde() i db.py, i bakgrunnen
 
 
     @sikkerhetsSjekk
     def slettKunde(self):                                                                                               #Funksjon for å se kundedb med stored procedures
         if messagebox.askyesnocancel("Slette kunde", "Er du sikker på at du vil slette kunden?"):                       #Oppretter messagebox
-            self.db.update_one("UPDATE kunde SET is_active = '0' WHERE KNr = %s;", (self.kundenummer_box.get(),))       #Oppdaterer databasen med slettingen av kundenummeret som er valgt i treeviewen.
-            self.kunde_tree.delete(*self.kunde_tree.get_children())                                                     #Tømmer kunde_tree før oppdatering
-            # Henter kunder
-            self.kunde_tree["columns"] = ("Kundenummer", "Fornavn", "Etternavn", "Adresse", "Post Nummer")              #Setter inn kolonner
-            for col in self.kunde_tree["columns"]:                                                                      #for loop som den kjører gjennom
-                self.kunde_tree.heading(col, text=col)                                                                  #Setter overskrift
-                self.kunde_tree.column(col, width=100, anchor="center")                                                 #Forteller at kolonnen skal være 100px bred og midtstilt
-            
-            data = self.db.call_procedure("hent_alle_kunder")                                                           #Henter data fra databasen med følgende store procedures: "SELECT * FROM varehusdb.kunde;"
-            for i in data:                                                                                              #Henter dataene som ligger i variablen data
-                self.kunde_tree.insert("", "end", values=i)  
-            self.kunde_window.destroy()
-
-GUI()  #Starter GUI
+            self.SlettKunde.config(state="disabled")                                                                    #Hindrer dobbel sletting mens databasen jobber
+            kNr = int(self.kundenummer_box.get())
+            self.bakgrunn.kjør(self.db.deactivate_kunde, kNr, ferdig=lambda _: self.kundeFjernet(kNr), feilet=self.slåPå(self.SlettKunde))  #Oppdaterer databasen med slettingen av kundenummeret som er valgt i treeviewen, i bakgrunnen.
+
+    def slåPå(self, knapp):                                                                                             #Gir en feilet-funksjon som slår knappen på igjen, så brukeren kan prøve på nytt etter en feil
+        def feilet(_):
+            if knapp.winfo_exists():                                                                                    #Vinduet kan være lukket imens
+                knapp.config(state="normal")
+        return feilet
+
+    #De tre funksjonene under kjøres i hovedtråden når databasen er ferdig, og endrer bare den ene raden i kundelisten
+    @sikkerhetsSjekk
+    def kundeEndret(self, rad):                                                                                         #En kunde er endret
+        self.kunde_window.destroy()                                                                                     #Lukker vinduet etter oppdatering
+        self.ordre_forhånd.tøm()                                                                                        #Forhåndshentede ordredetaljer kan ha gammelt navn eller adresse
+        if self.kunde_indeks is not None:
+            self.kunde_indeks.oppdater(rad)                                                                             #Søkeindeksen oppdateres for den ene raden
+        if self.kunde_søk.viser_treff:
+            self.kunde_søk.søk()                                                                                        #Søker på nytt, så treffene stemmer med endringen
+        else:
+            self.kunde_liste.oppdaterRad(rad[0], rad)                                                                   #Nye verdier i raden med dette kundenummeret
+
+    @sikkerhetsSjekk
+    def kundeLagtTil(self, rad):                                                                                        #En ny kunde er lagret
+        self.kunde_window.destroy()
+        if self.kunde_indeks is not None:
+            self.kunde_indeks.legg_til(rad)
+        if self.kunde_søk.viser_treff:
+            self.kunde_søk.søk()
+        else:
+            self.kunde_liste.settInnRad(rad[0], rad)                                                                    #Setter inn raden på riktig plass etter kundenummer
+
+    @sikkerhetsSjekk
+    def kundeFjernet(self, kNr):                                                                                        #En kunde er slettet (satt inaktiv)
+        self.kunde_window.destroy()
+        if self.kunde_indeks is not None:
+            self.kunde_indeks.fjern(kNr)                                                                                #Inaktive kunder skal ikke komme i søket
+        if self.kunde_søk.viser_treff:
+            self.kunde_søk.søk()
+        else:
+            self.kunde_liste.fjernRad(kNr)                                                                              #Fjerner bare den ene raden
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Varelager, ordrer og kunder.")
+    parser.add_argument("--profile-startup", action="store_true", help="skriv ut hvor lang tid importene og oppstarten tar")
+    parser.parse_args()
+    GUI(profil)  #Starter GUI
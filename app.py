@@ -1,7 +1,19 @@
-from flask import Flask, render_template_string                                                                         #Importerer Flask og benytter HTML fra en streng og ikke en  ekstern fil.
+from flask import Flask, Response, request, abort, jsonify                                                              #Importerer Flask, HTML-malen ligger i en streng og ikke en ekstern fil.
 from flask_mysqldb import MySQL                                                                                         #Importerer MySQL klassen fra FLASK
 import os                                                                                                               #Importerer os for å kunne aksessere .env parameter.
+import hashlib                                                                                                          #Benyttes for å lage ETag for fakturaene.
+import threading                                                                                                        #Benyttes for å beskytte fakturacachen når flere forespørsler kjører samtidig.
+import time                                                                                                             #Benyttes for å vite hvor gammelt endringsmerket for varetabellen er.
+from datetime import datetime, timezone                                                                                 #Benyttes for Last-Modified.
+from collections import OrderedDict                                                                                     #Benyttes som LRU-cache for ferdige faktura-PDF-er.
 from dotenv import load_dotenv                                                                                          #Benyttes for å laste variablene i .env filen inn i app.py
+from pdf_generator import PDFGenerator                                                                                  #Lager faktura-PDF-er i minnet.
+from database.cache import get_cache, QueryCache                                                                        #Delt cache for spørringsresultater med levetid (TTL).
+from database.database_program_staticmethod import Database                                                             #Databaseklassen med tilkoblingspool, brukes av JSON-API-et.
+from varestrom import VareStrøm                                                                                         #Sender endringer i varetabellen til alle åpne nettlesere.
+from database.metrics import get_metrics                                                                         #Tidsmålinger for databasekallene, vises på /metrics.
+from eksport import eksporter, EKSPORTER, FORMATER                                                                      #Eksport av ordrer, ordrelinjer og varer som strømmes ut.
+from database.varesok import VareSøk                                                                                    #Fritekstsøk i varenavn med FULLTEXT-indeksen og LRU-cache for de vanligste søkene.
 
 load_dotenv()                                                                                                           #Benyttes for å laste variablene i .env filen og benytte senere i koden.
 app = Flask(__name__)                                                                                                   #Lager en Flask applikasjon.
@@ -13,13 +25,12 @@ app.config["MYSQL_PORT"] = int(os.getenv("DB_PORT"))
 app.config["MYSQL_DB"] = os.getenv("DB_NAME")                                                                           #Henter info fra .env filen for å angi databasen som skal benyttes.
 mysql = MySQL(app)                                                                                                      #Starter MySQL og knytter det mot Flask applikasjonen.
 
-#HTML kode for hjemmesiden til varelageret, er satt opp til å oppdateres hvert minutt.
+#HTML kode for hjemmesiden til varelageret. Siden lytter på /api/varer/stream og endrer bare radene som er endret.
 HTML_TEMPLATE = """
 <!DOCTYPE html>                                                                                                         
 <html>
 <head>
     <title>Varelager</title>                                                                                            
-    <meta http-equiv="refresh" content="60">                                                                            
     <style>                                                                                                             
         table {border-collapse: collapse; width: 90%; margin: 20px auto;}                                               
         th, td {border: 1px solid #888; padding: 10px 14px; text-align: left;}
@@ -37,34 +48,270 @@ HTML_TEMPLATE = """
                 <th>Antall</th>
                 <th>Pris</th>
             </tr>
-        <thead>
-        <tbodyZ
+        </thead>
+        <tbody id="varer">
             {% for vare in varer %}
-            <tr>
+            <tr id="vare-{{vare.Vnr}}">
                 <td>{{vare.Vnr}}</td>
                 <td>{{vare.Betegnelse}}</td>
                 <td>{{vare.Antall}}</td>
                 <td>{{vare.Pris}}</td>
-            <tr>
+            </tr>
             {%endfor%}
         </tbody>
     </table>
+    <script>
+        const tabell = document.getElementById("varer");
+        function settRad(vare) {
+            let rad = document.getElementById("vare-" + vare[0]);
+            if (!rad) {
+                rad = tabell.insertRow();
+                rad.id = "vare-" + vare[0];
+                for (let i = 0; i < vare.length; i++) rad.insertCell();
+            }
+            vare.forEach((verdi, i) => { if (rad.cells[i].textContent !== String(verdi)) rad.cells[i].textContent = verdi; });
+        }
+        const strøm = new EventSource("/api/varer/stream");
+        strøm.addEventListener("endringer", e => {
+            const endringer = JSON.parse(e.data);
+            endringer.endret.forEach(settRad);
+            endringer.fjernet.forEach(vnr => { const rad = document.getElementById("vare-" + vnr); if (rad) rad.remove(); });
+        });
+        strøm.addEventListener("alle", e => {
+            const varer = JSON.parse(e.data);
+            const finnes = new Set(varer.map(vare => "vare-" + vare[0]));
+            Array.from(tabell.rows).forEach(rad => { if (!finnes.has(rad.id)) rad.remove(); });
+            varer.forEach(settRad);
+        });
+    </script>
 </body>
 </html>
 """
 
 @app.route("/")                                                                                                         #Angir hjemmesiden sin path i dette tilfellet eksempelvis 127.0.0.1:5000/
 def varerlager_html():                                                                                                  #Funksjon som angir websiden.
+    spørring = "SELECT Vnr, Betegnelse, Antall, Pris FROM vare"                                                             #Benyttes for å hente data fra tabellen vare i databasen
+    cache = get_cache()                                                                                                     #Alle som åpner siden innenfor levetiden får samme resultat uten ny spørring.
+    varelager_data = cache.get(QueryCache.key(spørring))                                                                    #Prøver cachen først.
+    if varelager_data is not None:
+        return lag_vareside(varelager_data)
     cursor = mysql.connection.cursor()                                                                                     #Benyttes for å sende forespørsel til databasen for å kjøre en SQL forespørsel.
     try:
-        cursor.execute("SELECT Vnr, Betegnelse, Antall, Pris FROM vare")                                                       #Benyttes for å hente data fra tabellen vare i databasen
+        cursor.execute(spørring)                                                                                               #Benyttes for å hente data fra tabellen vare i databasen
         varelager_data = cursor.fetchall()                                                                                     #Lager dataforespørselen fra databasen som en tuple liste.
         cursor.close()                                                                                                         #Lukker databaseforbindelsen
-        varer = [{"Vnr": row[0], "Betegnelse": row[1], "Antall": row[2], "Pris": float(row[3])}for row in varelager_data]   #Benyttes for å konvertere dataene til en dictionary.
-        return render_template_string(HTML_TEMPLATE, varer=varer)                                                           #Flask funksjon for å lage HTML siden og returnere den til klienten.
+        cache.put(QueryCache.key(spørring), varelager_data, ("vare",))                                                         #Lagrer resultatet i cachen.
+        return lag_vareside(varelager_data)
     except Exception as e:                                                                                                 #Håndterer eventuelle feil som kan oppstå under forespørselen til databasen.
         cursor.close()                                                                                                         #Lukker databaseforbindelsen
         return f"En feil oppstod: {e}"                                                                                     #Returnerer feilmeldingen til klienten.
 
+VARESIDE = app.jinja_env.from_string(HTML_TEMPLATE)                                                                     #Malen kompileres én gang ved oppstart i stedet for ved hver forespørsel.
+
+def lag_vareside(varelager_data):                                                                                       #Lager HTML-siden fra radene i vare-tabellen.
+    varer = [{"Vnr": row[0], "Betegnelse": row[1], "Antall": row[2], "Pris": float(row[3])}for row in varelager_data]       #Benyttes for å konvertere dataene til en dictionary.
+    return VARESIDE.render(varer=varer)                                                                                     #Lager HTML siden fra den ferdig kompilerte malen og returnerer den til klienten.
+
+#JSON-API for varelageret
+#Listen blas med en markør (etter=siste VNr) i stedet for OFFSET, og klienten kan velge hvilke felt den vil ha.
+#Alle svar får ETag og Last-Modified fra et endringsmerke for varetabellen, så klienter som spør jevnlig
+#får 304 uten data så lenge ingenting er endret. Endringsmerket er én billig spørring som huskes noen sekunder.
+api_db = Database(pooled=True)                                                                                          #Tilkoblinger fra poolen, deles av alle trådene til webserveren.
+VAREFELT = ("VNr", "Betegnelse", "Pris", "KatNr", "Antall", "Hylle")                                                    #Feltene klienten kan velge, bare disse settes inn i spørringen.
+vare_søk = VareSøk(api_db)                                                                                              #Søkene deler én cache for alle trådene til webserveren.
+STANDARD_GRENSE = 100                                                                                                   #Antall varer per side hvis klienten ikke sier noe.
+MAKS_GRENSE = 1000                                                                                                      #Største side en klient kan be om.
+ENDRINGSMERKE_SEKUNDER = 2                                                                                              #Hvor lenge endringsmerket brukes før det hentes på nytt.
+endringsmerke = {"verdi": None, "hentet": 0.0, "endret": None}                                                          #Siste endringsmerke, når det ble hentet og når det sist endret seg.
+endringsmerke_lås = threading.Lock()                                                                                    #Bare én tråd henter merket av gangen.
+
+def hent_endringsmerke():                                                                                               #Returnerer (merke, sist endret) for varetabellen.
+    with endringsmerke_lås:
+        if time.monotonic() - endringsmerke["hentet"] > ENDRINGSMERKE_SEKUNDER:
+            merke = api_db.fetch_one(                                                                                   #MAX(endret) endres når en vare legges til eller endres (migrasjon 7), slettet når en slettes (migrasjon 8).
+                "SELECT (SELECT MAX(endret) FROM vare), (SELECT slettet FROM endringsteller WHERE tabell = 'vare')"     #To oppslag i indekser, radene i vare telles ikke.
+            )
+            merke = f"{merke[0]}-{merke[1]}"
+            if merke != endringsmerke["verdi"]:                                                                         #Tabellen er endret siden sist (eller første gang).
+                endringsmerke["verdi"] = merke
+                endringsmerke["endret"] = datetime.now(timezone.utc).replace(microsecond=0)
+            endringsmerke["hentet"] = time.monotonic()
+        return endringsmerke["verdi"], endringsmerke["endret"]
+
+def lag_etag(*deler):                                                                                                   #ETag for et svar, bygd av endringsmerket og det klienten spurte om.
+    return hashlib.sha1(repr(deler).encode()).hexdigest()
+
+def ikke_endret(etag, sist_endret):                                                                                     #Returnerer et 304-svar hvis klienten allerede har denne versjonen, ellers None.
+    if request.if_none_match:                                                                                           #If-None-Match går foran If-Modified-Since.
+        treff = etag in request.if_none_match
+    else:
+        treff = request.if_modified_since is not None and sist_endret <= request.if_modified_since
+    if not treff:
+        return None
+    svar = Response(status=304)
+    return sett_hoder(svar, etag, sist_endret)
+
+def sett_hoder(svar, etag, sist_endret):                                                                                #Hodene som lar klienten spørre med If-None-Match/If-Modified-Since neste gang.
+    svar.set_etag(etag)
+    svar.last_modified = sist_endret
+    svar.headers["Cache-Control"] = "no-cache"                                                                          #Klienten spør hver gang, men får 304 hvis ingenting er endret.
+    return svar
+
+def les_felt():                                                                                                         #Leser ?felt=VNr,Pris og sjekker at alle feltene er lov.
+    felt = request.args.get("felt")
+    if not felt:
+        return VAREFELT
+    valgt = tuple(navn.strip() for navn in felt.split(",") if navn.strip())
+    ukjente = [navn for navn in valgt if navn not in VAREFELT]
+    if ukjente or not valgt:
+        abort(400, description=f"Ukjente felt: {', '.join(ukjente)}. Gyldige felt er {', '.join(VAREFELT)}.")
+    return valgt
+
+def til_json(felt, rad):                                                                                                #Gjør en rad om til en dictionary med JSON-vennlige verdier.
+    return {navn: float(verdi) if navn == "Pris" else verdi for navn, verdi in zip(felt, rad)}
+
+@app.route("/api/varer")                                                                                                #Eksempelvis /api/varer?etter=12345&limit=50&felt=VNr,Antall
+def api_varer():                                                                                                        #Én side med varer sortert på VNr.
+    felt = les_felt()
+    etter = request.args.get("etter")                                                                                   #VNr til siste vare klienten har fått.
+    grense = request.args.get("limit", STANDARD_GRENSE, type=int)
+    if grense is None or not 1 <= grense <= MAKS_GRENSE:
+        abort(400, description=f"limit må være mellom 1 og {MAKS_GRENSE}.")
+    merke, sist_endret = hent_endringsmerke()
+    etag = lag_etag(merke, felt, etter, grense)
+    svar = ikke_endret(etag, sist_endret)
+    if svar is not None:                                                                                                #Ingenting er endret, ingen spørring mot varetabellen.
+        return svar
+
+    kolonner = ", ".join(dict.fromkeys(("VNr",) + felt))                                                                #VNr hentes alltid, den er markøren til neste side.
+    if etter is None:
+        rader = api_db.fetch_all(f"SELECT {kolonner} FROM vare ORDER BY VNr LIMIT %s", (grense + 1,))
+    else:
+        rader = api_db.fetch_all(f"SELECT {kolonner} FROM vare WHERE VNr > %s ORDER BY VNr LIMIT %s", (etter, grense + 1))
+    flere = len(rader) > grense                                                                                         #Vi henter én ekstra rad for å vite om det finnes en neste side.
+    rader = rader[:grense]
+    hentet = tuple(dict.fromkeys(("VNr",) + felt))
+    varer = [{navn: verdi for navn, verdi in til_json(hentet, rad).items() if navn in felt} for rad in rader]
+    svar = jsonify({"varer": varer, "neste": rader[-1][0] if flere else None})                                          #"neste" sendes som ?etter= for å få neste side.
+    return sett_hoder(svar, etag, sist_endret)
+
+@app.route("/api/varer/search")                                                                                         #Eksempelvis /api/varer/search?q=skrue&limit=20&offset=20
+def api_varer_søk():                                                                                                    #Varene som passer til søket, de mest relevante først.
+    tekst = request.args.get("q", "").strip()
+    if not tekst:
+        abort(400, description="Søket mangler, bruk ?q=.")
+    grense = request.args.get("limit", STANDARD_GRENSE, type=int)
+    if grense is None or not 1 <= grense <= MAKS_GRENSE:
+        abort(400, description=f"limit må være mellom 1 og {MAKS_GRENSE}.")
+    start = request.args.get("offset", 0, type=int)
+    if start is None or start < 0:
+        abort(400, description="offset må være 0 eller mer.")
+    merke, sist_endret = hent_endringsmerke()
+    etag = lag_etag(merke, "søk", tekst, grense, start)
+    svar = ikke_endret(etag, sist_endret)
+    if svar is not None:
+        return svar
+
+    rader = vare_søk.søk(tekst, grense + 1, start, versjon=merke)                                                        #Nytt endringsmerke gir nye svar, så cachen viser aldri gamle varer.
+    flere = len(rader) > grense                                                                                         #Vi henter én ekstra rad for å vite om det finnes flere treff.
+    varer = [{"VNr": rad[0], "Betegnelse": rad[1], "Pris": float(rad[2]), "Antall": rad[3], "Relevans": float(rad[4])} for rad in rader[:grense]]
+    svar = jsonify({"varer": varer, "neste": start + grense if flere else None})                                        #"neste" sendes som ?offset= for å få flere treff.
+    return sett_hoder(svar, etag, sist_endret)
+
+@app.route("/api/varer/<vnr>")                                                                                          #Eksempelvis /api/varer/12345?felt=Antall
+def api_vare(vnr):                                                                                                      #Én vare.
+    felt = les_felt()
+    merke, sist_endret = hent_endringsmerke()
+    etag = lag_etag(merke, felt, vnr)
+    svar = ikke_endret(etag, sist_endret)
+    if svar is not None:
+        return svar
+    rad = api_db.fetch_one(f"SELECT {', '.join(felt)} FROM vare WHERE VNr = %s", (vnr,))
+    if rad is None:
+        abort(404, description=f"Fant ingen vare med varenummer {vnr}.")
+    return sett_hoder(jsonify(til_json(felt, rad)), etag, sist_endret)
+
+#Endringer i varetabellen sendes til alle åpne sider. Én bakgrunnstråd spør databasen uansett hvor mange som ser på.
+vare_strøm = VareStrøm(
+    lambda: hent_endringsmerke()[0],                                                                                    #Samme billige endringsmerke som JSON-API-et bruker.
+    lambda: api_db.fetch_all("SELECT Vnr, Betegnelse, Antall, Pris FROM vare"),                                         #Samme kolonner som tabellen på hjemmesiden.
+    ved_endring=lambda: get_cache().invalidate("vare"),                                                                 #Hjemmesiden skal ikke vise gamle rader fra cachen.
+)
+
+@app.route("/api/varer/stream")                                                                                         #Server-Sent Events, åpnes av hjemmesiden med EventSource.
+def api_varer_strøm():
+    kø = vare_strøm.abonner()
+    svar = Response(vare_strøm.hendelser(kø), mimetype="text/event-stream")
+    svar.headers["Cache-Control"] = "no-cache"
+    svar.headers["X-Accel-Buffering"] = "no"                                                                            #Ber nginx om å sende hendelsene med en gang.
+    return svar
+
+@app.route("/api/export/<tabell>.<format>")                                                                             #Eksempelvis /api/export/ordrelinje.csv, /api/export/vare.ndjson eller /api/export/ordre.excel
+def api_eksport(tabell, format):                                                                                        #Strømmer eksporten, første bytene sendes før hele tabellen er lest.
+    if tabell not in EKSPORTER or format not in FORMATER:
+        abort(404, description=f"Kan eksportere {', '.join(EKSPORTER)} som {', '.join(FORMATER)}.")
+    filendelse, mimetype = FORMATER[format]
+    svar = Response(eksporter(tabell, format, api_db), mimetype=mimetype)                                               #Generatoren leser og sender én bolk av gangen.
+    svar.headers["Content-Disposition"] = f'attachment; filename="{tabell}.{filendelse}"'
+    svar.headers["X-Accel-Buffering"] = "no"
+    return svar
+
+@app.route("/metrics")                                                                                                  #Tidsmålingene i Prometheus-format, for scraping.
+def metrics():
+    linjer = [get_metrics().prometheus()]
+    for prefiks, stats in (("db_pool", api_db.pool_stats()), ("db_cache", api_db.cache_stats()), ("vare_sok_cache", vare_søk.get_stats())):  #Tallene fra poolen og cachene som gauges.
+        for navn, verdi in stats.items():
+            if isinstance(verdi, (int, float)):
+                linjer.append(f"# TYPE {prefiks}_{navn} gauge\n{prefiks}_{navn} {float(verdi)}\n")
+    return Response("".join(linjer), mimetype="text/plain; version=0.0.4")
+
+FAKTURA_CACHE_BYTES = 32 * 1024 * 1024                                                                                  #Maks antall bytes med ferdige faktura-PDF-er som holdes i minnet.
+faktura_cache = OrderedDict()                                                                                           #ETag -> PDF-bytes, eldste brukte fjernes først.
+faktura_cache_bytes = 0                                                                                                 #Summen av PDF-ene i cachen.
+faktura_cache_lås = threading.Lock()                                                                                    #Beskytter cachen mot samtidige forespørsler.
+
+def lagre_faktura(etag, pdf):                                                                                           #Legger PDF-en i cachen og fjerner de eldste brukte til summen er under grensen.
+    global faktura_cache_bytes
+    if len(pdf) > FAKTURA_CACHE_BYTES:                                                                                  #For stor til å caches.
+        return
+    with faktura_cache_lås:
+        if etag in faktura_cache:
+            return
+        faktura_cache[etag] = pdf
+        faktura_cache_bytes += len(pdf)
+        while faktura_cache_bytes > FAKTURA_CACHE_BYTES:
+            _, eldste = faktura_cache.popitem(last=False)
+            faktura_cache_bytes -= len(eldste)
+
+@app.route("/faktura/<int:ordre_nr>.pdf")                                                                               #Faktura som PDF, eksempelvis 127.0.0.1:5000/faktura/1001.pdf
+def faktura_pdf(ordre_nr):                                                                                              #Funksjon som lager fakturaen i minnet og sender den til klienten.
+    faktura = api_db.query_one("siste_faktura", (ordre_nr,))                                                            #Nedlastingen bare leser, fakturaen lages i GUI-et (Lag faktura).
+    if faktura is None:
+        abort(404, description="Ordren finnes ikke eller er ikke fakturert.")
+    detaljer = api_db.ordre_detaljer(ordre_nr)                                                                          #Ordre, kunde, linjer og totaler med én spørring, samme som printPdf i GUI-et.
+    if detaljer is None:
+        abort(404)                                                                                                      #Ordren finnes ikke.
+    ordre, ordrelinjer, kunde = detaljer.ordre, detaljer.fakturalinjer, detaljer.kunde
+    faktura_nummer = faktura.id
+
+    etag = hashlib.sha1(repr((faktura_nummer, ordre, ordrelinjer, kunde)).encode()).hexdigest()                         #ETag endres bare hvis fakturaen eller dataene endres.
+    if etag in request.if_none_match:                                                                                   #Klienten har allerede denne versjonen.
+        svar = Response(status=304)
+        svar.set_etag(etag)
+        return svar
+    with faktura_cache_lås:
+        pdf = faktura_cache.get(etag)
+        if pdf is not None:
+            faktura_cache.move_to_end(etag)                                                                             #Nylig brukt.
+    if pdf is None:                                                                                                     #Ikke i cachen, lages i minnet uten midlertidig fil.
+        pdf = PDFGenerator().render_invoice(ordre, ordrelinjer, kunde, faktura_nummer, totaler=detaljer.totaler)
+        lagre_faktura(etag, pdf)
+
+    svar = Response(pdf, mimetype="application/pdf")                                                                    #Content-Length settes ut ifra bytes.
+    svar.set_etag(etag)
+    svar.headers["Cache-Control"] = "private, no-cache"                                                                 #Nettleseren spør med ETag hver gang og får 304 hvis ingenting er endret.
+    svar.headers["Content-Disposition"] = f'inline; filename="faktura_{faktura_nummer}.pdf"'
+    return svar
+
 if __name__ == "__main__":                                                                                              #Kjører koden når man starter applikasjonen.
-    app.run(debug=False)                                                                                                #Kjører applikasjonen, debug er satt til False da dette er i produksjon. Trenger ikke try/except da run funksjonen har det innebygd.
+    app.run(debug=False, threaded=True)                                                                                 #Kjører applikasjonen, debug er satt til False da dette er i produksjon. Hver forespørsel får sin egen tråd og låner en tilkobling fra poolen. Trenger ikke try/except da run funksjonen har det innebygd.
@@ -0,0 +1,91 @@
+#Kjører databasearbeid i bakgrunnstråder så Tk-vinduet ikke fryser
+#Tkinter tåler ikke at andre tråder endrer widgets, så jobbene kjøres i en trådpool og resultatene
+#legges i en kø. Køen tømmes fra hovedtråden med root.after, og ferdig-funksjonen kalles der.
+#Jobber med samme nøkkel erstatter hverandre: starter man en ny, blir svaret fra den gamle kastet.
+#Stille jobber (f.eks. forhåndshenting) viser ikke opptatt-indikatoren, og feil fra dem vises ikke.
+#feilet(feil) kalles i hovedtråden når jobben feiler, f.eks. for å slå på igjen en knapp som ble slått av da jobben startet.
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+ANTALL_TRÅDER = 4                                                           #Antall bakgrunnstråder
+INTERVALL_MS = 30                                                           #Hvor ofte hovedtråden ser etter ferdige jobber
+
+
+class Bakgrunn:
+    def __init__(self, root, ved_feil, ved_opptatt=None, antall_tråder=ANTALL_TRÅDER):
+        self.root = root                                                    #Hovedvinduet som eier after-løkken
+        self.ved_feil = ved_feil                                            #Kalles med (navn, feil) når en jobb feiler
+        self.ved_opptatt = ved_opptatt                                      #Kalles med True/False når noe er/ikke er i gang
+        self.antall_tråder = antall_tråder                                  #Størrelsen på trådpoolen
+        self._executor = ThreadPoolExecutor(max_workers=antall_tråder, thread_name_prefix="db")  #Trådpoolen jobbene kjøres i
+        self._ferdige = queue.Queue()                                       #Ferdige jobber som venter på å leveres i hovedtråden
+        self._generasjon = {}                                               #Siste generasjon per nøkkel, eldre svar kastes
+        self._siste = {}                                                    #Siste jobb per nøkkel, så den kan avbrytes
+        self._ventende = 0                                                  #Antall jobber som ikke er levert ennå
+        self._opptatt = False                                               #Det GUI-et sist fikk beskjed om
+        self.root.after(INTERVALL_MS, self._lever)                          #Starter leveringsløkken
+
+    def kjør(self, func, *args, ferdig=None, feilet=None, nøkkel=None, stille=False):  #Starter func(*args) i bakgrunnen, ferdig(resultat) eller feilet(feil) kalles i hovedtråden
+        generasjon = None
+        if nøkkel is not None:                                              #En ny jobb med samme nøkkel erstatter den forrige
+            generasjon = self._generasjon.get(nøkkel, 0) + 1
+            self._generasjon[nøkkel] = generasjon
+            forrige = self._siste.pop(nøkkel, None)
+            if forrige is not None:
+                forrige.cancel()                                            #Avbryter den hvis den ikke har startet ennå
+        if not stille:
+            self._ventende += 1
+            self._oppdaterOpptatt()
+        jobb = self._executor.submit(func, *args)                           #Sender jobben til trådpoolen
+        if nøkkel is not None:
+            self._siste[nøkkel] = jobb
+        navn = getattr(func, "__name__", str(func))                         #Navnet brukes i feilmeldingen
+        jobb.add_done_callback(lambda j: self._ferdige.put((j, navn, nøkkel, generasjon, ferdig, feilet, stille)))  #Køen er trådsikker
+        return jobb
+
+    def avbryt(self, nøkkel):                                               #Avbryter siste jobb med denne nøkkelen og kaster svaret
+        self._generasjon[nøkkel] = self._generasjon.get(nøkkel, 0) + 1
+        forrige = self._siste.pop(nøkkel, None)
+        if forrige is not None:
+            forrige.cancel()
+
+    def avslutt(self):                                                      #Stopper trådpoolen uten å vente på jobber som går
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _lever(self):                                                       #Leverer ferdige jobber i hovedtråden
+        while True:
+            try:
+                jobb, navn, nøkkel, generasjon, ferdig, feilet, stille = self._ferdige.get_nowait()
+            except queue.Empty:
+                break
+            if not stille:
+                self._ventende -= 1
+            if nøkkel is not None and self._siste.get(nøkkel) is jobb:
+                del self._siste[nøkkel]
+            if jobb.cancelled():                                            #Avbrutt før den startet
+                continue
+            if nøkkel is not None and self._generasjon.get(nøkkel) != generasjon:
+                continue                                                    #En nyere jobb har tatt over, svaret kastes
+            feil = jobb.exception()
+            if feil is not None:
+                if not stille:
+                    self.ved_feil(navn, feil)                                   #Feil fra bakgrunnstråden vises i hovedtråden
+                if feilet is not None:
+                    try:
+                        feilet(feil)
+                    except Exception as e:
+                        self.ved_feil(getattr(feilet, "__name__", navn), e)
+            elif ferdig is not None:
+                try:
+                    ferdig(jobb.result())
+                except Exception as e:                                      #Leveringsløkken skal ikke stoppe av en feil i ferdig-funksjonen
+                    self.ved_feil(getattr(ferdig, "__name__", navn), e)
+        self._oppdaterOpptatt()
+        self.root.after(INTERVALL_MS, self._lever)                          #Ser etter ferdige jobber igjen om litt
+
+    def _oppdaterOpptatt(self):                                             #Forteller GUI-et om noe er i gang, bare når det endrer seg
+        opptatt = self._ventende > 0
+        if opptatt != self._opptatt and self.ved_opptatt is not None:
+            self.ved_opptatt(opptatt)
+        self._opptatt = opptatt
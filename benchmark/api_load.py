@@ -0,0 +1,79 @@
+#Lasttest av JSON-API-et i app.py, måler forespørsler per sekund og svartider (p50/p99)
+#Start app.py mot en lokal database først, og kjør fra prosjektmappen:
+#   python -m benchmark.api_load --url http://127.0.0.1:5000/api/varer -n 2000 -c 16
+#   python -m benchmark.api_load --url http://127.0.0.1:5000/api/varer -n 2000 -c 16 --etag   (klienter som spør med If-None-Match)
+
+import argparse
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+#Sender én forespørsel og returnerer (statuskode, ETag, sekunder)
+def spør(url, etag=None):
+    forespørsel = urllib.request.Request(url)
+    if etag:
+        forespørsel.add_header("If-None-Match", etag)
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(forespørsel) as svar:
+            svar.read()
+            status, ny_etag = svar.status, svar.headers.get("ETag")
+    except urllib.error.HTTPError as e:                                     #304 og feilkoder kommer som HTTPError
+        status, ny_etag = e.code, e.headers.get("ETag") or etag
+    return status, ny_etag, time.perf_counter() - start
+
+
+#Kjører n forespørsler fordelt på c tråder og returnerer svartider og antall per statuskode
+def kjør_last(url, n, c, bruk_etag=False):
+    tider = []
+    statuser = {}
+    lås = threading.Lock()
+    igjen = [n]
+
+    def klient():
+        etag = None
+        while True:
+            with lås:
+                if igjen[0] == 0:
+                    return
+                igjen[0] -= 1
+            status, ny_etag, sekunder = spør(url, etag if bruk_etag else None)
+            etag = ny_etag
+            with lås:
+                tider.append(sekunder)
+                statuser[status] = statuser.get(status, 0) + 1
+
+    tråder = [threading.Thread(target=klient) for _ in range(c)]
+    start = time.perf_counter()
+    for tråd in tråder:
+        tråd.start()
+    for tråd in tråder:
+        tråd.join()
+    return tider, statuser, time.perf_counter() - start
+
+
+def prosentil(sorterte, andel):
+    return sorterte[min(len(sorterte) - 1, int(len(sorterte) * andel))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lasttest av varelager-API-et.")
+    parser.add_argument("--url", default="http://127.0.0.1:5000/api/varer", help="adressen som skal testes")
+    parser.add_argument("-n", type=int, default=1000, help="antall forespørsler totalt")
+    parser.add_argument("-c", type=int, default=8, help="antall samtidige klienter")
+    parser.add_argument("--etag", action="store_true", help="klientene sender ETag fra forrige svar (If-None-Match)")
+    args = parser.parse_args()
+
+    spør(args.url)                                                          #Første forespørsel varmer opp poolen og endringsmerket
+    tider, statuser, sekunder = kjør_last(args.url, args.n, args.c, args.etag)
+    tider.sort()
+    print(f"{args.n} forespørsler, {args.c} klienter, {'med' if args.etag else 'uten'} If-None-Match")
+    print(f"  {args.n / sekunder:.1f} forespørsler/s, totalt {sekunder:.2f} s")
+    print(f"  p50 {prosentil(tider, 0.50) * 1000:.1f} ms, p99 {prosentil(tider, 0.99) * 1000:.1f} ms, maks {tider[-1] * 1000:.1f} ms")
+    print("  statuskoder: " + ", ".join(f"{status}: {antall}" for status, antall in sorted(statuser.items())))
+
+
+if __name__ == "__main__":
+    main()
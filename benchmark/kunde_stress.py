@@ -0,0 +1,67 @@
+#Stresstest av kundenummer-tildelingen: mange tråder (og prosesser) legger inn kunder samtidig
+#Sjekker at ingen innsetting feiler og at alle kundenumrene er forskjellige. Kjøres mot en testdatabase,
+#kundene som legges inn blir liggende (Etternavn = "Stresstest").
+#   python -m benchmark.kunde_stress --tråder 16 -n 50
+#   python -m benchmark.kunde_stress --prosesser 4 --tråder 8 -n 50 --bolk 10    (insert_kunder med 10 om gangen)
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from database.database_program_staticmethod import Database
+from database.sekvens import get_sekvens
+
+
+#Legger inn n kunder fra én tråd, returnerer (kundenumre, feil)
+def legg_inn(db, tråd, n, bolk):
+    kundenumre, feil = [], []
+    rader = [("Tråd", "Stresstest", f"Testveien {tråd}-{i}", "2815") for i in range(n)]
+    for i in range(0, n, bolk):
+        try:
+            if bolk == 1:
+                kundenumre.append(db.insert_kunde(*rader[i]))
+            else:
+                kundenumre.extend(db.insert_kunder(rader[i:i + bolk]))
+        except Exception as e:
+            feil.append(str(e))
+    return kundenumre, feil
+
+
+#Kjøres i hver prosess, som er som én egen klient med sin egen sekvensblokk
+def kjør_prosess(prosess, tråder, n, bolk):
+    db = Database(pooled=True, pool_size=tråder)
+    with ThreadPoolExecutor(max_workers=tråder) as pool:
+        resultater = list(pool.map(lambda t: legg_inn(db, f"{prosess}.{t}", n, bolk), range(tråder)))
+    kundenumre = [kNr for numre, _ in resultater for kNr in numre]
+    feil = [melding for _, meldinger in resultater for melding in meldinger]
+    return kundenumre, feil, get_sekvens("kunde").stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Legger inn kunder fra mange tråder samtidig og sjekker kundenumrene.")
+    parser.add_argument("--prosesser", type=int, default=1, help="antall prosesser (klienter)")
+    parser.add_argument("--tråder", type=int, default=8, help="tråder per prosess")
+    parser.add_argument("-n", type=int, default=50, help="kunder per tråd")
+    parser.add_argument("--bolk", type=int, default=1, help="kunder per kall, over 1 bruker insert_kunder")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.prosesser) as pool:
+        resultater = list(pool.map(kjør_prosess, range(args.prosesser), [args.tråder] * args.prosesser, [args.n] * args.prosesser, [args.bolk] * args.prosesser))
+    sekunder = time.perf_counter() - start
+
+    kundenumre = [kNr for numre, _, _ in resultater for kNr in numre]
+    feil = [melding for _, meldinger, _ in resultater for melding in meldinger]
+    reservasjoner = sum(stats["reservasjoner"] for _, _, stats in resultater)
+    forventet = args.prosesser * args.tråder * args.n
+    like = len(kundenumre) - len(set(kundenumre))
+
+    print(f"{len(kundenumre)} av {forventet} kunder lagt inn på {sekunder:.2f} s ({len(kundenumre) / sekunder:.0f} kunder/s)")
+    print(f"  {reservasjoner} reservasjoner i sekvenstabellen, {like} like kundenumre, {len(feil)} feil")
+    for melding in sorted(set(feil))[:10]:
+        print(f"  Feil: {melding}")
+    if like or feil or len(kundenumre) != forventet:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#Måler hvor lang tid det tar å lage N fakturaer med PDFGenerator
+#Kjøres fra prosjektmappen (logoen leses fra static/logo.png):
+#   python -m benchmark.pdf_rendering -n 200
+#   python -m benchmark.pdf_rendering -n 200 --uten-cache     (lager ressursene på nytt for hver faktura)
+
+import argparse
+import datetime
+import io
+import time
+from decimal import Decimal
+import pdf_generator
+from pdf_generator import PDFGenerator
+
+
+#Lager en ordre med "antall_linjer" ordrelinjer i samme format som databasen gir
+def lag_testordre(ordreNr, antall_linjer=10):
+    dato = datetime.date(2025, 1, 1)
+    ordre = (ordreNr, dato, dato, dato, 1)
+    kunde = (1, "Ola", "Nordmann", "Gymnasvegen 27", "2815")
+    linjer = [(ordreNr, f"{10000 + i}", Decimal("199.90") + i, 1 + i % 5, f"Vare nummer {i}") for i in range(antall_linjer)]
+    return ordre, linjer, kunde
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Måler tiden det tar å lage fakturaer.")
+    parser.add_argument("-n", type=int, default=100, help="antall fakturaer")
+    parser.add_argument("--linjer", type=int, default=10, help="ordrelinjer per faktura")
+    parser.add_argument("--uten-cache", action="store_true", help="lager stilark, tabellstil og logo på nytt for hver faktura")
+    args = parser.parse_args()
+
+    pdfgen = PDFGenerator()
+    tider = []
+    for i in range(args.n):
+        ordre, linjer, kunde = lag_testordre(i + 1, args.linjer)
+        if args.uten_cache:
+            pdf_generator.nullstill_ressurser()
+        start = time.perf_counter()
+        pdfgen.build_invoice(ordre, linjer, kunde, i + 1, io.BytesIO())        #Skriver til minnet så disken ikke påvirker målingen
+        tider.append(time.perf_counter() - start)
+
+    første = tider[0]                                                           #Første faktura betaler for å lage ressursene
+    tider.sort()
+    print(f"{args.n} fakturaer, {args.linjer} linjer hver, {'uten' if args.uten_cache else 'med'} delte ressurser")
+    print(f"  totalt {sum(tider):.2f} s, {args.n / sum(tider):.1f} fakturaer/s")
+    print(f"  første {første * 1000:.1f} ms, median {tider[len(tider) // 2] * 1000:.1f} ms, p95 {tider[int(len(tider) * 0.95) - 1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
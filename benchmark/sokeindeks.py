@@ -0,0 +1,61 @@
+#Måler søkeindeksen i sokeindeks.py: byggetid, tid per søk og tid for å oppdatere én rad
+#Kundene lages tilfeldig (fast frø) med navn og adresser som går igjen, slik de gjør i en ekte kundeliste.
+#Hvert søk kjøres flere ganger, og tiden er snittet (søkefeltet venter SØK_MS etter siste tastetrykk før det søker).
+#Med --db bygges indeksen fra hent_alle_kunder i databasen i stedet.
+#
+#Bruk:
+#   python -m benchmark.sokeindeks -n 1000000
+#   python -m benchmark.sokeindeks --db "ola" "nordmann gymnas"
+
+import argparse
+import random
+import time
+from sokeindeks import SøkeIndeks
+
+FORNAVN = [navn + endelse for navn in ("Ola", "Kari", "Per", "Anne", "Lars", "Ingrid", "Nils", "Marit", "Jon", "Hilde") for endelse in ("", "a", "e", "ine", "us", "ar", "en", "ik")]
+ETTERNAVN = [navn + endelse for navn in ("Nord", "Han", "Ol", "Jo", "Berg", "Dahl", "Lie", "Moe", "Strand", "Haug", "Bakke", "Lund") for endelse in ("sen", "mann", "rud", "heim", "vik", "ås", "dal", "by")]
+GATER = [navn + endelse for navn in ("Gymnas", "Stor", "Kirke", "Skole", "Park", "Sjø", "Fjell", "Elve", "Bjørke", "Eike") for endelse in ("vegen", "gata", "veien", "bakken", "stien")]
+SØK = ["o", "ola", "nordsen", "ordse", "ola nord", "gymnasvegen 12", "kari strand bakken", "12345", "9", "zzz"]
+
+
+def lag_kunder(antall, frø=1):
+    tilfeldig = random.Random(frø)
+    return [
+        (kNr, tilfeldig.choice(FORNAVN), tilfeldig.choice(ETTERNAVN), f"{tilfeldig.choice(GATER)} {tilfeldig.randint(1, 200)}", f"{tilfeldig.randint(1, 9999):04}")
+        for kNr in range(1, antall + 1)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Måler søkeindeksen for kunder.")
+    parser.add_argument("søk", nargs="*", help="søkene som måles (standard: et utvalg korte og lange søk)")
+    parser.add_argument("-n", type=int, default=1_000_000, help="antall tilfeldige kunder")
+    parser.add_argument("--ganger", type=int, default=20, help="antall ganger hvert søk kjøres")
+    parser.add_argument("--db", action="store_true", help="bygg indeksen fra kundene i databasen")
+    args = parser.parse_args()
+
+    if args.db:
+        from database.database_program_staticmethod import Database
+        kunder = Database().call_procedure("hent_alle_kunder")
+    else:
+        kunder = lag_kunder(args.n)
+
+    start = time.perf_counter()
+    indeks = SøkeIndeks(felt=(1, 2, 3)).bygg(kunder)
+    print(f"{len(indeks):,} kunder, bygget på {time.perf_counter() - start:.2f} s")
+
+    for søk in args.søk or SØK:
+        start = time.perf_counter()
+        for _ in range(args.ganger):
+            treff = indeks.søk(søk)
+        print(f"  {søk!r:<22} {len(treff):4} treff  {(time.perf_counter() - start) / args.ganger * 1000:7.2f} ms")
+
+    endringer = kunder[:1000]
+    start = time.perf_counter()
+    for kunde in endringer:
+        indeks.oppdater((kunde[0], "Endret", "Navn", "Ny gate 1", kunde[4]))
+    print(f"  oppdater én kunde {(time.perf_counter() - start) / len(endringer) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#Måler fakturaer med svært mange ordrelinjer (tid, antall sider og største minnebruk)
+#Linjene kommer fra en generator, slik de gjør fra Database.stream_rows, så målingen viser at PDFGenerator bare
+#har én side med linjer i minnet om gangen. Med --en-tabell måles også den gamle måten (alle linjene i én tabell)
+#for sammenligning, den blir fort svært treg for store fakturaer.
+#Kjøres fra prosjektmappen (logoen leses fra static/logo.png):
+#   python -m benchmark.stor_faktura
+#   python -m benchmark.stor_faktura --linjer 10000 --en-tabell
+#   python -m benchmark.stor_faktura --ordre 1001      (linjene til en ordre i databasen)
+
+import argparse
+import io
+import re
+import time
+import tracemalloc
+from decimal import Decimal
+from reportlab.platypus import SimpleDocTemplate, Table, Spacer
+from reportlab.lib.pagesizes import A4
+import pdf_generator
+from pdf_generator import PDFGenerator, add_footer
+from benchmark.pdf_rendering import lag_testordre
+
+
+#Ordrelinjene som en generator, så de aldri ligger i minnet samtidig
+def lag_linjer(ordreNr, antall_linjer):
+    for i in range(antall_linjer):
+        yield (ordreNr, f"{10000 + i}", Decimal("199.90") + i % 1000, 1 + i % 5, f"Vare nummer {i}", 1 + i % 6)
+
+
+#Den gamle måten: alle linjene i én tabell som ReportLab deler opp i sider (med logoen, så PDF-ene kan sammenlignes)
+def én_tabell(ordre, ordrelinjer, kunde, faktura_nummer, buffer):
+    ressurser = pdf_generator.hent_ressurser()
+    logo = pdf_generator.Logo(ressurser.hent_logo(), width=100, height=50)
+    table_data = [["Antall", "Beskrivelse", "Enhetspris", "Totalt"]]
+    for linje in ordrelinjer:
+        table_data.append([f"{int(linje[3]):,}", f"{linje[4]}", f"{linje[2]:,.2f} NOK", f"{linje[2] * linje[3]:,.2f} NOK"])
+    table = Table(table_data, colWidths=[60, 200, 100, 100], repeatRows=1)
+    table.setStyle(ressurser.table_style)
+    SimpleDocTemplate(buffer, pagesize=A4).build([logo, Spacer(1, 12), table], onFirstPage=add_footer, onLaterPages=add_footer)
+
+
+def mål(navn, lag):
+    buffer = io.BytesIO()
+    start = time.perf_counter()
+    lag(buffer)
+    sekunder = time.perf_counter() - start
+
+    tracemalloc.start()                                                         #Egen kjøring for minnet, tracemalloc gjør koden tregere
+    lag(io.BytesIO())
+    _, topp = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sider = len(re.findall(rb"/Type /Page\b", buffer.getvalue()))
+    print(f"  {navn:<12} {sekunder:8.2f} s  {sider:6} sider  {len(buffer.getvalue()) / 1e6:7.1f} MB PDF  topp {topp / 1e6:7.1f} MB minne")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Måler fakturaer med svært mange ordrelinjer.")
+    parser.add_argument("--linjer", type=int, nargs="+", default=[10_000, 100_000], help="antall ordrelinjer per faktura")
+    parser.add_argument("--en-tabell", action="store_true", help="mål også den gamle måten med én tabell")
+    parser.add_argument("--ordre", type=int, help="lag fakturaen for denne ordren i databasen i stedet")
+    args = parser.parse_args()
+
+    pdfgen = PDFGenerator()
+    pdf_generator.hent_ressurser().hent_logo()                                  #Logoen leses før målingen
+
+    if args.ordre is not None:
+        from database.database_program_staticmethod import Database
+        from database.queries import QUERIES
+        db = Database()
+        detaljer = db.ordre_detaljer(args.ordre)
+        if detaljer is None:
+            raise SystemExit(f"Fant ikke ordre {args.ordre}")
+        print(f"Ordre {args.ordre}, {len(detaljer.linjer)} linjer")
+        mål("sidevis", lambda buffer: pdfgen.build_invoice(detaljer.ordre, db.stream_rows(QUERIES["fakturalinjer"].sql, (args.ordre,)), detaljer.kunde, args.ordre, buffer))
+        return
+
+    for antall in args.linjer:
+        ordre, _, kunde = lag_testordre(1, 0)
+        print(f"{antall:,} linjer")
+        mål("sidevis", lambda buffer: pdfgen.build_invoice(ordre, lag_linjer(1, antall), kunde, 1, buffer))
+        if args.en_tabell:
+            mål("én tabell", lambda buffer: én_tabell(ordre, lag_linjer(1, antall), kunde, 1, buffer))
+
+
+if __name__ == "__main__":
+    main()
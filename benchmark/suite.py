@@ -0,0 +1,203 @@
+#Måler de viktigste kodeveiene mot varehus-databasen fra benchmark/varehus.py og lagrer resultatet som JSON
+#Målingene bruker den samme koden som programmet: KeysetPager (Database.fetch_all), den lagrede prosedyren
+#hent_alle_kunder (Database.call_procedure), ordredetaljene som vises når en ordre klikkes (Database.ordre_detaljer),
+#PDFGenerator.generate_invoice og forsiden / i app.py. Hver måling kjøres én gang for oppvarming og deretter
+#--ganger ganger, og tiden lagres som min, median, p95 og snitt i millisekunder.
+#
+#Med --motor sqlite leser ReplikaDatabase fra en SQLite-fil i samme format som den lokale replikaen, så alt kan kjøres
+#uten MySQL. Forsiden / bruker flask_mysqldb og kan bare kjøres mot MySQL, med SQLite måles bare lag_vareside med de
+#samme radene. Med --motor mysql brukes Database mot en egen database (standard varehus_bench) med tilkoblingen fra .env.
+#JSON-filen har commit, motor og antall rader i tabellene, så resultater fra ulike commits kan sammenlignes med
+#--sammenlign. Tidene kan bare sammenlignes med samme motor og samme antall linjer.
+#Kjøres fra prosjektmappen (logoen leses fra static/logo.png):
+#   python -m benchmark.suite --linjer 100000 --json resultater.json
+#   python -m benchmark.suite --linjer 100000 --sammenlign resultater.json
+#   python -m benchmark.suite --motor mysql --linjer 10000000 --ganger 5
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from benchmark import varehus
+
+FORSIDE_SQL = "SELECT Vnr, Betegnelse, Antall, Pris FROM vare"         # Samme spørring som / i app.py
+SIDER = 20                                                              # Sider som blas i ordrelisten
+
+
+#Commit og om arbeidsmappen har endringer som ikke er committet
+def git_versjon():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        endret = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, check=True).stdout.strip())
+        return commit, endret
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+#Kjører func(i) for i = 0..ganger-1 etter én oppvarming og returnerer tidene i millisekunder
+def mål(func, ganger):
+    func(-1)
+    tider = []
+    for i in range(ganger):
+        start = time.perf_counter()
+        func(i)
+        tider.append((time.perf_counter() - start) * 1000)
+    return tider
+
+
+def oppsummer(tider):
+    sortert = sorted(tider)
+    return {
+        "ganger": len(tider),
+        "min_ms": round(sortert[0], 3),
+        "p50_ms": round(statistics.median(sortert), 3),
+        "p95_ms": round(sortert[min(len(sortert) - 1, int(len(sortert) * 0.95))], 3),
+        "snitt_ms": round(statistics.fmean(sortert), 3),
+    }
+
+
+#Database for motoren, med dataene laget hvis de ikke finnes fra før
+def åpne(args):
+    if args.motor == "sqlite":
+        sti = varehus.lag_sqlite(args.linjer, args.frø, ny=args.ny)
+        from database.replika import ReplikaDatabase
+        db = ReplikaDatabase(sti, start=False)                          # Ingen synk, alt leses fra filen
+        if not db.replika.klar:
+            raise RuntimeError(f"{sti} mangler tabeller, lag den på nytt med --ny")
+        return db
+    varehus.lag_mysql(args.linjer, args.frø, args.database, ny=args.ny)
+    from database.database_program_staticmethod import Database
+    return Database(pooled=True)                                         # Uten resultatcache, det er databasen som måles
+
+
+#faktura kopieres ikke til replikaen, så med SQLite telles radene rett i filen
+def antall_rader(args, db, tabell):
+    sql = f"SELECT COUNT(*) FROM {tabell}"
+    return db.replika.les(sql)[0][0] if args.motor == "sqlite" else db.fetch_one(sql)[0]
+
+
+#Forsiden / i app.py. Med MySQL gjennom Flask sin testklient, med SQLite bare malen med de samme radene.
+def forside(args, db):
+    import app
+    from database.cache import get_cache
+    if args.motor == "sqlite":
+        rader = db.fetch_all(FORSIDE_SQL)
+        return "app / (lag_vareside)", lambda i: app.lag_vareside(rader)
+    app.app.config["MYSQL_DB"] = args.database
+    klient = app.app.test_client()
+
+    def hent(i):
+        get_cache().invalidate("vare")                                  # Hver forespørsel går til databasen
+        svar = klient.get("/")
+        if svar.status_code != 200 or svar.data.startswith(b"En feil oppstod"):
+            raise RuntimeError(svar.data[:200].decode(errors="replace"))
+    return "app /", hent
+
+
+def kjør(args, db):
+    from database.paging import ordre_pager, vare_pager, kunde_pager
+    from pdf_generator import PDFGenerator
+    tilfeldig = random.Random(args.frø)
+    siste_ordre = db.fetch_one("SELECT MAX(OrdreNr) FROM ordre")[0]
+    ordrer = [tilfeldig.randint(1, siste_ordre) for _ in range(args.ganger * 10)]
+
+    def bla(i):
+        pager = ordre_pager(db)
+        for _ in range(SIDER):
+            pager.next_page()
+
+    målinger = [
+        ("fetch_all ordre_pager side 1", lambda i: ordre_pager(db).next_page(), args.ganger * 10),
+        (f"fetch_all ordre_pager {SIDER} sider", bla, args.ganger),
+        ("fetch_all vare_pager side 1", lambda i: vare_pager(db).next_page(), args.ganger * 10),
+        ("fetch_all kunde_pager side 1", lambda i: kunde_pager(db).next_page(), args.ganger * 10),
+        ("call_procedure hent_alle_kunder", lambda i: db.call_procedure("hent_alle_kunder"), args.ganger),
+        ("ordre_detaljer", lambda i: db.ordre_detaljer(ordrer[i]), len(ordrer)),         # Det påTreKlikk henter, en ny ordre hver gang
+    ]
+
+    fakturaer = [db.ordre_detaljer(ordreNr) for ordreNr in ordrer[:args.ganger + 1]]     # Hentes før målingen, bare PDF-en måles
+    pdfgen = PDFGenerator()
+    mappe = tempfile.TemporaryDirectory()
+
+    def faktura(i):
+        detaljer = fakturaer[i]
+        pdfgen.generate_invoice(detaljer.ordre, detaljer.fakturalinjer, detaljer.kunde, i + 2, output_dir=mappe.name, open_file=False, totaler=detaljer.totaler)
+    målinger.append(("generate_invoice", faktura, args.ganger))
+
+    resultater, hoppet_over = {}, {}
+    try:
+        navn, func = forside(args, db)
+        målinger.append((navn, func, args.ganger))
+    except Exception as e:                                              # Flask eller .env mangler
+        hoppet_over["app /"] = f"{type(e).__name__}: {e}"
+
+    for navn, func, ganger in målinger:
+        resultater[navn] = oppsummer(mål(func, ganger))
+        print(f"  {navn:<36} {resultater[navn]['p50_ms']:10.2f} ms (p95 {resultater[navn]['p95_ms']:.2f})")
+    mappe.cleanup()
+    return resultater, hoppet_over
+
+
+#Skriver median før og nå for målingene som finnes i begge
+def sammenlign(forrige, nå):
+    if (forrige.get("motor"), forrige.get("skala")) != (nå["motor"], nå["skala"]):
+        print("Advarsel: forrige kjøring brukte en annen motor eller et annet antall rader")
+    print(f"Sammenlignet med {forrige.get('commit')} ({forrige.get('tidspunkt')}), median i ms:")
+    for navn, måling in nå["resultater"].items():
+        før = forrige.get("resultater", {}).get(navn)
+        if før:
+            endring = (måling["p50_ms"] - før["p50_ms"]) / før["p50_ms"] * 100 if før["p50_ms"] else 0
+            print(f"  {navn:<36} {før['p50_ms']:10.2f} {måling['p50_ms']:10.2f} {endring:+7.1f} %")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Måler databasekallene, fakturaen og forsiden mot varehus-databasen.")
+    parser.add_argument("--motor", choices=("sqlite", "mysql"), default="sqlite")
+    parser.add_argument("--linjer", type=int, default=100_000, help="antall ordrelinjer i databasen (10 000 til 10 000 000)")
+    parser.add_argument("--frø", type=int, default=1, help="frø for dataene og ordrene som hentes")
+    parser.add_argument("--ganger", type=int, default=20, help="antall målinger per kodevei (sidene og ordredetaljene 10 ganger så mange)")
+    parser.add_argument("--database", default=varehus.MYSQL_DATABASE, help="databasen i MySQL")
+    parser.add_argument("--ny", action="store_true", help="lag dataene på nytt selv om de finnes")
+    parser.add_argument("--json", help="lagrer resultatet i denne filen")
+    parser.add_argument("--sammenlign", help="JSON-fil fra en tidligere kjøring")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db = åpne(args)
+    skala = {tabell: antall_rader(args, db, tabell) for tabell in ("Poststed", "kunde", "vare", "ordre", "ordrelinje", "faktura")}
+    print(f"{args.motor}: " + ", ".join(f"{tabell} {antall:,}" for tabell, antall in skala.items()) + f"  (klar etter {time.perf_counter() - start:.1f} s)")
+    resultater, hoppet_over = kjør(args, db)
+    for navn, grunn in hoppet_over.items():
+        print(f"  {navn:<36} hoppet over ({grunn})")
+
+    commit, endret = git_versjon()
+    nå = {
+        "commit": commit,
+        "ikke_committet": endret,
+        "tidspunkt": datetime.now().isoformat(timespec="seconds"),
+        "motor": args.motor,
+        "linjer": args.linjer,
+        "frø": args.frø,
+        "skala": skala,
+        "python": platform.python_version(),
+        "plattform": platform.platform(),
+        "resultater": resultater,
+        "hoppet_over": hoppet_over,
+    }
+    if args.sammenlign:
+        with open(args.sammenlign, encoding="utf-8") as fil:
+            sammenlign(json.load(fil), nå)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fil:
+            json.dump(nå, fil, indent=2, ensure_ascii=False)
+        print(f"Lagret i {os.path.abspath(args.json)}")
+
+
+if __name__ == "__main__":
+    main()
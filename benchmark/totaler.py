@@ -0,0 +1,141 @@
+#Sjekker og måler totalberegningen i database/totaler.py
+#Egenskapssjekk: tilfeldige fakturaer (fast frø) regnes ut med beregn og beregn_mange og sammenlignes med en
+#enkel Decimal-utregning, og det sjekkes at netto + MVA = brutto, at linjesummene summerer til netto og at
+#rekkefølgen på linjene ikke betyr noe. Deretter telles hvor ofte den gamle float-utregningen i PDFGenerator
+#ga et annet beløp, og tidene for float, beregn og beregn_mange skrives ut.
+#Med --db sammenlignes netto for alle ordrene i databasen med SUM(PrisPrEnhet * Antall) regnet ut av MySQL.
+#
+#Bruk:
+#   python -m benchmark.totaler -n 2000 --linjer 50
+#   python -m benchmark.totaler --db
+
+import argparse
+import random
+import time
+from decimal import Decimal, ROUND_HALF_UP
+from database.totaler import beregn, beregn_mange, til_øre, STANDARD_SATS
+
+SATSER = {1: Decimal("0.15"), 2: Decimal("0.12"), 3: Decimal("0")}           #Satser som brukes i sjekken, resten får standard sats
+
+
+#Lager "antall" fakturaer med tilfeldige priser (to desimaler), antall og kategorier
+def lag_fakturaer(antall, linjer, frø=1):
+    tilfeldig = random.Random(frø)
+    fakturaer = {}
+    for ordreNr in range(1, antall + 1):
+        fakturaer[ordreNr] = [
+            (ordreNr, 10000 + i, Decimal(tilfeldig.randint(1, 10_000_000)).scaleb(-2), tilfeldig.randint(1, 500), f"Vare {i}", tilfeldig.randint(1, 6))
+            for i in range(tilfeldig.randint(1, linjer))
+        ]
+    return fakturaer
+
+
+#Fasit med Decimal: MVA per sats av summen for satsen, rundet av til øre
+def fasit(ordrelinjer):
+    per_sats = {}
+    for linje in ordrelinjer:
+        sats = SATSER.get(linje[5], STANDARD_SATS)
+        per_sats[sats] = per_sats.get(sats, Decimal(0)) + linje[2] * linje[3]
+    netto = sum(per_sats.values(), Decimal(0))
+    mva = sum(((grunnlag * sats).quantize(Decimal("0.01"), ROUND_HALF_UP) for sats, grunnlag in per_sats.items()), Decimal(0))
+    return netto, mva, netto + mva
+
+
+#Den gamle utregningen fra PDFGenerator, med float og én sats
+def float_totaler(ordrelinjer):
+    totalt = 0
+    for linje in ordrelinjer:
+        totalt += int(float(linje[3])) * float(linje[2])
+    return totalt, totalt * 0.25, totalt * 1.25
+
+
+def egenskapssjekk(fakturaer):
+    feil = 0
+    alle = beregn_mange(fakturaer, SATSER)
+    for ordreNr, ordrelinjer in fakturaer.items():
+        totaler = beregn(ordrelinjer, SATSER)
+        stokket = list(ordrelinjer)
+        random.Random(ordreNr).shuffle(stokket)
+        sjekker = {
+            "fasit": tuple(totaler) == fasit(ordrelinjer),
+            "beregn_mange": tuple(alle[ordreNr]) == tuple(totaler),
+            "brutto = netto + mva": totaler.brutto == totaler.netto + totaler.mva,
+            "linjesummer": sum(totaler.linjesummer) == totaler.netto_øre,
+            "rekkefølge": tuple(beregn(stokket, SATSER)) == tuple(totaler),
+        }
+        for navn, ok in sjekker.items():
+            if not ok:
+                feil += 1
+                print(f"  Ordre {ordreNr}: {navn} feilet ({totaler})")
+    return feil
+
+
+#Antall fakturaer der float-utregningen gir et annet beløp (med to desimaler) enn fasit med én sats
+def float_avvik(fakturaer):
+    avvik = 0
+    for ordrelinjer in fakturaer.values():
+        netto, mva, brutto = float_totaler(ordrelinjer)
+        riktig = tuple(beregn(ordrelinjer, {}))
+        if tuple(Decimal(f"{verdi:.2f}") for verdi in (netto, mva, brutto)) != riktig:
+            avvik += 1
+    return avvik
+
+
+#Beste tid av flere kjøringer, så én treg kjøring ikke avgjør sammenligningen
+def mål(navn, func, antall_linjer, ganger=5):
+    sekunder = float("inf")
+    for _ in range(ganger):
+        start = time.perf_counter()
+        func()
+        sekunder = min(sekunder, time.perf_counter() - start)
+    print(f"  {navn:<18} {sekunder * 1000:8.1f} ms  ({antall_linjer / sekunder:,.0f} linjer/s)")
+
+
+#Sammenligner netto for hver ordre i databasen med summen MySQL regner ut
+def sjekk_mot_databasen():
+    from database.database_program_staticmethod import Database
+    db = Database(pooled=True)
+    sql_netto = {rad[0]: rad[1] for rad in db.fetch_all("SELECT OrdreNr, SUM(PrisPrEnhet * Antall) FROM ordrelinje GROUP BY OrdreNr")}
+    alle = beregn_mange(db.stream_rows(
+        "SELECT ordrelinje.OrdreNr, ordrelinje.VNr, ordrelinje.PrisPrEnhet, ordrelinje.Antall, vare.Betegnelse, vare.KatNr "
+        "FROM ordrelinje INNER JOIN vare ON ordrelinje.VNr = vare.VNr"
+    ))
+    avvik = [ordreNr for ordreNr, netto in sql_netto.items() if ordreNr not in alle or alle[ordreNr].netto_øre != til_øre(netto)]
+    print(f"Databasen: {len(sql_netto)} ordrer, {len(avvik)} med avvik fra SUM(PrisPrEnhet * Antall)")
+    for ordreNr in avvik[:20]:
+        print(f"  Ordre {ordreNr}: MySQL {sql_netto[ordreNr]}, beregn {alle[ordreNr].netto if ordreNr in alle else 'mangler'}")
+    return len(avvik)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sjekker og måler totalberegningen for fakturaer.")
+    parser.add_argument("-n", type=int, default=2000, help="antall tilfeldige fakturaer")
+    parser.add_argument("--linjer", type=int, default=50, help="maks linjer per faktura")
+    parser.add_argument("--frø", type=int, default=1, help="frø for tilfeldige data")
+    parser.add_argument("--db", action="store_true", help="sammenlign også med SUM(PrisPrEnhet * Antall) i databasen")
+    args = parser.parse_args()
+
+    fakturaer = lag_fakturaer(args.n, args.linjer, args.frø)
+    antall_linjer = sum(len(linjer) for linjer in fakturaer.values())
+    feil = egenskapssjekk(fakturaer)
+    print(f"{args.n} fakturaer, {antall_linjer} linjer: {feil} feil i egenskapssjekken")
+    print(f"  float-utregningen ga feil beløp på {float_avvik(fakturaer)} av {args.n} fakturaer")
+
+    print("Tid for alle fakturaene:")
+    mål("float", lambda: [float_totaler(linjer) for linjer in fakturaer.values()], antall_linjer)
+    mål("beregn", lambda: [beregn(linjer) for linjer in fakturaer.values()], antall_linjer)
+    mål("beregn_mange", lambda: beregn_mange(fakturaer), antall_linjer)
+    alle_linjer = [linje for linjer in fakturaer.values() for linje in linjer]
+    mål("beregn_mange strøm", lambda: beregn_mange(alle_linjer), antall_linjer)
+    print("Med egne satser per KatNr:")
+    mål("beregn", lambda: [beregn(linjer, SATSER) for linjer in fakturaer.values()], antall_linjer)
+    mål("beregn_mange", lambda: beregn_mange(fakturaer, SATSER), antall_linjer)
+
+    if args.db:
+        feil += sjekk_mot_databasen()
+    if feil:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#Lager varehus-databasen (Poststed, kunde, vare, ordre, ordrelinje og faktura) med tilfeldige data for målinger
+#Størrelsen styres av antall ordrelinjer (fra 10 000 til 10 000 000), og de andre tabellene skaleres etter det
+#(se skala). Dataene lages med fast frø, så samme antall og frø gir nøyaktig de samme radene hver gang, og radene
+#lages og settes inn i bolker, så selv 10 millioner linjer ikke ligger i minnet på en gang.
+#
+#SQLite: filen får samme format som den lokale replikaen (database/replika.py), med kolonnene fra migrasjonene
+#og replika_status fylt ut, så ReplikaDatabase leser fra den med de samme spørringene som GUI-et bruker.
+#MySQL: en egen database (standard varehus_bench) får tabellene fra skoleoppgaven, dataene settes inn, og
+#deretter kjøres migrasjonene (database/migrations.py) slik som på en ekte database.
+#En tabell benchmark_info husker antall og frø, så databasen bare lages på nytt når de endres.
+#
+#Bruk:
+#   python -m benchmark.varehus --linjer 100000                             (SQLite-fil i benchmark_data/)
+#   python -m benchmark.varehus --linjer 1000000 --motor mysql --database varehus_bench
+
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+SNITT_LINJER = 10               # Ordrelinjer per ordre i snitt
+BOLK = 10_000                   # Rader per INSERT
+DATA_MAPPE = "benchmark_data"   # Hvor SQLite-filene legges
+MYSQL_DATABASE = "varehus_bench"
+START_DATO = date(2020, 1, 1)
+
+# Tabellene slik de er i databasen fra skoleoppgaven: (kolonner med MySQL-type, primærnøkkel)
+SKJEMA = {
+    "Poststed": ((("PostNr", "CHAR(4)"), ("Poststed", "VARCHAR(255)")), ("PostNr",)),
+    "kunde": ((("KNr", "INT"), ("Fornavn", "VARCHAR(255)"), ("Etternavn", "VARCHAR(255)"), ("Adresse", "VARCHAR(255)"), ("PostNr", "CHAR(4)")), ("KNr",)),
+    "vare": ((("VNr", "VARCHAR(10)"), ("Betegnelse", "VARCHAR(255)"), ("Pris", "DECIMAL(8,2)"), ("KatNr", "INT"), ("Antall", "INT"), ("Hylle", "CHAR(3)")), ("VNr",)),
+    "ordre": ((("OrdreNr", "INT"), ("OrdreDato", "DATE"), ("SendtDato", "DATE"), ("BetaltDato", "DATE"), ("KNr", "INT")), ("OrdreNr",)),
+    "ordrelinje": ((("OrdreNr", "INT"), ("VNr", "VARCHAR(10)"), ("PrisPrEnhet", "DECIMAL(8,2)"), ("Antall", "INT")), ("OrdreNr", "VNr")),
+}
+
+FORNAVN = ["Ola", "Kari", "Per", "Anne", "Lars", "Ingrid", "Nils", "Marit", "Jon", "Hilde", "Knut", "Sigrid", "Olav", "Tone", "Arne", "Liv"]
+ETTERNAVN = ["Nordmann", "Hansen", "Olsen", "Johansen", "Berg", "Dahl", "Lie", "Moe", "Strand", "Haug", "Bakke", "Lund", "Vik", "Ås"]
+GATER = ["Gymnasvegen", "Storgata", "Kirkeveien", "Skolebakken", "Parkveien", "Sjøgata", "Fjellvegen", "Elvegata", "Bjørkeveien"]
+STEDER = ["Gjøvik", "Hamar", "Lillehammer", "Raufoss", "Brumunddal", "Moelv", "Elverum", "Kapp", "Biri", "Redalen"]
+VARETYPER = ["Skrue", "Mutter", "Skive", "Bolt", "Spiker", "Hammer", "Sag", "Tang", "Drill", "Vinkel", "Beslag", "Hengsel", "Lim", "Maling"]
+EGENSKAPER = ["galvanisert", "rustfri", "messing", "svart", "hvit", "utendørs", "innendørs", "proff", "hobby", "ekstra sterk"]
+
+
+#Antall rader i hver tabell for et gitt antall ordrelinjer
+def skala(linjer):
+    ordrer = max(1, linjer // SNITT_LINJER)
+    return {
+        "ordrelinje": linjer,
+        "ordre": ordrer,
+        "kunde": max(100, ordrer // 4),
+        "vare": min(max(500, linjer // 200), 99_999),
+        "Poststed": 1000,
+        "faktura": ordrer // 2,                             # Omtrent halvparten av ordrene er fakturert
+    }
+
+
+def lag_poststeder(antall):
+    return [(f"{postnr:04}", f"{STEDER[postnr % len(STEDER)]} {postnr}") for postnr in range(1, antall + 1)]
+
+
+def lag_kunder(antall, poststeder, frø):
+    tilfeldig = random.Random(frø)
+    for kNr in range(1, antall + 1):
+        yield (kNr, tilfeldig.choice(FORNAVN), tilfeldig.choice(ETTERNAVN), f"{tilfeldig.choice(GATER)} {tilfeldig.randint(1, 200)}", tilfeldig.choice(poststeder)[0])
+
+
+def lag_varer(antall, frø):
+    tilfeldig = random.Random(frø + 1)
+    return [
+        (f"{vNr:05}", f"{tilfeldig.choice(VARETYPER)} {tilfeldig.randint(1, 200)}mm {tilfeldig.choice(EGENSKAPER)}", Decimal(tilfeldig.randint(500, 500_000)).scaleb(-2),
+         tilfeldig.randint(1, 6), tilfeldig.randint(0, 5000), f"{tilfeldig.choice('ABCDEF')}{tilfeldig.randint(1, 99):02}")
+        for vNr in range(1, antall + 1)
+    ]
+
+
+#Ordrene én og én som (ordre, [ordrelinjer]), til det er laget "linjer" ordrelinjer til sammen
+def lag_ordrer(linjer, kunder, varer, frø):
+    tilfeldig = random.Random(frø + 2)
+    ordreNr, igjen = 0, linjer
+    while igjen > 0:
+        ordreNr += 1
+        antall = min(igjen, tilfeldig.randint(1, 2 * SNITT_LINJER - 1))
+        ordredato = START_DATO + timedelta(days=tilfeldig.randint(0, 5 * 365))
+        sendt = ordredato + timedelta(days=tilfeldig.randint(0, 5)) if tilfeldig.random() < 0.9 else None
+        betalt = sendt + timedelta(days=tilfeldig.randint(0, 30)) if sendt and tilfeldig.random() < 0.8 else None
+        ordre = (ordreNr, ordredato, sendt, betalt, tilfeldig.randint(1, kunder))
+        valgte = sorted(tilfeldig.sample(range(len(varer)), antall))      # Hver vare bare én gang per ordre (primærnøkkel)
+        yield ordre, [(ordreNr, varer[i][0], varer[i][2], tilfeldig.randint(1, 20)) for i in valgte]
+        igjen -= antall
+
+
+#Setter inn radene fra en generator i bolker og committer etter hver bolk
+def sett_inn(tilkobling, plassholder, tabell, kolonner, rader):
+    sql = f"INSERT INTO {tabell} ({', '.join(kolonner)}) VALUES ({', '.join([plassholder] * len(kolonner))})"
+    cursor = tilkobling.cursor()
+    bolk = []
+    for rad in rader:
+        bolk.append(rad)
+        if len(bolk) == BOLK:
+            cursor.executemany(sql, bolk)
+            tilkobling.commit()
+            bolk = []
+    if bolk:
+        cursor.executemany(sql, bolk)
+        tilkobling.commit()
+    cursor.close()
+
+
+#Fyller alle tabellene. Ordrene, ordrelinjene og fakturaene lages sammen og settes inn bolk for bolk.
+def fyll(tilkobling, plassholder, linjer, frø):
+    antall = skala(linjer)
+    poststeder = lag_poststeder(antall["Poststed"])
+    varer = lag_varer(antall["vare"], frø)
+    kolonner = {tabell: [navn for navn, _ in SKJEMA[tabell][0]] for tabell in SKJEMA}
+    sett_inn(tilkobling, plassholder, "Poststed", kolonner["Poststed"], poststeder)
+    sett_inn(tilkobling, plassholder, "kunde", kolonner["kunde"], lag_kunder(antall["kunde"], poststeder, frø))
+    sett_inn(tilkobling, plassholder, "vare", kolonner["vare"], varer)
+
+    ordrer, ordrelinjer, fakturaer = [], [], []
+    for ordre, linjene in lag_ordrer(linjer, antall["kunde"], varer, frø):
+        ordrer.append(ordre)
+        ordrelinjer.extend(linjene)
+        if ordre[0] % 2 == 0:                                                   # Hver andre ordre har en faktura
+            fakturaer.append((ordre[0], ordre[4], datetime.combine(ordre[1], datetime.min.time())))
+        if len(ordrelinjer) >= BOLK:
+            sett_inn(tilkobling, plassholder, "ordre", kolonner["ordre"], ordrer)
+            sett_inn(tilkobling, plassholder, "ordrelinje", kolonner["ordrelinje"], ordrelinjer)
+            sett_inn(tilkobling, plassholder, "faktura", ("OrdreNr", "KNr", "dato"), fakturaer)
+            ordrer, ordrelinjer, fakturaer = [], [], []
+    sett_inn(tilkobling, plassholder, "ordre", kolonner["ordre"], ordrer)
+    sett_inn(tilkobling, plassholder, "ordrelinje", kolonner["ordrelinje"], ordrelinjer)
+    sett_inn(tilkobling, plassholder, "faktura", ("OrdreNr", "KNr", "dato"), fakturaer)
+
+
+#Kolonnedefinisjon i SQLite for en MySQL-type, med samme typenavn som replikaen bruker
+def sqlite_kolonne(navn, mysql_type):
+    from database.replika import sqlite_type
+    data_type, _, resten = mysql_type.lower().partition("(")
+    skala_ = int(resten.rstrip(")").split(",")[1]) if "," in resten else 0
+    return f"{navn} {sqlite_type(data_type, skala_)}"
+
+
+#Lager (eller gjenbruker) SQLite-filen for dette antallet linjer og frøet. Returnerer stien.
+def lag_sqlite(linjer, frø=1, sti=None, ny=False):
+    from database.replika import TABELLER, LOKALE_INDEKSER      # Registrerer også adapterne for Decimal og datoer
+    sti = sti or os.path.join(DATA_MAPPE, f"varehus_{linjer}_{frø}.sqlite3")
+    if os.path.exists(sti) and not ny:
+        tilkobling = sqlite3.connect(sti)
+        info = les_info(tilkobling)
+        tilkobling.close()
+        if info == {"linjer": str(linjer), "frø": str(frø)}:
+            return sti
+    os.makedirs(os.path.dirname(sti) or ".", exist_ok=True)
+    for fil in (sti, sti + "-wal", sti + "-shm"):
+        if os.path.exists(fil):
+            os.remove(fil)
+    tilkobling = sqlite3.connect(sti)
+    tilkobling.execute("PRAGMA journal_mode=WAL")
+    for tabell, (kolonner, nøkkel) in SKJEMA.items():                       # Kolonnene fra migrasjonene (is_active, endret) kommer i tillegg
+        definisjoner = [sqlite_kolonne(navn, mysql_type) for navn, mysql_type in kolonner]
+        if tabell == "kunde":
+            definisjoner.append("is_active INTEGER NOT NULL DEFAULT 1")
+        definisjoner.append("endret TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP")
+        tilkobling.execute(f"CREATE TABLE {tabell} ({', '.join(definisjoner)}, PRIMARY KEY ({', '.join(nøkkel)}))")
+    tilkobling.execute("CREATE TABLE faktura (id INTEGER PRIMARY KEY AUTOINCREMENT, OrdreNr INTEGER NOT NULL, KNr INTEGER NOT NULL, dato TIMESTAMP NOT NULL)")
+    fyll(tilkobling, "?", linjer, frø)
+    for tabell, indeks, kolonner in LOKALE_INDEKSER:
+        tilkobling.execute(f"CREATE INDEX {indeks} ON {tabell} ({', '.join(kolonner)})")
+    tilkobling.execute("CREATE TABLE replika_status (tabell TEXT PRIMARY KEY, synket_til TIMESTAMP, lokal_tid REAL)")
+    tilkobling.executemany("INSERT INTO replika_status VALUES (?, ?, ?)", [(tabell, datetime.now(), time.time()) for tabell in TABELLER])
+    skriv_info(tilkobling, "?", linjer, frø)
+    tilkobling.execute("ANALYZE")                                           # Statistikk for spørringsplanleggeren, som etter en migrasjon
+    tilkobling.commit()
+    tilkobling.close()
+    return sti
+
+
+#Lager (eller gjenbruker) databasen i MySQL, og setter DB_NAME så Database og migrasjonene bruker den
+def lag_mysql(linjer, frø=1, database=MYSQL_DATABASE, ny=False):
+    from database import database_program_staticmethod as dps
+    from database.migrations import migrer
+    import mysql.connector
+    server = mysql.connector.connect(host=dps.DB_HOST, user=dps.DB_USER, passwd=dps.DB_PASSWORD, port=dps.DB_PORT)
+    cursor = server.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database}")
+    cursor.execute(f"USE {database}")
+    dps.DB_NAME = database                                                  # ny_tilkobling leser DB_NAME hver gang
+    if not ny and les_info(server) == {"linjer": str(linjer), "frø": str(frø)}:
+        cursor.close()
+        server.close()
+        return database
+    for tabell in ("faktura", "ordrelinje", "ordre", "kunde", "vare", "Poststed", "sekvens", "schema_versjon", "benchmark_info"):
+        cursor.execute(f"DROP TABLE IF EXISTS {tabell}")
+    for tabell, (kolonner, nøkkel) in SKJEMA.items():
+        definisjoner = [f"{navn} {mysql_type}" for navn, mysql_type in kolonner]
+        cursor.execute(f"CREATE TABLE {tabell} ({', '.join(definisjoner)}, PRIMARY KEY ({', '.join(nøkkel)}))")
+    migrer(dps.Database(), til=1)                                           # faktura-tabellen, før dataene så fakturaene kan settes inn
+    fyll(server, "%s", linjer, frø)
+    migrer(dps.Database())                                                  # Resten av migrasjonene, som på en ekte database
+    cursor.execute("UPDATE sekvens SET neste = (SELECT COALESCE(MAX(KNr), 0) + 1 FROM kunde) WHERE navn = 'kunde'")
+    skriv_info(server, "%s", linjer, frø)
+    server.commit()
+    cursor.close()
+    server.close()
+    return database
+
+
+#{"linjer": ..., "frø": ...} som databasen ble laget med, None hvis den ikke er laget av dette skriptet
+def les_info(tilkobling):
+    cursor = tilkobling.cursor()
+    try:
+        cursor.execute("SELECT nøkkel, verdi FROM benchmark_info")
+        return dict(cursor.fetchall())
+    except Exception:                                                       # Tabellen finnes ikke
+        return None
+    finally:
+        cursor.close()
+
+
+def skriv_info(tilkobling, plassholder, linjer, frø):
+    cursor = tilkobling.cursor()
+    cursor.execute("CREATE TABLE IF NOT EXISTS benchmark_info (nøkkel VARCHAR(20) PRIMARY KEY, verdi VARCHAR(50))")
+    cursor.executemany(f"INSERT INTO benchmark_info (nøkkel, verdi) VALUES ({plassholder}, {plassholder})", [("linjer", str(linjer)), ("frø", str(frø))])
+    cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lager varehus-databasen med tilfeldige data for målinger.")
+    parser.add_argument("--linjer", type=int, default=100_000, help="antall ordrelinjer (de andre tabellene skaleres etter dette)")
+    parser.add_argument("--frø", type=int, default=1, help="frø for tilfeldige data")
+    parser.add_argument("--motor", choices=("sqlite", "mysql"), default="sqlite")
+    parser.add_argument("--database", default=MYSQL_DATABASE, help="databasen i MySQL (blir slettet og laget på nytt)")
+    parser.add_argument("--ny", action="store_true", help="lag dataene på nytt selv om de finnes")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.motor == "sqlite":
+        hvor = lag_sqlite(args.linjer, args.frø, ny=args.ny)
+    else:
+        hvor = lag_mysql(args.linjer, args.frø, args.database, ny=args.ny)
+    print(f"{hvor}: ca. " + ", ".join(f"{tabell} {antall:,}" for tabell, antall in skala(args.linjer).items()) + f"  ({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#Måler fritekstsøket i database/varesok.py mot LIKE '%ord%' på en stor varetabell
+#Lager tabellen vare_bench (samme kolonner og indekser som vare, også FULLTEXT-indeksen fra migrasjon 6) og fyller
+#den med tilfeldige varer (fast frø) i bolker. Hvert søk kjøres flere ganger med samme SQL som /api/varer/search,
+#bare med vare_bench i stedet for vare, og tiden er snittet. LIKE-søket krever at alle ordene finnes et sted i
+#varenavnet, så det gir omtrent de samme treffene, men må lese hver rad.
+#Tabellen slettes etterpå, med --behold blir den liggende så neste kjøring slipper å fylle den på nytt.
+#
+#Bruk:
+#   python -m benchmark.varesok -n 1000000
+#   python -m benchmark.varesok --behold "skrue 50mm" "galv"
+
+import argparse
+import random
+import time
+from database.database_program_staticmethod import Database, ny_tilkobling
+from database.queries import QUERIES
+from database.varesok import spørring_for
+
+TABELL = "vare_bench"
+BOLK = 10_000                   # Rader per INSERT
+
+TYPER = ["Skrue", "Mutter", "Skive", "Bolt", "Spiker", "Hammer", "Sag", "Tang", "Drill", "Vinkel", "Beslag", "Hengsel", "Lim", "Maling", "Pensel", "Tape"]
+MÅL = ["M6", "M8", "M10", "25mm", "50mm", "75mm", "100mm", "1L", "3L", "10L", "liten", "stor"]
+EGENSKAPER = ["galvanisert", "rustfri", "messing", "svart", "hvit", "treverk", "betong", "utendørs", "innendørs", "proff", "hobby", "ekstra sterk"]
+SØK = ["skrue", "skrue 50mm", "galv", "rustfri bolt m8", "ekstra sterk lim", "hammer proff", "zzz"]
+
+
+def lag_varer(start, antall, frø=1):
+    tilfeldig = random.Random(frø + start)
+    return [
+        (str(vNr), f"{tilfeldig.choice(TYPER)} {tilfeldig.choice(MÅL)} {tilfeldig.choice(EGENSKAPER)}", tilfeldig.randint(100, 100_000) / 100, tilfeldig.randint(1, 6), tilfeldig.randint(0, 5000), f"{tilfeldig.choice('ABCDEF')}{tilfeldig.randint(1, 9)}")
+        for vNr in range(start, start + antall)
+    ]
+
+
+#Lager og fyller vare_bench hvis den ikke allerede har nok rader
+def lag_tabell(antall):
+    db = ny_tilkobling()
+    cursor = db.cursor()
+    try:
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {TABELL} LIKE vare")                    #Får med FULLTEXT-indeksen hvis migrasjonene er kjørt
+        cursor.execute(f"SELECT COUNT(*) FROM {TABELL}")
+        finnes = cursor.fetchone()[0]
+        if finnes >= antall:
+            return finnes
+        cursor.execute(f"ALTER TABLE {TABELL} MODIFY VNr VARCHAR(10) NOT NULL")             #Varenumrene i vare er for korte til så mange varer
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s "
+            "AND COLUMN_NAME = 'Betegnelse' AND INDEX_TYPE = 'FULLTEXT'", (TABELL,)
+        )
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"ALTER TABLE {TABELL} ADD FULLTEXT INDEX ft_vare_betegnelse (Betegnelse)")
+        start = time.perf_counter()
+        for fra in range(1_000_000 + finnes, 1_000_000 + antall, BOLK):
+            cursor.executemany(
+                f"INSERT INTO {TABELL} (VNr, Betegnelse, Pris, KatNr, Antall, Hylle) VALUES (%s, %s, %s, %s, %s, %s)",
+                lag_varer(fra, min(BOLK, 1_000_000 + antall - fra)),
+            )
+            db.commit()
+        print(f"La inn {antall - finnes:,} varer på {time.perf_counter() - start:.1f} s")
+        return antall
+    finally:
+        cursor.close()
+        db.close()
+
+
+def slett_tabell():
+    db = ny_tilkobling()
+    cursor = db.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {TABELL}")
+    cursor.close()
+    db.close()
+
+
+#SQL og parametere for søket med FULLTEXT-indeksen (samme som VareSøk) og med LIKE '%ord%'
+def spørringer(tekst, grense):
+    navn, params = spørring_for(tekst, grense)
+    fulltekst = QUERIES[navn].sql.replace("FROM vare ", f"FROM {TABELL} ")
+    ordene = tekst.split()
+    like = (
+        f"SELECT VNr, Betegnelse, Pris, Antall FROM {TABELL} WHERE "
+        + " AND ".join("Betegnelse LIKE %s" for _ in ordene)
+        + " ORDER BY VNr LIMIT %s"
+    )
+    return (fulltekst, params), (like, tuple(f"%{ord}%" for ord in ordene) + (grense,))
+
+
+def mål(db, sql, params, ganger):
+    start = time.perf_counter()
+    for _ in range(ganger):
+        rader = db.fetch_all(sql, params)
+    return len(rader), (time.perf_counter() - start) / ganger * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Måler fritekstsøket i varenavn mot LIKE '%ord%'.")
+    parser.add_argument("søk", nargs="*", help="søkene som måles (standard: et utvalg korte og lange søk)")
+    parser.add_argument("-n", type=int, default=1_000_000, help="antall varer i testtabellen")
+    parser.add_argument("--grense", type=int, default=50, help="maks treff per søk")
+    parser.add_argument("--ganger", type=int, default=5, help="antall ganger hvert søk kjøres")
+    parser.add_argument("--behold", action="store_true", help="ikke slett testtabellen etterpå")
+    args = parser.parse_args()
+
+    antall = lag_tabell(args.n)
+    db = Database(pooled=True)
+    try:
+        print(f"{antall:,} varer i {TABELL}")
+        print(f"  {'søk':<22} {'FULLTEXT':>18} {'LIKE':>18}")
+        for søk in args.søk or SØK:
+            (fulltekst, f_params), (like, l_params) = spørringer(søk, args.grense)
+            f_treff, f_ms = mål(db, fulltekst, f_params, args.ganger)
+            l_treff, l_ms = mål(db, like, l_params, args.ganger)
+            print(f"  {søk!r:<22} {f_treff:4} treff {f_ms:7.1f} ms {l_treff:4} treff {l_ms:7.1f} ms")
+    finally:
+        if not args.behold:
+            slett_tabell()
+
+
+if __name__ == "__main__":
+    main()
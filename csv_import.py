@@ -0,0 +1,157 @@
+#Importerer kunder eller varer fra store CSV-filer
+#Filen leses i bolker med en generator, så hele filen er aldri i minnet. Først sjekkes alle radene med de
+#samme reglene som GUI-et bruker (validering.py). Har filen feil, avvises hele filen med en rapport over
+#hvilke linjer som er feil, og ingenting lagres. Er alt i orden, leses filen en gang til og lagres bolk for
+#bolk med executemany og én commit per bolk.
+#
+#Første linje i filen må være kolonnenavnene:
+#   kunde: Fornavn, Etternavn, Adresse, PostNr
+#   vare:  VNr, Betegnelse, Pris, KatNr, Antall, Hylle
+#
+#Bruk fra terminalen:
+#   python csv_import.py kunde kunder.csv --bolk 1000
+#   python csv_import.py vare varer.csv --skilletegn ";" --feilrapport feil.csv
+#Bruk fra kode:
+#   from csv_import import importer
+#   rapport = importer("kunder.csv", "kunde")
+
+import argparse
+import csv
+import time
+from decimal import Decimal
+from database.database_program_staticmethod import Database
+from validering import sjekk_kunder, sjekk_varer
+
+BOLK = 1000                                                                 #Rader per executemany og commit
+MAKS_FEIL = 1000                                                            #Feil som tas med i rapporten, resten telles bare
+
+KOLONNER = {                                                                #Kolonnene hver tabell trenger, i rekkefølgen de lagres
+    "kunde": ("Fornavn", "Etternavn", "Adresse", "PostNr"),
+    "vare": ("VNr", "Betegnelse", "Pris", "KatNr", "Antall", "Hylle"),
+}
+
+
+#Leser filen og gir bolker med [(linjenummer, (verdi, ...))] i samme rekkefølge som kolonnene
+def les_bolker(filnavn, kolonner, størrelse=BOLK, skilletegn=","):
+    with open(filnavn, newline="", encoding="utf-8-sig") as fil:            #utf-8-sig fjerner BOM fra filer lagret i Excel
+        leser = csv.reader(fil, delimiter=skilletegn)
+        overskrift = [navn.strip().lower() for navn in next(leser, [])]
+        mangler = [navn for navn in kolonner if navn.lower() not in overskrift]
+        if mangler:
+            raise ValueError(f"{filnavn} mangler kolonnene {', '.join(mangler)}")
+        plass = [overskrift.index(navn.lower()) for navn in kolonner]       #Hvor hver kolonne står i filen
+        bolk = []
+        for rad in leser:
+            if not any(verdi.strip() for verdi in rad):                     #Hopper over tomme linjer
+                continue
+            rad = rad + [""] * (len(overskrift) - len(rad))                 #Korte linjer får tomme felt, og feiler som tomme
+            bolk.append((leser.line_num, tuple(rad[i].strip() for i in plass)))
+            if len(bolk) == størrelse:
+                yield bolk
+                bolk = []
+        if bolk:
+            yield bolk
+
+
+#Sjekker én bolk, returnerer [(linjenummer, melding)]. sett er oppslagene som er lastet på forhånd.
+def sjekk_bolk(tabell, bolk, sett):
+    if tabell == "kunde":
+        return sjekk_kunder(bolk, sett["poststeder"])
+    feil = sjekk_varer(bolk)
+    ugyldige = {linje for linje, _ in feil}
+    for linje, rad in bolk:                                                 #Varenummeret må være nytt, både i databasen og i filen
+        if linje in ugyldige:
+            continue
+        if rad[0] in sett["varenumre"]:
+            feil.append((linje, f"Varenummer {rad[0]} finnes allerede."))
+        sett["varenumre"].add(rad[0])
+    return feil
+
+
+#Gjør om tekstverdiene til typene databasen forventer
+def til_databasen(tabell, rad):
+    if tabell == "kunde":
+        return rad
+    vnr, betegnelse, pris, katnr, antall, hylle = rad
+    return (vnr, betegnelse, Decimal(pris), int(katnr), int(antall), hylle)
+
+
+#Importerer filen og returnerer en rapport med antall rader, feil og tider
+def importer(filnavn, tabell, db=None, bolk=BOLK, skilletegn=",", feilrapport=None):
+    if tabell not in KOLONNER:
+        raise ValueError(f"Kan ikke importere til {tabell}, velg en av {', '.join(KOLONNER)}")
+    db = db or Database(pooled=True)
+    kolonner = KOLONNER[tabell]
+    start = time.perf_counter()
+
+    sett = {}                                                               #Oppslag som lastes én gang før filen leses
+    if tabell == "kunde":
+        sett["poststeder"] = {str(rad[0]) for rad in db.fetch_all("SELECT PostNr FROM Poststed")}
+    else:
+        sett["varenumre"] = {str(rad[0]) for rad in db.fetch_all("SELECT VNr FROM vare")}
+
+    rader, antall_feil, feil = 0, 0, []
+    rapportfil = open(feilrapport, "w", newline="", encoding="utf-8") if feilrapport else None
+    try:
+        skriver = csv.writer(rapportfil) if rapportfil else None
+        if skriver:
+            skriver.writerow(("linje", "feil"))
+        for linjer in les_bolker(filnavn, kolonner, bolk, skilletegn):      #Første gang: bare sjekking
+            rader += len(linjer)
+            for linje, melding in sjekk_bolk(tabell, linjer, sett):
+                antall_feil += 1
+                if len(feil) < MAKS_FEIL:
+                    feil.append((linje, melding))
+                if skriver:                                                 #Alle feilene skrives til rapportfilen
+                    skriver.writerow((linje, melding))
+    finally:
+        if rapportfil:
+            rapportfil.close()
+    sjekket = time.perf_counter()
+
+    importert = 0
+    if antall_feil == 0:                                                    #Andre gang: lagring, bare hvis hele filen er gyldig
+        for linjer in les_bolker(filnavn, kolonner, bolk, skilletegn):
+            verdier = [til_databasen(tabell, rad) for _, rad in linjer]
+            if tabell == "kunde":
+                importert += len(db.insert_kunder(verdier))
+            else:
+                importert += db.insert_varer(verdier)
+    ferdig = time.perf_counter()
+
+    return {
+        "tabell": tabell,
+        "rader": rader,
+        "importert": importert,
+        "antall_feil": antall_feil,
+        "feil": sorted(feil),
+        "sekunder_sjekk": sjekket - start,
+        "sekunder_lagring": ferdig - sjekket,
+        "sekunder_totalt": ferdig - start,
+        "rader_per_sekund": importert / (ferdig - sjekket) if importert and ferdig > sjekket else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importerer kunder eller varer fra en CSV-fil.")
+    parser.add_argument("tabell", choices=sorted(KOLONNER), help="tabellen radene skal inn i")
+    parser.add_argument("fil", help="CSV-filen, første linje er kolonnenavnene")
+    parser.add_argument("--bolk", type=int, default=BOLK, help="rader per INSERT og commit")
+    parser.add_argument("--skilletegn", default=",", help="tegnet mellom feltene, f.eks. ; fra norsk Excel")
+    parser.add_argument("--feilrapport", help="skriver alle feil til denne CSV-filen")
+    args = parser.parse_args()
+
+    rapport = importer(args.fil, args.tabell, bolk=args.bolk, skilletegn=args.skilletegn, feilrapport=args.feilrapport)
+    if rapport["antall_feil"]:
+        print(f"Filen ble avvist: {rapport['antall_feil']} av {rapport['rader']} rader har feil, ingenting er lagret")
+        for linje, melding in rapport["feil"][:20]:
+            print(f"  Linje {linje}: {melding}")
+        if rapport["antall_feil"] > 20:
+            print(f"  ... og {rapport['antall_feil'] - 20} til" + (f", se {args.feilrapport}" if args.feilrapport else ""))
+        raise SystemExit(1)
+    print(f"Importerte {rapport['importert']} rader til {rapport['tabell']} på {rapport['sekunder_totalt']:.2f} s ({rapport['rader_per_sekund']:.0f} rader/s)")
+    print(f"  sjekk {rapport['sekunder_sjekk']:.2f} s, lagring {rapport['sekunder_lagring']:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
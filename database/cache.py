@@ -0,0 +1,151 @@
+# database/cache.py
+# Delt cache for spørringsresultater
+# ----------------------------------------------
+# Resultatet av en spørring lagres med spørringen og parameterne som nøkkel, og brukes
+# igjen til det er for gammelt (TTL) eller må vike for nyere resultater (LRU).
+# Hvert resultat husker hvilke tabeller det er hentet fra. Når Database skriver til en
+# tabell fjernes bare resultatene som bruker den tabellen, og der vi vet hvordan radene
+# ser ut (nøkkelkolonne) endres den ene raden direkte i cachen i stedet.
+
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+
+MAX_ENTRIES = 256               # Maks antall resultater i cachen
+TTL = 60                        # Sekunder et resultat kan brukes før det hentes på nytt
+
+# Tabeller og radform for lagrede prosedyrer, siden de ikke kan leses ut av spørringen
+PROSEDYRER = {
+    "hent_alle_kunder": {"tables": ("kunde",), "key_index": 0, "complete": True},  # Alle aktive kunder, KNr først
+}
+
+_TABELL_REGEX = re.compile(r"\b(?:FROM|JOIN|INTO|UPDATE)\s+`?(\w+)`?", re.IGNORECASE)
+
+
+#Finner tabellene en spørring leser fra eller skriver til
+def tables_in(query):
+    return tuple(sorted({navn.lower() for navn in _TABELL_REGEX.findall(query)}))
+
+
+class _Entry:
+    __slots__ = ("rows", "tables", "key_index", "complete", "expires")
+
+    def __init__(self, rows, tables, key_index, complete, expires):
+        self.rows = rows                        # Radene fra databasen
+        self.tables = tables                    # Tabellene radene er hentet fra
+        self.key_index = key_index              # Kolonnen med primærnøkkelen, None hvis ukjent
+        self.complete = complete                # True hvis dette er hele utvalget og ikke bare én side
+        self.expires = expires                  # Tidspunkt resultatet blir for gammelt
+
+
+class QueryCache:
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL):
+        self.max_entries = max_entries                                          # Maks antall resultater
+        self.ttl = ttl                                                          # Levetid i sekunder
+        self._entries = OrderedDict()                                           # Nøkkel -> _Entry, sist brukte sist
+        self._lås = threading.Lock()                                            # GUI-et bruker cachen fra flere tråder
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "patches": 0}     # Tellere for bruk av cachen
+
+    #Lager cache-nøkkelen for en spørring og parametere
+    @staticmethod
+    def key(query, params=()):
+        return (query, tuple(params or ()))
+
+    #Returnerer en kopi av radene, eller None hvis de ikke finnes eller er for gamle
+    def get(self, key):
+        with self._lås:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires < time.monotonic():
+                if entry is not None:                                           # For gammel, fjernes
+                    del self._entries[key]
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)                                      # Nylig brukt
+            self.stats["hits"] += 1
+            return list(entry.rows)
+
+    #Lagrer et resultat
+    def put(self, key, rows, tables, key_index=None, complete=False):
+        with self._lås:
+            self._entries[key] = _Entry(list(rows), tuple(tables), key_index, complete, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:                        # Fjerner det som er brukt minst nylig
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    #Fjerner alle resultater som bruker tabellen
+    def invalidate(self, table):
+        with self._lås:
+            for key in self._nøkler_for(table):
+                self._fjern(key)
+
+    #Endrer raden med denne nøkkelen i alle resultater fra tabellen; endre(rad) gir den nye raden
+    def update_rows(self, table, key_value, endre):
+        with self._lås:
+            for key in self._nøkler_for(table):
+                entry = self._entries[key]
+                if entry.key_index is None:                                     # Vet ikke hvor nøkkelen er, må hentes på nytt
+                    self._fjern(key)
+                    continue
+                for i, rad in enumerate(entry.rows):
+                    if rad[entry.key_index] == key_value:
+                        entry.rows[i] = endre(rad)
+                        self.stats["patches"] += 1
+
+    #Setter inn en ny rad på riktig plass (sortert på nøkkel) i komplette resultater fra tabellen
+    def insert_row(self, table, key_value, row):
+        with self._lås:
+            for key in self._nøkler_for(table):
+                entry = self._entries[key]
+                if not entry.complete or entry.key_index is None or (entry.rows and len(entry.rows[0]) != len(row)):
+                    self._fjern(key)                                            # En side eller ukjent radform, hentes på nytt
+                    continue
+                nøkler = [rad[entry.key_index] for rad in entry.rows]
+                entry.rows.insert(bisect_left(nøkler, key_value), tuple(row))
+                self.stats["patches"] += 1
+
+    #Fjerner raden med denne nøkkelen fra komplette resultater fra tabellen
+    def remove_row(self, table, key_value):
+        with self._lås:
+            for key in self._nøkler_for(table):
+                entry = self._entries[key]
+                if not entry.complete or entry.key_index is None:              # En kortere side ville sett ut som siste side
+                    self._fjern(key)
+                    continue
+                entry.rows = [rad for rad in entry.rows if rad[entry.key_index] != key_value]
+                self.stats["patches"] += 1
+
+    #Tømmer hele cachen
+    def clear(self):
+        with self._lås:
+            self._entries.clear()
+
+    #Returnerer en kopi av tellerne sammen med antall resultater i cachen
+    def get_stats(self):
+        with self._lås:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        return stats
+
+    def _nøkler_for(self, table):
+        table = table.lower()
+        return [key for key, entry in self._entries.items() if table in entry.tables]
+
+    def _fjern(self, key):
+        del self._entries[key]
+        self.stats["evictions"] += 1
+
+
+_cache = None                   # Delt cache for hele prosessen
+_cache_lås = threading.Lock()
+
+
+#Henter den delte cachen, eller lager den første gang
+def get_cache():
+    global _cache
+    with _cache_lås:
+        if _cache is None:
+            _cache = QueryCache()
+        return _cache
@@ -1,6 +1,14 @@
 import mysql.connector
 from dotenv import load_dotenv
 import os
+import threading
+import time
+from database.pool import get_pool, pool_nøkkel, POOL_SIZE, IDLE_TIMEOUT
+from database.cache import get_cache, tables_in, QueryCache, PROSEDYRER
+from database.sekvens import get_sekvens
+from database import queries
+from database.ordredetaljer import lag_ordredetaljer
+from database.metrics import målt, sql_navn, nåværende, Måling, MåltCursor, get_metrics
 
 #Laster miljøvariabler fra .env-filen
 load_dotenv()
@@ -12,97 +20,344 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
 
+STREAM_BOLK = 1000                              #Rader som hentes fra serveren om gangen i stream_rows
+
+#Lager en ny tilkobling til databasen med konfigurasjon fra miljøvariabler
+def ny_tilkobling():
+    return mysql.connector.connect(             #Kobler til databasen med konfigurasjon fra miljøvariabler
+        host=DB_HOST,                           #Vert for databasen
+        user=DB_USER,                           #Brukernavn for databasen
+        passwd=DB_PASSWORD,                     #Passord for databasen
+        port=DB_PORT,                           #Port for databasen
+        database=DB_NAME                        #Navn på databasen
+    )
+
 class Database:
-    def __init__(self):                         #Initialiserer databasen
+    def __init__(self, pooled=False, pool_size=POOL_SIZE, idle_timeout=IDLE_TIMEOUT, cached=False):  #Initialiserer databasen, pooled=True gjenbruker tilkoblinger, cached=True bruker delt resultatcache
+        self._lokal = threading.local()         #Hver tråd har sin egen tilkobling, så objektet kan brukes fra bakgrunnstråder
         self.db = None                          #Setter db til None ved oppstart
+        self.pool = None                        #Ingen pool med mindre pooled=True
+        if pooled:                              #Henter den delte poolen for denne databasen
+            self.pool = get_pool(pool_nøkkel(DB_HOST, DB_PORT, DB_USER, DB_NAME), ny_tilkobling, pool_size=pool_size, idle_timeout=idle_timeout)
+        self.cache = get_cache() if cached else None    #Delt cache for spørringsresultater, None hvis ikke slått på
+
+    #Tilkoblingen som tilhører tråden som kjører nå
+    @property
+    def db(self):
+        return getattr(self._lokal, "db", None)
+
+    @db.setter
+    def db(self, tilkobling):
+        self._lokal.db = tilkobling
 
     #Koble til databasen
     def connect(self):                          #Kobler til databasen
-        self.db = mysql.connector.connect(      #Kobler til databasen med konfigurasjon fra miljøvariabler
-            host=DB_HOST,                       #Vert for databasen
-            user=DB_USER,                       #Brukernavn for databasen
-            passwd=DB_PASSWORD,                 #Passord for databasen
-            port=DB_PORT,                       #Port for databasen
-            database=DB_NAME                    #Navn på databasen
-        )
+        start = time.perf_counter()
+        if self.pool:                           #Låner en tilkobling fra poolen hvis den er slått på
+            self.db = self.pool.checkout()
+        else:
+            self.db = ny_tilkobling()           #Ellers lages en ny tilkobling
+        måling = nåværende()
+        if måling is not None:                  #Tiden det tok å få tilkoblingen, se database/metrics.py
+            måling.connect += time.perf_counter() - start
+            måling.tilkoblet = True
+
+    #Lager en cursor som måler tiden spørringen og hentingen tar
+    def _cursor(self, **innstillinger):
+        cursor = self.db.cursor(**innstillinger)
+        måling = nåværende()
+        return MåltCursor(cursor, måling) if måling is not None else cursor
 
     #Lukk tilkoblingen til databasen
     def close(self):                            #Lukker tilkoblingen til databasen
         if self.db:                             #Sjekker om tilkoblingen eksisterer
-            self.db.close()                     #Lukker tilkoblingen
+            if self.pool:                       #Leverer tilkoblingen tilbake til poolen i stedet for å lukke den
+                self.pool.checkin(self.db)
+            else:
+                self.db.close()                 #Lukker tilkoblingen
+            self.db = None                      #Tilkoblingen er ikke lenger vår
+
+    #Tellere for poolen (utlån, ventinger og nye oppkoblinger)
+    def pool_stats(self):
+        return self.pool.get_stats() if self.pool else {}
 
     #Hent alle rader fra en spørring
-    def fetch_all(self, query, params=None):    #Henter alle rader fra spørring
+    #Med cached=True hentes svaret fra cachen hvis det finnes. key_index er kolonnen med primærnøkkelen,
+    #og complete=True betyr at svaret er hele utvalget (ikke én side), så cachen kan endre rader direkte ved skriving.
+    @målt(lambda query, *_, **__: sql_navn(query))
+    def fetch_all(self, query, params=None, cached=False, key_index=None, complete=False):    #Henter alle rader fra spørring
+        if cached and self.cache:               #Prøver cachen først
+            data = self.cache.get(QueryCache.key(query, params))
+            if data is not None:
+                return data
         self.connect()                          #Kobler til databasen
-        cursor = self.db.cursor()               #Oppretter en cursor for å utføre spørringer
-        cursor.execute(query, params or ())     #Kjører spørringen med parametere
-        data = cursor.fetchall()                #Henter alle rader fra resultatene
-        cursor.close()                          #Lukker cursoren
-        self.close()                            #Lukker tilkoblingen
+        try:
+            cursor = self._cursor()             #Oppretter en cursor for å utføre spørringer
+            cursor.execute(query, params or ()) #Kjører spørringen med parametere
+            data = cursor.fetchall()            #Henter alle rader fra resultatene
+            cursor.close()                      #Lukker cursoren
+        finally:
+            self.close()                        #Lukker tilkoblingen (eller leverer den tilbake til poolen) også ved feil
+        if cached and self.cache:               #Lagrer svaret sammen med tabellene det kommer fra
+            self.cache.put(QueryCache.key(query, params), data, tables_in(query), key_index, complete)
         return data                             #Returnerer resultatene
 
     #Hent en enkelt rad fra en spørring
+    @målt(lambda query, *_, **__: sql_navn(query))
     def fetch_one(self, query, params=None):    #Henter en enkelt rad fra spørring
         self.connect()                          #Kobler til databasen
-        cursor = self.db.cursor()               #Oppretter en cursor for å utføre spørringer
-        cursor.execute(query, params or ())     #Kjører spørringen med parametere
-        data = cursor.fetchone()                #Henter en enkelt rad fra resultatene
-        cursor.close()                          #Lukker cursoren
-        self.close()                            #Lukker tilkoblingen
-        return data                             #Returnerer resultatene
+        try:
+            cursor = self._cursor()             #Oppretter en cursor for å utføre spørringer
+            cursor.execute(query, params or ()) #Kjører spørringen med parametere
+            data = cursor.fetchone()            #Henter en enkelt rad fra resultatene
+            cursor.fetchall()                   #Leser eventuelle resterende rader så tilkoblingen kan gjenbrukes
+            cursor.close()                      #Lukker cursoren
+            return data                         #Returnerer resultatene
+        finally:
+            self.close()                        #Lukker tilkoblingen
     
+    #Kjører en navngitt spørring fra database/queries.py som prepared statement, returnerer navngitte tupler
+    @målt(lambda navn, *_, **__: navn)
+    def query(self, navn, params=(), cached=False):
+        params = tuple(params)
+        sql = queries.QUERIES[navn].sql_for(len(params))
+        if cached and self.cache:               #Prøver cachen først
+            data = self.cache.get(QueryCache.key(sql, params))
+            if data is not None:
+                return data
+        self.connect()                          #Kobler til databasen
+        try:
+            data = queries.kjør(self.db, navn, params)     #Cursoren gjenbrukes så lenge tilkoblingen lever i poolen
+        finally:
+            self.close()                        #Leverer tilkoblingen tilbake til poolen
+        if cached and self.cache:               #Lagrer svaret sammen med tabellene det kommer fra
+            self.cache.put(QueryCache.key(sql, params), data, tables_in(sql))
+        return data
+
+    #Kjører en navngitt spørring og returnerer første rad, eller None
+    def query_one(self, navn, params=(), cached=False):
+        data = self.query(navn, params, cached)
+        return data[0] if data else None
+
+    #Ordren, kunden, ordrelinjene og totalene (netto, MVA, brutto) for én ordre, hentet med én spørring.
+    #Svaret caches per OrdreNr og fjernes når en av tabellene endres. None hvis ordren ikke finnes.
+    def ordre_detaljer(self, ordreNr):
+        return lag_ordredetaljer(self.query("ordre_detaljer", (ordreNr,), cached=True))
+
+    #Gir radene fra en spørring én og én uten å hente hele resultatet først (for eksport av store tabeller)
+    #Cursoren er ubufret, så radene leses fra serveren etter hvert som de trengs, "størrelse" om gangen.
+    #Tilkoblingen er vår egen til generatoren er ferdig, så andre kall fra samme tråd kan kjøre imens.
+    def stream_rows(self, query, params=None, størrelse=STREAM_BOLK):
+        måling = Måling(sql_navn(query))        #Måles for hånd, generatoren kan leve lenge og bytte tråd
+        måling.tilkoblet = True
+        start = time.perf_counter()
+        tilkobling = self.pool.checkout() if self.pool else ny_tilkobling()
+        måling.connect = time.perf_counter() - start
+        ferdig = False
+        try:
+            cursor = MåltCursor(tilkobling.cursor(buffered=False), måling)     #Ubufret cursor, serveren sender radene etter hvert
+            cursor.execute(query, params or ())
+            while True:
+                rader = cursor.fetchmany(størrelse)     #Neste bolk med rader
+                if not rader:
+                    break
+                yield from rader
+            cursor.close()
+            ferdig = True
+        finally:
+            if self.pool and ferdig:                    #Hele resultatet er lest, tilkoblingen kan gjenbrukes
+                self.pool.checkin(tilkobling)
+            elif self.pool:                             #Avbrutt midt i (f.eks. klienten koblet fra), uleste rader gjør tilkoblingen ubrukelig
+                self.pool.discard(tilkobling)
+            else:
+                try:
+                    tilkobling.close()
+                except Exception:                       #Uleste rader kan gi feil ved lukking, tilkoblingen kastes uansett
+                    pass
+            get_metrics().record(måling, time.perf_counter() - start, not ferdig)
+
     #Hent resultatet av en lagret prosedyre
-    def call_procedure(self, procedure, args=()):   #Henter resultatet av en lagret prosedyre
+    @målt(lambda procedure, *_, **__: f"CALL {procedure}")
+    def call_procedure(self, procedure, args=(), cached=False):     #Henter resultatet av en lagret prosedyre, cached=True for prosedyrer som er beskrevet i PROSEDYRER
+        spec = PROSEDYRER.get(procedure) if cached and self.cache else None
+        nøkkel = QueryCache.key(f"CALL {procedure}", args)
+        if spec:                                    #Prøver cachen først
+            results = self.cache.get(nøkkel)
+            if results is not None:
+                return results
         self.connect()                              #Kobler til databasen
-        cursor = self.db.cursor()                   #Oppretter en cursor for å utføre spørringer
-        cursor.callproc(procedure, args)            #Kjører den lagrede prosedyren med argumenter
-        results = []                                #Oppretter en tom liste for å lagre resultatene
-        for result in cursor.stored_results():      #Itererer gjennom resultatene fra den lagrede prosedyren
-            results.extend(result.fetchall())       #Henter alle rader fra resultatene og legger dem til i listen
-        cursor.close()                              #Lukker cursoren
-        self.close()                                #Lukker tilkoblingen
+        try:
+            cursor = self._cursor()                 #Oppretter en cursor for å utføre spørringer
+            cursor.callproc(procedure, args)        #Kjører den lagrede prosedyren med argumenter
+            results = []                            #Oppretter en tom liste for å lagre resultatene
+            for result in cursor.stored_results():  #Itererer gjennom resultatene fra den lagrede prosedyren
+                results.extend(result.fetchall())   #Henter alle rader fra resultatene og legger dem til i listen
+            cursor.close()                          #Lukker cursoren
+        finally:
+            self.close()                            #Lukker tilkoblingen
+        if spec:                                    #Lagrer svaret med tabellene prosedyren leser fra
+            self.cache.put(nøkkel, results, spec["tables"], spec["key_index"], spec["complete"])
         return results                              #Returnerer resultatene
 
     #Oppdaterer en rad i databasen med en spørring og parametere
-    def update_one(self, query, params):            #Oppdaterer en rad i databasen med en spørring og parametere
+    @målt(lambda query, *_, **__: sql_navn(query))
+    def update_one(self, query, params, invalidate=True):   #Oppdaterer en rad i databasen med en spørring og parametere
         self.connect()                              #Kobler til databasen
-        cursor = self.db.cursor()                   #Oppretter en cursor for å utføre spørringer
-        cursor.execute(query, params)               #Kjører spørringen med parametere
-        self.db.commit()                            #Bekrefter endringer i databasen
-        cursor.close()                              #Lukker cursoren
-        self.close()                                #Lukker tilkoblingen
+        try:
+            cursor = self._cursor()                 #Oppretter en cursor for å utføre spørringer
+            cursor.execute(query, params)           #Kjører spørringen med parametere
+            self.db.commit()                        #Bekrefter endringer i databasen
+            cursor.close()                          #Lukker cursoren
+        finally:
+            self.close()                            #Lukker tilkoblingen
+        if invalidate:                              #Cachede resultater fra tabellen er ikke lenger riktige
+            self._invalider(*tables_in(query))
+
+    #Oppdaterer en kunde og endrer raden direkte i cachen i stedet for å hente kundelisten på nytt
+    @målt()
+    def update_kunde(self, kNr, Fornavn, Etternavn, Adresse, Postnr):
+        self.update_one("UPDATE kunde SET Fornavn = %s, Etternavn = %s, Adresse = %s, PostNr = %s WHERE KNr = %s;", (Fornavn, Etternavn, Adresse, Postnr, kNr), invalidate=False)
+        if self.cache:                              #Kolonnene KNr, Fornavn, Etternavn, Adresse, PostNr kommer først i alle kundespørringene
+            self.cache.update_rows("kunde", int(kNr), lambda rad: (rad[0], Fornavn, Etternavn, Adresse, Postnr) + tuple(rad[5:]))
+
+    #"Sletter" en kunde ved å sette is_active til 0, og fjerner raden fra cachede kundelister
+    @målt()
+    def deactivate_kunde(self, kNr):
+        self.update_one("UPDATE kunde SET is_active = '0' WHERE KNr = %s;", (kNr,), invalidate=False)
+        if self.cache:
+            self.cache.remove_row("kunde", int(kNr))
+
+    #Fjerner cachede resultater fra tabellene
+    def _invalider(self, *tabeller):
+        if self.cache:
+            for tabell in tabeller:
+                self.cache.invalidate(tabell)
+
+    #Tellere for cachen (treff, bom, fjernet og endrede rader)
+    def cache_stats(self):
+        return self.cache.get_stats() if self.cache else {}
+
+    #Tellere for den lokale replikaen, se database/replika.py (tom uten replika)
+    def replika_stats(self):
+        return {}
+
+    #Tidsmålinger per spørring (p50/p95/p99, connect/execute/fetch), delt av alle Database-objektene
+    def query_stats(self):
+        return get_metrics().get_stats()
 
     #Lagrer en ny faktura i databasen og returnerer faktura-ID
+    @målt()
     def insert_faktura(self, ordreNr, kNr):         #Lagrer en ny faktura i databasen og returnerer faktura-ID
         self.connect()                              #Kobler til databasen
-        cursor = self.db.cursor()                   #Oppretter en cursor for å utføre spørringer
-        #SQL spørring for å sette inn en ny rad i faktura-tabellen
-        #Bruker ordreNr og kNr som parametere for å sette inn i tabellen
-        insert_query = """          
-        INSERT INTO faktura (OrdreNr, KNr)
-        VALUES (%s, %s)
-        """
-        cursor.execute(insert_query, (ordreNr, kNr))#Kjører spørringen med parametere, bruker %s for å unngå SQL-injeksjon
-        self.db.commit()                            #Bekrefter endringer i databasen
-        faktura_id = cursor.lastrowid               #Henter ID-en til den sist innlagte fakturaen
-        cursor.close()                              #Lukker cursoren
-        self.close()                                #Lukker tilkoblingen
-        return faktura_id                           #Returnerer faktura-ID
-
-    #setter inn en ny kunde i databasen og finner den høyeste kNr
-    def insert_kunde(self, Fornavn, Etternavn, Adresse, Postnr):    #Setter inn en ny kunde i databasen og finner den høyeste kNr
+        try:
+            cursor = self._cursor()                 #Oppretter en cursor for å utføre spørringer
+            #SQL spørring for å sette inn en ny rad i faktura-tabellen
+            #Bruker ordreNr og kNr som parametere for å sette inn i tabellen
+            insert_query = """          
+            INSERT INTO faktura (OrdreNr, KNr)
+            VALUES (%s, %s)
+            """
+            cursor.execute(insert_query, (ordreNr, kNr))    #Kjører spørringen med parametere, bruker %s for å unngå SQL-injeksjon
+            self.db.commit()                                #Bekrefter endringer i databasen
+            faktura_id = cursor.lastrowid                   #Henter ID-en til den sist innlagte fakturaen
+            cursor.close()                                  #Lukker cursoren
+        finally:
+            self.close()                                    #Lukker tilkoblingen
+        self._invalider("faktura")                          #Cachede fakturaresultater er ikke lenger riktige
+        return faktura_id                                   #Returnerer faktura-ID
+
+    #Lagrer mange fakturaer i én INSERT og returnerer faktura-ID per ordrenummer
+    @målt()
+    def insert_fakturaer(self, par):                #par er en liste med (ordreNr, kNr)
+        if not par:                                 #Ingenting å lagre
+            return {}
+        self.connect()                              #Kobler til databasen
+        try:
+            cursor = self._cursor()                 #Oppretter en cursor for å utføre spørringer
+            verdier = ", ".join(["(%s, %s)"] * len(par))                                    #Én (%s, %s) per faktura
+            cursor.execute(f"INSERT INTO faktura (OrdreNr, KNr) VALUES {verdier}", [verdi for rad in par for verdi in rad])  #Alle fakturaene i én spørring
+            første_id = cursor.lastrowid            #MySQL gir ID-en til første rad i en INSERT med flere rader
+            #InnoDB deler ut alle ID-ene til en INSERT med kjent antall rader på én gang, så de er fortløpende
+            #(gjelder alle innodb_autoinc_lock_mode). Vi leser bare våre egne ID-er tilbake og sjekker at de stemmer.
+            cursor.execute("SELECT id, OrdreNr, KNr FROM faktura WHERE id BETWEEN %s AND %s ORDER BY id", (første_id, første_id + cursor.rowcount - 1))
+            rader = cursor.fetchall()
+            if [(ordreNr, kNr) for _, ordreNr, kNr in rader] != [tuple(rad) for rad in par]:
+                self.db.rollback()                  #Ikke fortløpende likevel, ingen fakturaer lagres
+                raise RuntimeError("Faktura-ID-ene fra INSERT var ikke fortløpende")
+            faktura_ider = {ordreNr: faktura_id for faktura_id, ordreNr, _ in rader}    #Siste faktura per ordre vinner hvis samme ordre er med flere ganger
+            self.db.commit()                        #Bekrefter endringer i databasen
+            cursor.close()                          #Lukker cursoren
+        finally:
+            self.close()                            #Lukker tilkoblingen
+        self._invalider("faktura")                  #Cachede fakturaresultater er ikke lenger riktige
+        return faktura_ider                         #Returnerer {ordreNr: faktura-ID}
+
+    #Setter inn en ny kunde i databasen, returnerer kNr til den nye kunden
+    #kNr kommer fra sekvenstabellen (se database/sekvens.py), så to som lagrer samtidig kan ikke få samme nummer
+    @målt()
+    def insert_kunde(self, Fornavn, Etternavn, Adresse, Postnr):    #Setter inn en ny kunde i databasen
         self.connect()                                              #Kobler til databasen 
-        cursor = self.db.cursor()                                   #Oppretter en cursor for å utføre spørringer
-        cursor.execute("SELECT MAX(KNr) FROM kunde")                #SQL spørring for å finne den høyeste kNr i kunde-tabellen
-        result = cursor.fetchone()                                  #Henter resultatet av spørringen
-        max_kNr = result[0] if result[0] is not None else 0         #Sjekker om resultatet er None og setter max_kNr til 0 hvis det er tilfelle
-        kNr = max_kNr + 1                                           #Setter kNr til max_kNr + 1 for å lage en ny unik ID for kunden
-        #SQL spørring for å sette inn en ny rad i kunde-tabellen
-        insert_query = """
-        INSERT INTO kunde (KNr, Fornavn, Etternavn, Adresse, Postnr) VALUES (%s, %s, %s, %s, %s)
-        """
-        cursor.execute(insert_query, (kNr, Fornavn, Etternavn, Adresse, Postnr))    #Kjører spørringen med parametere, bruker %s for å unngå SQL-injeksjon
-        #print(f"Inserted Kunde with kNr: {kNr}")                                   #Debugging utskrift for å vise hvilken kNr som ble satt inn
-        self.db.commit()                                                            #Bekrefter endringer i databasen
-        cursor.close()                                                              #Lukker cursoren
-        self.close()                                                                #Lukker tilkoblingen
\ No newline at end of file
+        try:
+            kNr = get_sekvens("kunde").neste(self.db)[0]            #Neste ledige kNr, databasen spørres bare når blokken er brukt opp
+            cursor = self._cursor()                                 #Oppretter en cursor for å utføre spørringer
+            #SQL spørring for å sette inn en ny rad i kunde-tabellen
+            insert_query = """
+            INSERT INTO kunde (KNr, Fornavn, Etternavn, Adresse, Postnr) VALUES (%s, %s, %s, %s, %s)
+            """
+            cursor.execute(insert_query, (kNr, Fornavn, Etternavn, Adresse, Postnr))    #Kjører spørringen med parametere, bruker %s for å unngå SQL-injeksjon
+            self.db.commit()                                                            #Bekrefter endringer i databasen
+            cursor.close()                                                              #Lukker cursoren
+        finally:
+            self.close()                                                                #Lukker tilkoblingen
+        if self.cache:                                                                  #Legger den nye kunden inn i cachede kundelister i stedet for å hente dem på nytt
+            self.cache.insert_row("kunde", kNr, (kNr, Fornavn, Etternavn, Adresse, Postnr))
+        return kNr                                                                      #Returnerer kundenummeret til den nye kunden
+
+    #Setter inn mange kunder i én transaksjon, rader er en liste med (Fornavn, Etternavn, Adresse, Postnr)
+    #Enten lagres alle kundene eller ingen. Returnerer kNr for hver rad, i samme rekkefølge.
+    @målt()
+    def insert_kunder(self, rader):
+        rader = [tuple(rad) for rad in rader]
+        if not rader:                                                                   #Ingenting å lagre
+            return []
+        self.connect()                                                                  #Kobler til databasen
+        try:
+            kNumre = get_sekvens("kunde").neste(self.db, len(rader))                    #Alle numrene reserveres på en gang
+            cursor = self._cursor()                                                     #Oppretter en cursor for å utføre spørringer
+            try:
+                cursor.executemany(
+                    "INSERT INTO kunde (KNr, Fornavn, Etternavn, Adresse, Postnr) VALUES (%s, %s, %s, %s, %s)",
+                    [(kNr,) + rad for kNr, rad in zip(kNumre, rader)],                  #Sendes som én INSERT med mange rader
+                )
+                self.db.commit()                                                        #Bekrefter alle kundene samtidig
+            except Exception:
+                self.db.rollback()                                                      #Ingen av kundene lagres hvis én feiler
+                raise
+            finally:
+                cursor.close()                                                          #Lukker cursoren
+        finally:
+            self.close()                                                                #Lukker tilkoblingen
+        self._invalider("kunde")                                                        #Mange nye rader, enklere å hente kundelistene på nytt
+        return kNumre                                                                   #Returnerer kundenumrene til de nye kundene
+
+    #Setter inn mange varer i én transaksjon, rader er en liste med (VNr, Betegnelse, Pris, KatNr, Antall, Hylle)
+    @målt()
+    def insert_varer(self, rader):
+        rader = [tuple(rad) for rad in rader]
+        if not rader:                                                                   #Ingenting å lagre
+            return 0
+        self.connect()                                                                  #Kobler til databasen
+        try:
+            cursor = self._cursor()                                                     #Oppretter en cursor for å utføre spørringer
+            try:
+                cursor.executemany("INSERT INTO vare (VNr, Betegnelse, Pris, KatNr, Antall, Hylle) VALUES (%s, %s, %s, %s, %s, %s)", rader)  #Sendes som én INSERT med mange rader
+                self.db.commit()                                                        #Bekrefter alle varene samtidig
+            except Exception:
+                self.db.rollback()                                                      #Ingen av varene lagres hvis én feiler
+                raise
+            finally:
+                cursor.close()                                                          #Lukker cursoren
+        finally:
+            self.close()                                                                #Lukker tilkoblingen
+        self._invalider("vare")                                                         #Cachede varelister er ikke lenger riktige
+        return len(rader)                                                               #Returnerer antall varer som ble lagret
@@ -7,6 +7,7 @@
 import mysql.connector
 from dotenv import load_dotenv
 import os
+from database.pool import get_pool, pool_nøkkel, POOL_SIZE, IDLE_TIMEOUT  # Felles tilkoblingspool for begge databaseklassene
 
 # Last inn miljøvariabler fra .env
 load_dotenv()
@@ -20,30 +21,49 @@ DB_HOST = os.getenv("DB_HOST")
 DB_PORT = int(os.getenv("DB_PORT", 3306))  # Standard MySQL-port er 3306
 
 
+# Lager en ny tilkobling til databasen med konfigurasjon fra miljøvariabler
+def ny_tilkobling():
+    return mysql.connector.connect(                                     # Kobler til databasen med konfigurasjon fra miljøvariabler
+        host=DB_HOST,                                                   # Vert for databasen
+        user=DB_USER,                                                   # Brukernavn for databasen
+        passwd=DB_PASSWORD,                                             # Passord for databasen
+        database=DB_NAME,                                               # Navn på databasen
+        port=DB_PORT                                                    # Port for databasen
+    )
+
+
 # Databasehåndtering med MySQL
 class Database:
 
     # Initialiserer databasen
-    def __init__(self):                                                 # Initialiserer databasen
+    def __init__(self, pooled=False, pool_size=POOL_SIZE, idle_timeout=IDLE_TIMEOUT):  # Initialiserer databasen, pooled=True gjenbruker tilkoblinger
         self.db = None                                                  # Setter db til None ved oppstart
+        self.pool = None                                                # Ingen pool med mindre pooled=True
+        if pooled:                                                      # Deler samme pool som database_program_staticmethod.Database
+            self.pool = get_pool(pool_nøkkel(DB_HOST, DB_PORT, DB_USER, DB_NAME), ny_tilkobling, pool_size=pool_size, idle_timeout=idle_timeout)
 
     # Tilkobling til databasen
     def connect(self):                                                  # Kobler til databasen
         try:                                                            # Prøver å koble til databasen
-            self.db = mysql.connector.connect(                          # Kobler til databasen med konfigurasjon fra miljøvariabler
-                host=DB_HOST,                                           # Vert for databasen
-                user=DB_USER,                                           # Brukernavn for databasen
-                passwd=DB_PASSWORD,                                     # Passord for databasen
-                database=DB_NAME,                                       # Navn på databasen
-                port=DB_PORT                                            # Port for databasen
-            )
-        except mysql.connector.Error as err:                            # Håndterer eventuelle feil ved tilkobling
+            if self.pool:                                               # Låner en tilkobling fra poolen hvis den er slått på
+                self.db = self.pool.checkout()
+            else:
+                self.db = ny_tilkobling()                               # Ellers lages en ny tilkobling
+        except (mysql.connector.Error, TimeoutError) as err:            # Håndterer feil ved tilkobling, og at poolen er full
             self.db = None                                              # Setter db til None hvis tilkoblingen feiler
 
     # Lukker tilkoblingen til databasen
     def close(self):                                                    # Lukker tilkoblingen til databasen
         if self.db:                                                     # Sjekker om tilkoblingen eksisterer
-            self.db.close()                                             # Lukker tilkoblingen
+            if self.pool:                                               # Leverer tilkoblingen tilbake til poolen
+                self.pool.checkin(self.db)
+            else:
+                self.db.close()                                         # Lukker tilkoblingen
+            self.db = None                                              # Tilkoblingen er ikke lenger vår
+
+    # Tellere for poolen (utlån, ventinger og nye oppkoblinger)
+    def pool_stats(self):
+        return self.pool.get_stats() if self.pool else {}
 
     # Henter alle rader fra spørring
     def fetch_all(self, query, params=()):                              # Henter alle rader fra spørring
@@ -0,0 +1,285 @@
+# database/metrics.py
+# Tidsmåling av databasekallene
+# ----------------------------------------------
+# Hvert kall til en metode i Database som er merket med @målt gir én måling: hvor lang tid det tok å
+# få en tilkobling (connect), å kjøre spørringen (execute) og å hente radene (fetch), og hvor mange rader
+# som kom tilbake. Målingene samles per spørring, og gir p50/p95/p99 og histogrammer i Prometheus-format.
+# Etter hver måling kalles alle hooks, blant annet loggen over trege spørringer.
+#
+# Innstillinger i .env:
+#   DB_SLOW_MS=200                  spørringer som tar lengre tid enn dette (millisekunder) logges
+#   DB_SLOW_LOG=treg_sql.log        filen de logges til (standard: terminalen)
+
+import functools
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from dotenv import load_dotenv
+
+load_dotenv()                                       # Innstillingene under leses ved import, før Database laster .env
+
+SLOW_MS = float(os.getenv("DB_SLOW_MS", "200"))     # Grensen for en treg spørring, i millisekunder
+SLOW_LOG = os.getenv("DB_SLOW_LOG")                 # Fil for trege spørringer, None skriver til terminalen
+SAMPLES = 1000                  # Siste målinger per spørring som prosentilene regnes ut fra
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)   # Histogramgrenser i sekunder
+
+_MELLOMROM = re.compile(r"\s+")
+_IN_LISTE = re.compile(r"IN \((?:%s, )*%s\)", re.IGNORECASE)
+
+
+#Lager et kort navn for en SQL-spørring, så samme spørring med ulike IN-lister samles under ett navn
+def sql_navn(query):
+    navn = _IN_LISTE.sub("IN (...)", _MELLOMROM.sub(" ", query).strip().rstrip(";"))
+    return navn if len(navn) <= 100 else navn[:97] + "..."
+
+
+class Måling:
+    __slots__ = ("navn", "connect", "execute", "fetch", "rader", "tilkoblet")
+
+    def __init__(self, navn):
+        self.navn = navn                        # Spørringen eller metoden som ble kjørt
+        self.connect = 0.0                      # Sekunder brukt på å få en tilkobling
+        self.execute = 0.0                      # Sekunder brukt på execute/executemany/callproc
+        self.fetch = 0.0                        # Sekunder brukt på å hente radene
+        self.rader = 0                          # Antall rader som ble hentet
+        self.tilkoblet = False                  # False betyr at svaret kom fra cachen
+
+
+class MåltCursor:
+    #Cursor som måler execute og fetch, alt annet sendes videre til den ekte cursoren
+    def __init__(self, cursor, måling):
+        self._cursor = cursor
+        self._måling = måling
+
+    def execute(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(*args, **kwargs)
+        finally:
+            self._måling.execute += time.perf_counter() - start
+
+    def executemany(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(*args, **kwargs)
+        finally:
+            self._måling.execute += time.perf_counter() - start
+
+    def callproc(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.callproc(*args, **kwargs)
+        finally:
+            self._måling.execute += time.perf_counter() - start
+
+    def stored_results(self):
+        return [MåltCursor(resultat, self._måling) for resultat in self._cursor.stored_results()]
+
+    def fetchall(self):
+        return self._hent(self._cursor.fetchall)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._hent(lambda: self._cursor.fetchmany(*args, **kwargs))
+
+    def fetchone(self):
+        start = time.perf_counter()
+        rad = self._cursor.fetchone()
+        self._måling.fetch += time.perf_counter() - start
+        self._måling.rader += rad is not None
+        return rad
+
+    def _hent(self, hent):
+        start = time.perf_counter()
+        rader = hent()
+        self._måling.fetch += time.perf_counter() - start
+        self._måling.rader += len(rader)
+        return rader
+
+    def __getattr__(self, navn):                # lastrowid, rowcount, close, ...
+        return getattr(self._cursor, navn)
+
+
+class _Spørring:
+    __slots__ = ("antall", "feil", "cache", "rader", "connect", "execute", "fetch", "total", "siste", "buckets")
+
+    def __init__(self):
+        self.antall = 0                         # Kall som gikk til databasen
+        self.feil = 0                           # Kall som feilet
+        self.cache = 0                          # Kall som ble besvart fra cachen
+        self.rader = 0
+        self.connect = self.execute = self.fetch = self.total = 0.0     # Summen av tidene
+        self.siste = deque(maxlen=SAMPLES)      # Siste totaltider, for prosentiler
+        self.buckets = [0] * len(BUCKETS)       # Antall kall per histogramgrense (ikke kumulativt)
+
+
+class Metrics:
+    def __init__(self):
+        self._spørringer = {}                   # Navn -> _Spørring
+        self._lås = threading.Lock()
+        self._hooks = []                        # Kalles med (måling, sekunder, feil) etter hver måling
+
+    #Legger til en funksjon som kalles etter hver måling
+    def add_hook(self, hook):
+        self._hooks.append(hook)
+
+    #Lagrer en måling og kaller hookene
+    def record(self, måling, sekunder, feil=False):
+        with self._lås:
+            s = self._spørringer.get(måling.navn)
+            if s is None:
+                s = self._spørringer[måling.navn] = _Spørring()
+            if not måling.tilkoblet and not feil:                       # Fra cachen, teller ikke med i tidene
+                s.cache += 1
+            else:
+                s.antall += 1
+                s.feil += feil
+                s.rader += måling.rader
+                s.connect += måling.connect
+                s.execute += måling.execute
+                s.fetch += måling.fetch
+                s.total += sekunder
+                s.siste.append(sekunder)
+                for i, grense in enumerate(BUCKETS):
+                    if sekunder <= grense:
+                        s.buckets[i] += 1
+                        break
+        for hook in self._hooks:
+            hook(måling, sekunder, feil)
+
+    #Returnerer {navn: {...}} med antall, rader, p50/p95/p99 og snittider, alle tider i millisekunder
+    def get_stats(self):
+        with self._lås:
+            stats = {}
+            for navn, s in self._spørringer.items():
+                siste = sorted(s.siste)
+                snitt = lambda sum_: sum_ / s.antall * 1000 if s.antall else 0.0
+                stats[navn] = {
+                    "antall": s.antall, "feil": s.feil, "cache": s.cache, "rader": s.rader,
+                    "p50": _prosentil(siste, 0.50) * 1000, "p95": _prosentil(siste, 0.95) * 1000, "p99": _prosentil(siste, 0.99) * 1000,
+                    "connect": snitt(s.connect), "execute": snitt(s.execute), "fetch": snitt(s.fetch), "total": snitt(s.total),
+                }
+        return stats
+
+    #Tekstrapport, tregeste spørringer (p95) først
+    def rapport(self):
+        stats = sorted(self.get_stats().items(), key=lambda par: par[1]["p95"], reverse=True)
+        linjer = [f"{'antall':>7} {'cache':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'connect':>8} {'execute':>8} {'fetch':>8} {'rader':>8}  spørring (tider i ms)"]
+        for navn, s in stats:
+            linjer.append(f"{s['antall']:>7} {s['cache']:>6} {s['p50']:>8.1f} {s['p95']:>8.1f} {s['p99']:>8.1f} {s['connect']:>8.1f} {s['execute']:>8.1f} {s['fetch']:>8.1f} {s['rader']:>8}  {navn}" + (f"  ({s['feil']} feil)" if s["feil"] else ""))
+        return "\n".join(linjer)
+
+    #Målingene i Prometheus tekstformat
+    def prometheus(self):
+        linjer = [
+            "# HELP db_query_seconds Tid per databasekall (tilkobling, kjøring og henting).",
+            "# TYPE db_query_seconds histogram",
+        ]
+        with self._lås:
+            spørringer = list(self._spørringer.items())
+            for navn, s in spørringer:
+                etikett = _etikett(navn)
+                kumulativ = 0
+                for grense, antall in zip(BUCKETS, s.buckets):
+                    kumulativ += antall
+                    linjer.append(f'db_query_seconds_bucket{{query="{etikett}",le="{grense}"}} {kumulativ}')
+                linjer.append(f'db_query_seconds_bucket{{query="{etikett}",le="+Inf"}} {s.antall}')
+                linjer.append(f'db_query_seconds_sum{{query="{etikett}"}} {s.total}')
+                linjer.append(f'db_query_seconds_count{{query="{etikett}"}} {s.antall}')
+            linjer += ["# HELP db_query_phase_seconds_total Tid brukt i hver fase av databasekallene.", "# TYPE db_query_phase_seconds_total counter"]
+            for navn, s in spørringer:
+                for fase in ("connect", "execute", "fetch"):
+                    linjer.append(f'db_query_phase_seconds_total{{query="{_etikett(navn)}",phase="{fase}"}} {getattr(s, fase)}')
+            for metrikk, felt, hjelp in (
+                ("db_query_rows_total", "rader", "Rader hentet fra databasen."),
+                ("db_query_errors_total", "feil", "Databasekall som feilet."),
+                ("db_query_cache_hits_total", "cache", "Kall som ble besvart fra resultatcachen."),
+            ):
+                linjer += [f"# HELP {metrikk} {hjelp}", f"# TYPE {metrikk} counter"]
+                for navn, s in spørringer:
+                    linjer.append(f'{metrikk}{{query="{_etikett(navn)}"}} {getattr(s, felt)}')
+        return "\n".join(linjer) + "\n"
+
+    #Nullstiller alle målingene
+    def clear(self):
+        with self._lås:
+            self._spørringer.clear()
+
+
+def _prosentil(sorterte, andel):
+    if not sorterte:
+        return 0.0
+    return sorterte[min(len(sorterte) - 1, int(len(sorterte) * andel))]
+
+
+def _etikett(tekst):                            # Escaper tekst til en Prometheus-etikett
+    return tekst.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class SlowQueryLog:
+    #Hook som logger spørringer som tar lengre tid enn grensen
+    def __init__(self, grense_ms=SLOW_MS, filnavn=SLOW_LOG):
+        self.grense = grense_ms / 1000
+        self.filnavn = filnavn
+        self._lås = threading.Lock()
+
+    def __call__(self, måling, sekunder, feil):
+        if sekunder < self.grense:
+            return
+        linje = (f"{time.strftime('%Y-%m-%d %H:%M:%S')} treg spørring {sekunder * 1000:.1f} ms "
+                 f"(connect {måling.connect * 1000:.1f}, execute {måling.execute * 1000:.1f}, fetch {måling.fetch * 1000:.1f}, "
+                 f"{måling.rader} rader{', feilet' if feil else ''}): {måling.navn}")
+        with self._lås:
+            if self.filnavn:
+                with open(self.filnavn, "a", encoding="utf-8") as fil:
+                    fil.write(linje + "\n")
+            else:
+                print(linje, file=sys.stderr)
+
+
+_lokal = threading.local()      # Målingen som pågår i denne tråden
+
+
+#Målingen som pågår i tråden som kjører nå, None utenfor et målt kall
+def nåværende():
+    return getattr(_lokal, "måling", None)
+
+
+#Dekoratør for metodene i Database. navn er et fast navn, eller en funksjon som får argumentene og gir navnet.
+#Kall inni et annet målt kall (f.eks. update_kunde -> update_one) telles med i det ytre kallet.
+def målt(navn=None):
+    def dekoratør(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if nåværende() is not None:
+                return func(self, *args, **kwargs)
+            måling = Måling(navn(*args, **kwargs) if callable(navn) else navn or func.__name__)
+            _lokal.måling = måling
+            start = time.perf_counter()
+            feil = False
+            try:
+                return func(self, *args, **kwargs)
+            except Exception:
+                feil = True
+                raise
+            finally:
+                _lokal.måling = None
+                get_metrics().record(måling, time.perf_counter() - start, feil)
+        return wrapper
+    return dekoratør
+
+
+_metrics = None                 # Delte målinger for hele prosessen
+_metrics_lås = threading.Lock()
+
+
+#Henter de delte målingene, eller lager dem første gang (med loggen over trege spørringer)
+def get_metrics():
+    global _metrics
+    with _metrics_lås:
+        if _metrics is None:
+            _metrics = Metrics()
+            _metrics.add_hook(SlowQueryLog())
+        return _metrics
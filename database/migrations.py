@@ -0,0 +1,298 @@
+# database/migrations.py
+# Versjonerte endringer av databaseskjemaet
+# ----------------------------------------------
+# Hver migrasjon har et nummer og kjøres bare én gang. Numrene som er kjørt lagres i tabellen schema_versjon,
+# så skriptet kan kjøres på nytt så ofte man vil og bare tar med det som er nytt. Stegene sjekker også selv
+# om tabellen, kolonnen eller indeksen finnes fra før, så databaser som er satt opp med det gamle skriptet
+# (update_db_faktura.py) går gjennom uten feil.
+#
+# Indeksene er valgt ut fra spørringene programmet kjører oftest (se database/paging.py og database/queries.py).
+# Med --explain kjøres EXPLAIN på alle de spørringene, og de som leser hele tabellen (type ALL) listes opp.
+#
+# Bruk fra terminalen:
+#   python -m database.migrations               kjører migrasjonene som mangler
+#   python -m database.migrations --status      viser hvilke migrasjoner som er kjørt
+#   python -m database.migrations --explain     sjekker spørringene med EXPLAIN
+
+import argparse
+import re
+import mysql.connector
+from database.database_program_staticmethod import Database
+from database.paging import ordre_pager, vare_pager, kunde_pager
+from database.queries import QUERIES
+import database.varesok                                             # Definerer søkene i varetabellen, så de også sjekkes med EXPLAIN
+
+MIGRASJONER = []                # (versjon, beskrivelse, funksjon), i rekkefølgen de kjøres
+
+
+#Dekoratør som legger en migrasjon inn i listen. Funksjonen får en cursor.
+def migrasjon(versjon, beskrivelse):
+    def registrer(func):
+        if any(v == versjon for v, _, _ in MIGRASJONER):
+            raise ValueError(f"Migrasjon {versjon} er allerede definert")
+        MIGRASJONER.append((versjon, beskrivelse, func))
+        MIGRASJONER.sort(key=lambda m: m[0])
+        return func
+    return registrer
+
+
+#Sjekker om en kolonne finnes i en tabell i databasen vi er koblet til
+def kolonne_finnes(cursor, tabell, kolonne):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+        (tabell, kolonne),
+    )
+    return cursor.fetchone()[0] > 0
+
+
+#Returnerer {indeksnavn: [kolonne, ...]} for tabellen
+def indekser(cursor, tabell):
+    cursor.execute(
+        "SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s ORDER BY INDEX_NAME, SEQ_IN_INDEX",
+        (tabell,),
+    )
+    resultat = {}
+    for navn, kolonne in cursor.fetchall():
+        resultat.setdefault(navn, []).append(kolonne.lower())
+    return resultat
+
+
+#Legger til en kolonne hvis den ikke finnes
+def legg_til_kolonne(cursor, tabell, kolonne, definisjon):
+    if kolonne_finnes(cursor, tabell, kolonne):
+        return False
+    cursor.execute(f"ALTER TABLE {tabell} ADD COLUMN {kolonne} {definisjon}")
+    return True
+
+
+#Legger til en indeks, med mindre en indeks som finnes fra før allerede dekker den. kolonner kan ha DESC bak navnet (f.eks. "Antall DESC").
+#I InnoDB ligger hele raden i primærnøkkelen, og alle andre indekser har primærnøkkelen bakerst,
+#så (OrdreNr) med primærnøkkel id er det samme som (OrdreNr, id).
+def legg_til_indeks(cursor, tabell, navn, kolonner):
+    ønsket = [kolonne.split()[0].lower() for kolonne in kolonner]
+    alle = indekser(cursor, tabell)
+    primær = alle.get("PRIMARY", [])
+    for eksisterende, deres in alle.items():
+        if eksisterende == navn:                                        # Laget av en tidligere kjøring
+            return False
+        if eksisterende == "PRIMARY" and ønsket[:len(deres)] == deres:  # Primærnøkkelen har alle kolonnene
+            return False
+        if (deres + [k for k in primær if k not in deres])[:len(ønsket)] == ønsket:    # F.eks. indeksen en fremmednøkkel har laget
+            return False
+    cursor.execute(f"CREATE INDEX {navn} ON {tabell} ({', '.join(kolonner)})")
+    return True
+
+
+@migrasjon(1, "faktura-tabellen")
+def lag_faktura(cursor):
+    # id er en auto-increment primærnøkkel, OrdreNr og KNr er fremmednøkler til ordre og kunde,
+    # og dato får nåværende tidspunkt som standardverdi.
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS faktura (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        OrdreNr INT NOT NULL,
+        KNr INT NOT NULL,
+        dato DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (KNr) REFERENCES kunde(KNr),
+        FOREIGN KEY (OrdreNr) REFERENCES ordre(OrdreNr)
+    )
+    """)
+
+
+@migrasjon(2, "kunde.is_active")
+def legg_til_is_active(cursor):
+    # Kunder som "fjernes" settes til is_active = FALSE i stedet for å slettes
+    legg_til_kolonne(cursor, "kunde", "is_active", "BOOLEAN NOT NULL DEFAULT TRUE")
+
+
+@migrasjon(3, "sekvens-tabellen for kundenumre")
+def lag_sekvens(cursor):
+    # navn er hvilken nøkkel raden gjelder, neste er første nummer som ikke er delt ut (se database/sekvens.py)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS sekvens (
+        navn VARCHAR(32) NOT NULL PRIMARY KEY,
+        neste INT NOT NULL
+    )
+    """)
+    # Starter etter høyeste KNr som finnes, og går aldri bakover
+    cursor.execute("""
+    INSERT INTO sekvens (navn, neste)
+    SELECT 'kunde', COALESCE(MAX(KNr), 0) + 1 FROM kunde
+    ON DUPLICATE KEY UPDATE neste = GREATEST(neste, VALUES(neste))
+    """)
+
+
+@migrasjon(4, "stored procedure hent_alle_kunder")
+def lag_hent_alle_kunder(cursor):
+    cursor.execute("DROP PROCEDURE IF EXISTS hent_alle_kunder")
+    cursor.execute("""
+    CREATE PROCEDURE hent_alle_kunder()
+    BEGIN
+        SELECT KNr, Fornavn, Etternavn, Adresse, PostNr FROM kunde WHERE is_active = 1 ORDER BY KNr;
+    END
+    """)
+
+
+@migrasjon(5, "indekser for de mest brukte spørringene")
+def lag_indekser(cursor):
+    # Ordrelinjene til én ordre (detaljer, faktura). Alle kolonnene spørringen trenger ligger i indeksen,
+    # så tabellen leses ikke. Er primærnøkkelen (OrdreNr, VNr), dekker InnoDB dette allerede.
+    legg_til_indeks(cursor, "ordrelinje", "idx_ordrelinje_ordre", ("OrdreNr", "VNr", "PrisPrEnhet", "Antall"))
+    # Varer på lager sortert synkende på antall (vare_pager): indeksen leses i samme rekkefølge som
+    # ORDER BY Antall DESC, VNr, og har kolonnene som vises, så det blir ingen sortering og ingen oppslag i tabellen
+    legg_til_indeks(cursor, "vare", "idx_vare_antall", ("Antall DESC", "VNr", "Betegnelse", "Pris"))
+    # Aktive kunder sortert på KNr (kunde_pager, hent_alle_kunder)
+    legg_til_indeks(cursor, "kunde", "idx_kunde_aktiv", ("is_active", "KNr"))
+    # Kunde -> Poststed i ordredetaljene
+    legg_til_indeks(cursor, "kunde", "idx_kunde_postnr", ("PostNr",))
+    # Siste faktura for en ordre (app.py) og fakturaene til en kunde. Fremmednøklene har vanligvis laget disse allerede.
+    legg_til_indeks(cursor, "faktura", "idx_faktura_ordre", ("OrdreNr", "id"))
+    legg_til_indeks(cursor, "faktura", "idx_faktura_kunde", ("KNr",))
+
+
+@migrasjon(6, "FULLTEXT-indeks for søk i varenavn")
+def lag_varesøk_indeks(cursor):
+    # Søket i database/varesok.py bruker MATCH(Betegnelse) AGAINST (...), som krever en FULLTEXT-indeks på kolonnen
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'vare' "
+        "AND INDEX_TYPE = 'FULLTEXT' AND COLUMN_NAME = 'Betegnelse' AND SEQ_IN_INDEX = 1"
+    )
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("ALTER TABLE vare ADD FULLTEXT INDEX ft_vare_betegnelse (Betegnelse)")
+
+
+@migrasjon(7, "endret-kolonne for den lokale replikaen")
+def lag_endret_kolonner(cursor):
+    # database/replika.py henter bare radene som er endret siden sist. MySQL setter endret selv ved INSERT og UPDATE,
+    # med mikrosekunder så rader som endres i samme sekund holdes fra hverandre. Indeksen gjør at bare de nye radene leses.
+    for tabell in ("vare", "kunde", "Poststed", "ordre", "ordrelinje"):
+        legg_til_kolonne(cursor, tabell, "endret", "TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)")
+        legg_til_indeks(cursor, tabell, f"idx_{tabell.lower()}_endret", ("endret",))
+
+
+@migrasjon(8, "telling av slettede varer for endringsmerket i API-et")
+def lag_slettetelling(cursor):
+    # app.py ser om varetabellen er endret med MAX(endret), som er ett oppslag i idx_vare_endret. En slettet vare endrer
+    # ikke MAX(endret), så en trigger teller slettingene i endringsteller, som leses med primærnøkkelen.
+    # Med binærlogg på må brukeren ha TRIGGER-rettighet (og log_bin_trust_function_creators uten SUPER).
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS endringsteller (
+        tabell VARCHAR(64) NOT NULL PRIMARY KEY,
+        slettet BIGINT NOT NULL DEFAULT 0
+    )
+    """)
+    cursor.execute("INSERT IGNORE INTO endringsteller (tabell) VALUES ('vare')")
+    cursor.execute("SELECT COUNT(*) FROM information_schema.TRIGGERS WHERE TRIGGER_SCHEMA = DATABASE() AND TRIGGER_NAME = 'vare_slettet'")
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("CREATE TRIGGER vare_slettet AFTER DELETE ON vare FOR EACH ROW UPDATE endringsteller SET slettet = slettet + 1 WHERE tabell = 'vare'")
+
+
+#Lager tabellen som husker hvilke migrasjoner som er kjørt, og returnerer numrene
+def kjørte_versjoner(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS schema_versjon (
+        versjon INT NOT NULL PRIMARY KEY,
+        beskrivelse VARCHAR(200) NOT NULL,
+        kjort DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cursor.execute("SELECT versjon FROM schema_versjon")
+    return {rad[0] for rad in cursor.fetchall()}
+
+
+#Kjører migrasjonene som mangler, til og med versjon "til". Returnerer [(versjon, beskrivelse)] som ble kjørt.
+def migrer(db=None, til=None):
+    db = db or Database()
+    db.connect()
+    cursor = db.db.cursor()
+    kjørt = []
+    try:
+        ferdige = kjørte_versjoner(cursor)
+        for versjon, beskrivelse, func in MIGRASJONER:
+            if versjon in ferdige or (til is not None and versjon > til):
+                continue
+            func(cursor)                                            # DDL i MySQL committer selv, så hvert steg sjekker om det er gjort før
+            cursor.execute("INSERT INTO schema_versjon (versjon, beskrivelse) VALUES (%s, %s)", (versjon, beskrivelse))
+            db.db.commit()
+            kjørt.append((versjon, beskrivelse))
+    finally:
+        cursor.close()
+        db.close()
+    return kjørt
+
+
+#Returnerer [(versjon, beskrivelse, kjørt)] for alle migrasjonene
+def status(db=None):
+    db = db or Database()
+    db.connect()
+    cursor = db.db.cursor()
+    try:
+        ferdige = kjørte_versjoner(cursor)
+    finally:
+        cursor.close()
+        db.close()
+    return [(versjon, beskrivelse, versjon in ferdige) for versjon, beskrivelse, _ in MIGRASJONER]
+
+
+#Spørringene som sjekkes med EXPLAIN: alle i registeret og sidene i listene i GUI-et
+def spørringer_som_sjekkes():
+    spørringer = {navn: query.sql_for(3) for navn, query in QUERIES.items()}
+    for navn, pager in (("ordre_pager", ordre_pager(None)), ("vare_pager", vare_pager(None)), ("kunde_pager", kunde_pager(None))):
+        spørringer[f"{navn} første side"] = pager.first_query
+        spørringer[f"{navn} neste side"] = pager.next_query
+    return spørringer
+
+
+#Kjører EXPLAIN på hver spørring med 1 for alle parameterne.
+#Returnerer [(navn, tabell, type, nøkkel, extra)] for hver tabell som leses helt (type ALL).
+def sjekk_spørringer(db=None, spørringer=None):
+    db = db or Database()
+    spørringer = spørringer or spørringer_som_sjekkes()
+    db.connect()
+    cursor = db.db.cursor(dictionary=True)
+    fulle = []
+    try:
+        for navn, sql in spørringer.items():
+            antall = len(re.findall(r"%s", sql))
+            cursor.execute("EXPLAIN " + sql.rstrip().rstrip(";"), (1,) * antall)
+            for rad in cursor.fetchall():
+                if rad.get("type") == "ALL":
+                    fulle.append((navn, rad.get("table"), rad.get("type"), rad.get("key"), rad.get("Extra")))
+    finally:
+        cursor.close()
+        db.close()
+    return fulle
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Oppdaterer databaseskjemaet og sjekker indeksene.")
+    parser.add_argument("--status", action="store_true", help="vis hvilke migrasjoner som er kjørt")
+    parser.add_argument("--explain", action="store_true", help="kjør EXPLAIN på spørringene og vis de som leser hele tabeller")
+    parser.add_argument("--til", type=int, help="kjør bare migrasjonene til og med denne versjonen")
+    args = parser.parse_args()
+
+    try:
+        if args.status:
+            for versjon, beskrivelse, kjørt in status():
+                print(f"{versjon:>4}  {'kjørt ' if kjørt else 'mangler'}  {beskrivelse}")
+        elif args.explain:
+            fulle = sjekk_spørringer()
+            for navn, tabell, type_, nøkkel, extra in fulle:
+                print(f"Leser hele {tabell}: {navn} (type {type_}, {extra or 'ingen extra'})")
+            print(f"{len(fulle)} tabeller leses helt" if fulle else "Alle spørringene bruker en indeks")
+            if fulle:
+                raise SystemExit(1)
+        else:
+            kjørt = migrer(til=args.til)
+            for versjon, beskrivelse in kjørt:
+                print(f"Kjørte migrasjon {versjon}: {beskrivelse}")
+            if not kjørt:
+                print("Databasen er allerede oppdatert")
+    except mysql.connector.Error as e:
+        print(f"Error: {e}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# database/ordredetaljer.py
+# Alt om én ordre med én spørring
+# ----------------------------------------------
+# Ordren, kunden (med poststed) og ordrelinjene hentes i samme spørring. Databasen regner også ut nettosummen med
+# en vindusfunksjon (SUM(...) OVER ()), som benchmark/totaler.py bruker til å kontrollere totalene fra database/totaler.py.
+# Totalene regnes i hele øre og med MVA-sats per varekategori. Ordredetaljene i GUI-et og fakturaen bruker begge denne,
+# så de viser alltid de samme tallene.
+# Spørringen kjøres med Database.ordre_detaljer, som cacher svaret per OrdreNr.
+
+from database.queries import definer, radtype, ORDRE_KOLONNER, KUNDE_KOLONNER, FAKTURALINJE_KOLONNER
+from database.totaler import beregn
+
+LINJE_KOLONNER = ("VNr", "Betegnelse", "PrisPrEnhet", "Antall", "Sum", "KatNr")
+
+ORDRE_DETALJER = definer(
+    "ordre_detaljer",
+    "SELECT ordre.OrdreNr, ordre.OrdreDato, ordre.SendtDato, ordre.BetaltDato, ordre.KNr, "
+    "kunde.Fornavn, kunde.Etternavn, kunde.Adresse, kunde.PostNr, Poststed.Poststed, "
+    "ordrelinje.VNr, vare.Betegnelse, ordrelinje.PrisPrEnhet, ordrelinje.Antall, ordrelinje.PrisPrEnhet * ordrelinje.Antall AS Sum, vare.KatNr, "
+    "COALESCE(SUM(ordrelinje.PrisPrEnhet * ordrelinje.Antall) OVER (), 0) AS Netto "     # 0 for en ordre uten linjer
+    "FROM ordre INNER JOIN kunde ON ordre.KNr = kunde.KNr LEFT JOIN Poststed ON kunde.PostNr = Poststed.PostNr "
+    "LEFT JOIN ordrelinje ON ordrelinje.OrdreNr = ordre.OrdreNr LEFT JOIN vare ON ordrelinje.VNr = vare.VNr "
+    "WHERE ordre.OrdreNr = %s ORDER BY ordrelinje.VNr",
+    ORDRE_KOLONNER + KUNDE_KOLONNER[1:] + ("Poststed",) + LINJE_KOLONNER + ("Netto",),
+    "OrdreDetaljRad",
+)
+
+Ordre = radtype("Ordre", ORDRE_KOLONNER)
+KundeMedPoststed = radtype("KundeMedPoststed", KUNDE_KOLONNER + ("Poststed",))
+OrdrelinjeMedSum = radtype("OrdrelinjeMedSum", LINJE_KOLONNER)
+Fakturalinje = radtype("Fakturalinje", FAKTURALINJE_KOLONNER)
+
+
+class OrdreDetaljer:
+    __slots__ = ("ordre", "kunde", "linjer", "totaler", "netto_db")
+
+    def __init__(self, ordre, kunde, linjer, totaler, netto_db):
+        self.ordre = ordre                      # Ordre, samme kolonner som spørringen "ordre"
+        self.kunde = kunde                      # KundeMedPoststed, kundens kolonner og Poststed
+        self.linjer = linjer                    # [OrdrelinjeMedSum], sortert på VNr
+        self.totaler = totaler                  # Totaler fra database/totaler.py, sendes til PDFGenerator så fakturaen viser det samme
+        self.netto_db = netto_db                # Nettosummen databasen regnet ut, skal alltid være lik totaler.netto
+
+    #Ordrelinjene i rekkefølgen PDFGenerator leser dem (OrdreNr, VNr, PrisPrEnhet, Antall, Betegnelse, KatNr)
+    @property
+    def fakturalinjer(self):
+        return [Fakturalinje(self.ordre.OrdreNr, l.VNr, l.PrisPrEnhet, l.Antall, l.Betegnelse, l.KatNr) for l in self.linjer]
+
+    @property
+    def netto(self):                            # Sum uten MVA
+        return self.totaler.netto
+
+    @property
+    def mva(self):                              # MVA, summen av alle satsene
+        return self.totaler.mva
+
+    @property
+    def brutto(self):                           # Netto + MVA
+        return self.totaler.brutto
+
+
+#Gjør om radene fra "ordre_detaljer" til en OrdreDetaljer, None hvis ordren ikke finnes
+def lag_ordredetaljer(rader):
+    if not rader:
+        return None
+    første = rader[0]
+    ordre = Ordre(*første[:5])
+    kunde = KundeMedPoststed(første.KNr, *første[5:10])
+    linjer = [OrdrelinjeMedSum(*rad[10:16]) for rad in rader if rad.VNr is not None]   # En ordre uten linjer gir én rad med NULL
+    detaljer = OrdreDetaljer(ordre, kunde, linjer, None, første.Netto)
+    detaljer.totaler = beregn(detaljer.fakturalinjer)
+    return detaljer
@@ -0,0 +1,81 @@
+# database/paging.py
+# Keyset-paginering av store tabeller
+# ----------------------------------------------
+# I stedet for å hente hele tabellen med fetchall() hentes én side av gangen.
+# Neste side hentes med WHERE nøkkel > siste nøkkel (keyset), som bruker indeksen
+# direkte og er like rask på side 1000 som på side 1, i motsetning til OFFSET.
+
+PAGE_SIZE = 200                 # Standard antall rader per side
+
+
+class KeysetPager:
+    def __init__(self, db, first_query, next_query, key_func, params=(), page_size=PAGE_SIZE, cached=False, key_index=None):
+        self.db = db                            # Databaseobjektet spørringene kjøres mot
+        self.first_query = first_query          # Spørring for første side, slutter med LIMIT %s
+        self.next_query = next_query            # Spørring for neste sider, nøkkelparametere før LIMIT %s
+        self.key_func = key_func                # Funksjon som gir nøkkelparametere fra siste rad på en side
+        self.params = tuple(params)             # Faste parametere foran nøkkelen (f.eks. filter)
+        self.page_size = page_size              # Antall rader per side
+        self.cached = cached                    # Om sidene kan hentes fra den delte resultatcachen
+        self.key_index = key_index              # Kolonnen med primærnøkkelen, lar cachen endre rader direkte
+        self.last_key = None                    # Nøkkelen til siste rad vi har hentet
+        self.done = False                       # Settes når det ikke finnes flere rader
+
+    #Henter neste side, returnerer tom liste når alt er hentet
+    def next_page(self):
+        if self.done:
+            return []
+        rows = self.page_after(self.last_key)
+        if rows:
+            self.last_key = tuple(self.key_func(rows[-1]))                          # Husker hvor vi slapp
+        if len(rows) < self.page_size:                                              # Kort side betyr at vi er ferdige
+            self.done = True
+        return rows
+
+    #Siden som starter etter nøkkelen (None gir første side), uten å flytte pageren.
+    #Brukes til å hente igjen en side som er fjernet fra visningen, med nøkkelen som var last_key før den.
+    def page_after(self, key):
+        if key is None:                                                             # Første side
+            return self.db.fetch_all(self.first_query, self.params + (self.page_size,), cached=self.cached, key_index=self.key_index)
+        return self.db.fetch_all(self.next_query, self.params + tuple(key) + (self.page_size,), cached=self.cached, key_index=self.key_index)
+
+    #Starter på nytt fra første side
+    def reset(self):
+        self.last_key = None
+        self.done = False
+
+
+#Ordrelisten, sortert på OrdreNr
+def ordre_pager(db, page_size=PAGE_SIZE):
+    return KeysetPager(
+        db,
+        "SELECT OrdreNr, OrdreDato, SendtDato, BetaltDato, KNr FROM ordre ORDER BY OrdreNr LIMIT %s;",
+        "SELECT OrdreNr, OrdreDato, SendtDato, BetaltDato, KNr FROM ordre WHERE OrdreNr > %s ORDER BY OrdreNr LIMIT %s;",
+        lambda rad: (rad[0],),                                                      # OrdreNr er første kolonne
+        page_size=page_size,
+    )
+
+
+#Varer på lager, sortert synkende på antall og deretter varenummer så rekkefølgen er entydig
+def vare_pager(db, page_size=PAGE_SIZE):
+    return KeysetPager(
+        db,
+        "SELECT VNr, Betegnelse, Pris, Antall FROM vare WHERE Antall > 0 ORDER BY Antall DESC, VNr LIMIT %s;",
+        "SELECT VNr, Betegnelse, Pris, Antall FROM vare WHERE Antall > 0 AND (Antall < %s OR (Antall = %s AND VNr > %s)) ORDER BY Antall DESC, VNr LIMIT %s;",
+        lambda rad: (rad[3], rad[3], rad[0]),                                       # (Antall, Antall, VNr) fra siste rad
+        page_size=page_size,
+        cached=True,                                                                # Varelisten åpnes ofte og endres sjelden
+    )
+
+
+#Aktive kunder, samme utvalg som den lagrede prosedyren hent_alle_kunder
+def kunde_pager(db, page_size=PAGE_SIZE):
+    return KeysetPager(
+        db,
+        "SELECT KNr, Fornavn, Etternavn, Adresse, PostNr FROM kunde WHERE is_active = 1 ORDER BY KNr LIMIT %s;",
+        "SELECT KNr, Fornavn, Etternavn, Adresse, PostNr FROM kunde WHERE is_active = 1 AND KNr > %s ORDER BY KNr LIMIT %s;",
+        lambda rad: (rad[0],),                                                      # KNr er første kolonne
+        page_size=page_size,
+        cached=True,                                                                # Endringer gjort av Database oppdaterer sidene i cachen
+        key_index=0,
+    )
@@ -0,0 +1,155 @@
+# database/pool.py
+# Felles tilkoblingspool for databaseklassene
+# ----------------------------------------------
+# Holder et begrenset antall åpne tilkoblinger som gjenbrukes mellom kall,
+# slik at hver spørring slipper å åpne en ny TCP-tilkobling og logge inn på nytt.
+# Brukes av både database_program_staticmethod.Database og database_try_except.Database.
+
+import threading
+import time
+import warnings
+
+POOL_SIZE = 5                   # Standard antall tilkoblinger i poolen
+IDLE_TIMEOUT = 300              # Sekunder en ledig tilkobling kan ligge før den kobles opp på nytt
+CHECKOUT_TIMEOUT = 30           # Sekunder vi venter på en ledig tilkobling før vi gir opp
+STANDARD_PORT = 3306            # MySQL sin port når DB_PORT ikke er satt
+
+
+class ConnectionPool:
+    def __init__(self, connect_func, pool_size=POOL_SIZE, idle_timeout=IDLE_TIMEOUT, checkout_timeout=CHECKOUT_TIMEOUT, health_check=True):
+        self.connect_func = connect_func                # Funksjon som lager en ny tilkobling
+        self.pool_size = pool_size                      # Maks antall åpne tilkoblinger
+        self.idle_timeout = idle_timeout                # Hvor lenge en tilkobling kan være ledig
+        self.checkout_timeout = checkout_timeout        # Hvor lenge vi venter på en ledig tilkobling
+        self.health_check = health_check                # Om tilkoblingen skal pinges før den lånes ut
+        self._ledige = []                               # Ledige tilkoblinger som (tilkobling, sist brukt)
+        self._åpne = 0                                  # Antall tilkoblinger som er åpne (ledige + utlånt)
+        self._lås = threading.Condition()               # Lås og ventekø for trådene som bruker poolen
+        self.stats = {"checkouts": 0, "waits": 0, "reconnects": 0, "opened": 0}  # Tellere for bruk av poolen
+
+    #Låner ut en tilkobling fra poolen
+    def checkout(self):
+        frist = time.monotonic() + self.checkout_timeout                        # Tidspunkt vi slutter å vente
+        with self._lås:
+            self.stats["checkouts"] += 1                                        # Teller utlånet
+            ventet = False                                                      # Om dette utlånet måtte vente
+            while True:
+                if self._ledige:                                                # Gjenbruker sist brukte ledige tilkobling
+                    conn, sist_brukt = self._ledige.pop()
+                    break
+                if self._åpne < self.pool_size:                                 # Plass til en ny tilkobling
+                    self._åpne += 1
+                    conn, sist_brukt = None, None
+                    break
+                if not ventet:                                                  # Teller hvert utlån som må vente én gang
+                    self.stats["waits"] += 1
+                    ventet = True
+                gjenstår = frist - time.monotonic()                             # Hvor lenge vi fortsatt kan vente
+                if gjenstår <= 0:
+                    raise TimeoutError("Ingen ledig databasetilkobling i poolen")
+                self._lås.wait(gjenstår)                                        # Venter til en tilkobling leveres tilbake
+
+        try:                                                                    # Oppkobling og helsesjekk skjer utenfor låsen
+            if conn is None:
+                conn = self._ny_tilkobling()
+            else:
+                conn = self._sjekk_tilkobling(conn, sist_brukt)
+        except Exception:
+            self._frigi_plass()                                                 # Gir plassen tilbake hvis vi ikke fikk koblet til
+            raise
+        return conn
+
+    #Leverer en tilkobling tilbake til poolen
+    def checkin(self, conn):
+        try:
+            conn.rollback()                                                     # Avslutter eventuell åpen transaksjon så neste låner ser ferske data
+        except Exception:
+            self.discard(conn)                                                  # Tilkoblingen er ødelagt, kastes
+            return
+        with self._lås:
+            self._ledige.append((conn, time.monotonic()))                       # Legger tilkoblingen tilbake som ledig
+            self._lås.notify()                                                  # Vekker en tråd som venter
+
+    #Kaster en tilkobling som ikke kan gjenbrukes
+    def discard(self, conn):
+        self._lukk(conn)                                                        # Lukker tilkoblingen
+        self._frigi_plass()                                                     # Gir plassen tilbake til poolen
+
+    #Lukker alle ledige tilkoblinger
+    def close_all(self):
+        with self._lås:
+            ledige, self._ledige = self._ledige, []                             # Tar ut alle ledige tilkoblinger
+            self._åpne -= len(ledige)
+            self._lås.notify_all()
+        for conn, _ in ledige:
+            self._lukk(conn)
+
+    #Returnerer en kopi av tellerne sammen med nåværende størrelse på poolen
+    def get_stats(self):
+        with self._lås:
+            stats = dict(self.stats)
+            stats["open"] = self._åpne
+            stats["idle"] = len(self._ledige)
+        return stats
+
+    def _ny_tilkobling(self):
+        conn = self.connect_func()                                              # Lager en ny tilkobling
+        with self._lås:
+            self.stats["opened"] += 1
+        return conn
+
+    def _sjekk_tilkobling(self, conn, sist_brukt):
+        if time.monotonic() - sist_brukt > self.idle_timeout:                  # Har ligget for lenge, serveren kan ha kastet den
+            return self._koble_opp_igjen(conn)
+        if self.health_check:
+            try:
+                if conn.is_connected():                                         # Pinger serveren
+                    return conn
+            except Exception:
+                pass
+            return self._koble_opp_igjen(conn)                                  # Tilkoblingen er død, kobler opp på nytt
+        return conn
+
+    def _koble_opp_igjen(self, conn):
+        self._lukk(conn)                                                        # Lukker den gamle tilkoblingen
+        with self._lås:
+            self.stats["reconnects"] += 1
+        return self._ny_tilkobling()                                            # Lager en ny i stedet
+
+    def _frigi_plass(self):
+        with self._lås:
+            self._åpne -= 1
+            self._lås.notify()
+
+    @staticmethod
+    def _lukk(conn):
+        try:
+            conn.close()
+        except Exception:                                                       # Tilkoblingen kan allerede være brutt
+            pass
+
+
+_pooler = {}                    # Delte pooler, én per databasekonfigurasjon
+_pooler_lås = threading.Lock()  # Beskytter _pooler når flere tråder lager pooler samtidig
+
+
+#Nøkkelen for en databasekonfigurasjon. Porten kan komme som tekst, tall eller None fra .env, og
+#gjøres om til tall her så begge databaseklassene får samme pool for samme database.
+def pool_nøkkel(host, port, user, database):
+    return (host, int(port or STANDARD_PORT), user, database)
+
+
+#Henter den delte poolen for en databasekonfigurasjon, eller lager den første gang.
+#Innstillingene (pool_size, idle_timeout osv.) brukes bare når poolen lages. Ber en senere
+#kaller om andre innstillinger for samme pool, får den en advarsel og den eksisterende poolen.
+def get_pool(key, connect_func, **innstillinger):
+    with _pooler_lås:
+        pool = _pooler.get(key)
+        if pool is None:
+            pool = ConnectionPool(connect_func, **innstillinger)
+            _pooler[key] = pool
+            return pool
+    ulike = {navn: verdi for navn, verdi in innstillinger.items() if getattr(pool, navn) != verdi}
+    if ulike:
+        warnings.warn(f"Poolen for {key[0]}/{key[3]} finnes allerede, {ulike} blir ikke brukt", stacklevel=2)
+    return pool
@@ -0,0 +1,150 @@
+# database/queries.py
+# Register over spørringene programmet bruker
+# ----------------------------------------------
+# Hver spørring har et navn og skrives bare ett sted, med kolonnene listet opp (ingen SELECT *).
+# Radene kommer tilbake som navngitte tupler, så koden kan skrive kunde.Fornavn i stedet for kunde[1].
+# Navngitte tupler er fortsatt vanlige tupler, så kode som bruker indekser (f.eks. PDFGeneratoren) virker som før.
+# Spørringene kjøres som prepared statements. Serveren tolker en spørring én gang per tilkobling,
+# og siden tilkoblingene fra poolen gjenbrukes, blir cursoren liggende klar til neste gang.
+# Ordredetaljene (ordre, kunde, linjer og totaler i én spørring) er definert i database/ordredetaljer.py.
+# Spørringer med WHERE ... IN ({plassholdere}) får én %s per verdi de kjøres med, og tolkes på nytt når antallet endres.
+
+import threading
+import weakref
+from collections import namedtuple
+from database.metrics import nåværende, MåltCursor
+
+
+#Lager (eller gjenbruker) den navngitte tuppel-typen for en rad. Typen legges i modulen,
+#så radene kan pickles og sendes til andre prosesser (som i faktura_batch.py).
+def radtype(radnavn, kolonner):
+    Rad = globals().get(radnavn)
+    if Rad is None:
+        Rad = namedtuple(radnavn, kolonner, module=__name__)
+        globals()[radnavn] = Rad
+    elif Rad._fields != tuple(kolonner):
+        raise ValueError(f"Radtypen {radnavn} finnes allerede med andre kolonner")
+    return Rad
+
+
+class Query:
+    __slots__ = ("navn", "sql", "kolonner", "Rad")
+
+    def __init__(self, navn, sql, kolonner, radnavn):
+        self.navn = navn                                    # Navnet spørringen kjøres med
+        self.sql = sql                                      # SQL med %s for parametere
+        self.kolonner = tuple(kolonner)                     # Kolonnene i samme rekkefølge som i SELECT
+        self.Rad = radtype(radnavn, self.kolonner)          # Typen radene gjøres om til
+
+    #SQL-en for "antall" parametere, fyller inn {plassholdere} i spørringer med IN-liste
+    def sql_for(self, antall):
+        if "{plassholdere}" not in self.sql:
+            return self.sql
+        return self.sql.format(plassholdere=", ".join(["%s"] * antall))
+
+
+QUERIES = {}                    # Navn -> Query
+
+
+#Legger en spørring inn i registeret
+def definer(navn, sql, kolonner, radnavn):
+    if navn in QUERIES:
+        raise ValueError(f"Spørringen {navn} er allerede definert")
+    QUERIES[navn] = Query(navn, sql, kolonner, radnavn)
+    return QUERIES[navn]
+
+
+ORDRE_KOLONNER = ("OrdreNr", "OrdreDato", "SendtDato", "BetaltDato", "KNr")
+KUNDE_KOLONNER = ("KNr", "Fornavn", "Etternavn", "Adresse", "PostNr")
+FAKTURALINJE_KOLONNER = ("OrdreNr", "VNr", "PrisPrEnhet", "Antall", "Betegnelse", "KatNr")    # KatNr bestemmer MVA-satsen (database/totaler.py)
+
+definer(
+    "ordre",
+    "SELECT OrdreNr, OrdreDato, SendtDato, BetaltDato, KNr FROM ordre WHERE OrdreNr = %s",
+    ORDRE_KOLONNER, "Ordre",
+)
+definer(
+    "kunde",
+    "SELECT KNr, Fornavn, Etternavn, Adresse, PostNr FROM kunde WHERE KNr = %s",
+    KUNDE_KOLONNER, "Kunde",
+)
+definer(                                                    # Alle ordrene i rekkefølge, søkeindeksen i GUI-et bygges fra disse (kjøres med stream_rows)
+    "alle_ordrer",
+    "SELECT OrdreNr, OrdreDato, SendtDato, BetaltDato, KNr FROM ordre ORDER BY OrdreNr",
+    ORDRE_KOLONNER, "Ordre",
+)
+definer(                                                    # Ordrelinjene slik de vises i hovedtreet
+    "ordrelinjer",
+    "SELECT OrdreNr, VNr, PrisPrEnhet, Antall FROM ordrelinje WHERE OrdreNr = %s",
+    ("OrdreNr", "VNr", "PrisPrEnhet", "Antall"), "Ordrelinje",
+)
+definer(                                                    # Ordrelinjene til fakturaen, samme rekkefølge som PDFGenerator leser
+    "fakturalinjer",
+    "SELECT ordrelinje.OrdreNr, ordrelinje.VNr, ordrelinje.PrisPrEnhet, ordrelinje.Antall, vare.Betegnelse, vare.KatNr "
+    "FROM ordrelinje INNER JOIN vare ON ordrelinje.VNr = vare.VNr WHERE ordrelinje.OrdreNr = %s ORDER BY ordrelinje.VNr",
+    FAKTURALINJE_KOLONNER, "Fakturalinje",
+)
+definer(                                                    # Siste faktura for en ordre, /faktura/<nr>.pdf viser denne
+    "siste_faktura",
+    "SELECT id FROM faktura WHERE OrdreNr = %s ORDER BY id DESC LIMIT 1",
+    ("id",), "Faktura",
+)
+definer(                                                    # Samme som "ordre", "kunde" og "fakturalinjer", men for mange ordrer/kunder på en gang
+    "ordrer_in",
+    "SELECT OrdreNr, OrdreDato, SendtDato, BetaltDato, KNr FROM ordre WHERE OrdreNr IN ({plassholdere})",
+    ORDRE_KOLONNER, "Ordre",
+)
+definer(
+    "kunder_in",
+    "SELECT KNr, Fornavn, Etternavn, Adresse, PostNr FROM kunde WHERE KNr IN ({plassholdere})",
+    KUNDE_KOLONNER, "Kunde",
+)
+definer(
+    "fakturalinjer_in",
+    "SELECT ordrelinje.OrdreNr, ordrelinje.VNr, ordrelinje.PrisPrEnhet, ordrelinje.Antall, vare.Betegnelse, vare.KatNr "
+    "FROM ordrelinje INNER JOIN vare ON ordrelinje.VNr = vare.VNr WHERE ordrelinje.OrdreNr IN ({plassholdere}) ORDER BY ordrelinje.OrdreNr",
+    FAKTURALINJE_KOLONNER, "Fakturalinje",
+)
+
+
+_forberedte = weakref.WeakKeyDictionary()   # Tilkobling -> {navn: prepared cursor}, forsvinner når tilkoblingen lukkes
+_forberedte_lås = threading.Lock()
+
+
+#Returnerer en prepared cursor for spørringen på denne tilkoblingen, lager den første gang
+def forberedt_cursor(tilkobling, query):
+    with _forberedte_lås:
+        cursorer = _forberedte.setdefault(tilkobling, {})
+    cursor = cursorer.get(query.navn)
+    if cursor is None:                                      # Tilkoblingen er bare i bruk av én tråd av gangen
+        cursor = tilkobling.cursor(prepared=True)
+        cursorer[query.navn] = cursor
+    return cursor
+
+
+#Kjører en spørring fra registeret på tilkoblingen og returnerer radene som navngitte tupler
+def kjør(tilkobling, navn, params=()):
+    query = QUERIES[navn]
+    cursor = forberedt_cursor(tilkobling, query)
+    måling = nåværende()
+    if måling is not None:                                  # Måler execute og fetch når kallet kommer fra Database.query
+        cursor = MåltCursor(cursor, måling)
+    try:
+        cursor.execute(query.sql_for(len(params)), tuple(params))     # Første gang tolkes spørringen av serveren, deretter sendes bare parameterne
+        rader = cursor.fetchall()
+    except Exception:
+        glem(tilkobling, navn)                              # Lager en ny cursor neste gang
+        raise
+    return [query.Rad._make(rad) for rad in rader]
+
+
+#Fjerner en cursor fra hurtiglageret
+def glem(tilkobling, navn):
+    with _forberedte_lås:
+        cursorer = _forberedte.get(tilkobling, {})
+    cursor = cursorer.pop(navn, None)
+    if cursor is not None:
+        try:
+            cursor.close()
+        except Exception:                                   # Tilkoblingen kan allerede være brutt
+            pass
@@ -0,0 +1,450 @@
+# database/replika.py
+# Lokal kopi av databasen i SQLite
+# ----------------------------------------------
+# Med LOKAL_REPLIKA=replika.sqlite3 i .env leser GUI-et fra en SQLite-fil på maskinen i stedet for fra MySQL-serveren,
+# så et klikk ikke venter på nettet, og listene kan vises selv om forbindelsen til serveren er borte en stund.
+# Tabellene i TABELLER kopieres. En bakgrunnstråd henter hvert SYNK_SEKUNDER bare radene som er endret siden sist:
+# kolonnen endret (migrasjon 7) settes av MySQL ved hver INSERT og UPDATE, og replikaen husker hvor langt den har
+# kommet (high-water mark). Radene hentes i bolker sortert på (endret, primærnøkkel), så også første kopiering av en
+# stor tabell går uten å ha hele tabellen i minnet.
+# En transaksjon kan committe etter at replikaen har lest, med en endret-tid litt før. Derfor leses de siste OVERLAPP
+# sekundene på nytt hver gang. Radene skrives med INSERT OR REPLACE, så det gjør ingenting å få samme rad to ganger.
+# Slettede rader har ingen endret-tid. Hver AVSTEM_HVER synk sammenlignes antall rader, og er det forskjell fjernes
+# nøklene som ikke lenger finnes på serveren.
+#
+# Lesing (fetch_all, fetch_one, query, stream_rows og hent_alle_kunder) går til SQLite når alle tabellene er kopiert
+# og spørringen bare bruker disse tabellene. Spørringer SQLite ikke forstår (f.eks. MATCH ... AGAINST i varesøket)
+# sendes til MySQL som før. Skriving går alltid til MySQL, og gjøres i replikaen også når den har lykkes.
+#
+# Bruk:
+#   db = ReplikaDatabase("replika.sqlite3", pooled=True)    # Starter synkingen i bakgrunnen
+#   db.replika_stats()          # {"klar": True, "etterslep_sekunder": 3.2, "rader_siste_synk": 12, ...}
+#
+# Fra terminalen:
+#   python -m database.replika replika.sqlite3              synker én gang og viser hvor mange rader som ble hentet
+#   python -m database.replika replika.sqlite3 --løkke      fortsetter å synke til Ctrl+C
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from database.cache import tables_in
+from database.database_program_staticmethod import Database, STREAM_BOLK
+from database.metrics import målt, sql_navn
+from database.pool import POOL_SIZE, IDLE_TIMEOUT
+from database import queries
+
+REPLIKA_FIL = os.getenv("LOKAL_REPLIKA")            # SQLite-filen, replikaen brukes ikke hvis den ikke er satt
+TABELLER = ("vare", "kunde", "Poststed", "ordre", "ordrelinje")
+SYNK_SEKUNDER = 5               # Tid mellom hver synk
+BOLK = 5000                     # Rader som hentes fra MySQL om gangen
+OVERLAPP = 10                   # Sekunder før forrige synk som leses på nytt, lengre enn en transaksjon varer
+AVSTEM_HVER = 60                # Antall synker mellom hver sjekk etter slettede rader
+HISTORIKK = 20                  # Antall synker som huskes i statistikken
+START = datetime(1970, 1, 2)    # Før alle endret-tider, TIMESTAMP begynner i 1970
+ØRE = Decimal("0.01")
+
+REPLIKERTE = {tabell.lower() for tabell in TABELLER}    # tables_in gir tabellnavnene med små bokstaver
+
+# Den lagrede prosedyren hent_alle_kunder (migrasjon 4) som vanlig SQL, SQLite har ikke prosedyrer
+LOKALE_PROSEDYRER = {
+    "hent_alle_kunder": "SELECT KNr, Fornavn, Etternavn, Adresse, PostNr FROM kunde WHERE is_active = 1 ORDER BY KNr",
+}
+
+# Indekser i SQLite for listene i GUI-et, de samme som migrasjon 5 lager i MySQL
+LOKALE_INDEKSER = (
+    ("vare", "idx_vare_antall", ("Antall DESC", "VNr")),
+    ("kunde", "idx_kunde_aktiv", ("is_active", "KNr")),
+    ("ordrelinje", "idx_ordrelinje_ordre", ("OrdreNr", "VNr")),
+)
+
+# Verdiene fra MySQL lagres som tekst og tall i SQLite og gjøres om tilbake når de leses.
+# Desimaltall har skalaen i typenavnet (DECIMAL2 for DECIMAL(10,2)), så Pris kommer tilbake som Decimal("199.90").
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda tid: tid.isoformat(" "))
+sqlite3.register_converter("DATE", lambda verdi: date.fromisoformat(verdi.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda verdi: datetime.fromisoformat(verdi.decode()))
+for _skala in range(31):
+    sqlite3.register_converter(f"DECIMAL{_skala}", lambda verdi, skala=Decimal(1).scaleb(-_skala): Decimal(verdi.decode()).quantize(skala))
+
+
+#Typen en kolonne får i SQLite, ut fra DATA_TYPE og NUMERIC_SCALE i MySQL
+def sqlite_type(data_type, skala):
+    if data_type in ("tinyint", "smallint", "mediumint", "int", "integer", "bigint", "bit", "year"):
+        return "INTEGER"
+    if data_type in ("decimal", "numeric"):
+        return f"DECIMAL{skala or 0}"
+    if data_type in ("float", "double", "real"):
+        return "REAL"
+    if data_type == "date":
+        return "DATE"
+    if data_type in ("datetime", "timestamp"):
+        return "TIMESTAMP"
+    if "blob" in data_type or "binary" in data_type:
+        return "BLOB"
+    return "TEXT"
+
+
+#information_schema gir noen ganger bytes i stedet for tekst
+def tekst(verdi):
+    return verdi.decode() if isinstance(verdi, (bytes, bytearray)) else verdi
+
+
+#Samme SQL med SQLite sine plassholdere
+def lokal_sql(sql):
+    return sql.replace("%s", "?")
+
+
+#Regnestykker med kroner (f.eks. PrisPrEnhet * Antall) gir float i SQLite, MySQL gir Decimal med øre
+def desimaler(rad):
+    return tuple(Decimal(repr(verdi)).quantize(ØRE) if isinstance(verdi, float) else verdi for verdi in rad)
+
+
+class Replika:
+    def __init__(self, sti, kilde, intervall=SYNK_SEKUNDER):
+        self.sti = sti                                      # SQLite-filen
+        self.kilde = kilde                                  # Database som leser fra MySQL
+        self.intervall = intervall
+        self._lokal = threading.local()                     # Én SQLite-tilkobling per tråd
+        self._lås = threading.Lock()                        # For statistikken
+        self._synk_lås = threading.Lock()                   # Bare én synk av gangen
+        self._vekk = threading.Event()                      # Settes for å synke med en gang
+        self._stopp = threading.Event()
+        self._tråd = None
+        self._bare_mysql = set()                            # Spørringer SQLite ikke forstår
+        self.stats = {"synker": 0, "feil": 0, "rader_totalt": 0, "slettet_totalt": 0}
+        self.historikk = deque(maxlen=HISTORIKK)            # De siste synkene, nyeste sist
+        self.siste_feil = None
+
+        tilkobling = self._tilkobling()
+        tilkobling.execute("PRAGMA journal_mode=WAL")       # Lesing fra GUI-et venter ikke på synkingen
+        with tilkobling:
+            tilkobling.execute("CREATE TABLE IF NOT EXISTS replika_status (tabell TEXT PRIMARY KEY, synket_til TIMESTAMP, lokal_tid REAL)")
+        self.skjema = self._les_skjema()                    # {tabell: (kolonner, primærnøkkel)} for tabellene som finnes lokalt
+        status = tilkobling.execute("SELECT tabell, lokal_tid FROM replika_status").fetchall()
+        self.klar = {tabell for tabell, _ in status} >= set(TABELLER)      # Alle tabellene er kopiert minst én gang
+        self._synket = min((tid for _, tid in status), default=None) if self.klar else None   # time.time() da dataene var ferske
+
+    def _ny_tilkobling(self):
+        tilkobling = sqlite3.connect(self.sti, timeout=30, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        tilkobling.execute("PRAGMA synchronous=NORMAL")     # Trygt med WAL, og mye raskere ved mange små skrivinger
+        return tilkobling
+
+    #SQLite-tilkoblingen til tråden som kjører nå
+    def _tilkobling(self):
+        tilkobling = getattr(self._lokal, "tilkobling", None)
+        if tilkobling is None:
+            tilkobling = self._ny_tilkobling()
+            self._lokal.tilkobling = tilkobling
+        return tilkobling
+
+    #Kolonnene og primærnøkkelen til tabellene som allerede er laget i SQLite
+    def _les_skjema(self):
+        skjema = {}
+        for tabell in TABELLER:
+            info = self._tilkobling().execute(f"PRAGMA table_info({tabell})").fetchall()   # (nr, navn, type, notnull, standard, pk)
+            if info:
+                nøkkel = tuple(rad[1] for rad in sorted((rad for rad in info if rad[5]), key=lambda rad: rad[5]))
+                skjema[tabell] = (tuple(rad[1] for rad in info), nøkkel)
+        return skjema
+
+    #Lager tabellen i SQLite med de samme kolonnene og primærnøkkelen som i MySQL
+    def _lag_tabell(self, tabell):
+        kolonner = [(tekst(navn), tekst(data_type), skala) for navn, data_type, skala in self.kilde.fetch_all(
+            "SELECT COLUMN_NAME, DATA_TYPE, NUMERIC_SCALE FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION", (tabell,)
+        )]
+        nøkkel = tuple(tekst(rad[0]) for rad in self.kilde.fetch_all(
+            "SELECT COLUMN_NAME FROM information_schema.KEY_COLUMN_USAGE "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND CONSTRAINT_NAME = 'PRIMARY' ORDER BY ORDINAL_POSITION", (tabell,)
+        ))
+        navn = [kolonne for kolonne, _, _ in kolonner]
+        if "endret" not in navn:
+            raise RuntimeError(f"Tabellen {tabell} mangler kolonnen endret, kjør python -m database.migrations")
+        if not nøkkel:
+            raise RuntimeError(f"Tabellen {tabell} har ingen primærnøkkel")
+        definisjoner = ", ".join(f"{kolonne} {sqlite_type(data_type.lower(), skala)}" for kolonne, data_type, skala in kolonner)
+        tilkobling = self._tilkobling()
+        with tilkobling:
+            tilkobling.execute(f"CREATE TABLE IF NOT EXISTS {tabell} ({definisjoner}, PRIMARY KEY ({', '.join(nøkkel)}))")
+            for indeks_tabell, indeks, indeks_kolonner in LOKALE_INDEKSER:
+                if indeks_tabell == tabell and all(kolonne.split()[0] in navn for kolonne in indeks_kolonner):
+                    tilkobling.execute(f"CREATE INDEX IF NOT EXISTS {indeks} ON {tabell} ({', '.join(indeks_kolonner)})")
+        return tuple(navn), nøkkel
+
+    #Henter radene i tabellen som er endret etter "fra", i bolker sortert på (endret, primærnøkkel). Returnerer antall rader.
+    def _hent_endringer(self, tabell, fra):
+        kolonner, nøkkel = self.skjema[tabell]
+        liste = ", ".join(kolonner)
+        rekkefølge = ", ".join(("endret",) + nøkkel)
+        første = f"SELECT {liste} FROM {tabell} WHERE endret >= %s ORDER BY {rekkefølge} LIMIT %s"
+        neste = (
+            f"SELECT {liste} FROM {tabell} WHERE endret >= %s AND ({rekkefølge}) > ({', '.join(['%s'] * (len(nøkkel) + 1))}) "
+            f"ORDER BY {rekkefølge} LIMIT %s"
+        )
+        posisjon = [kolonner.index(kolonne) for kolonne in ("endret",) + nøkkel]
+        lagre = f"INSERT OR REPLACE INTO {tabell} ({liste}) VALUES ({', '.join('?' * len(kolonner))})"
+        tilkobling = self._tilkobling()
+        antall, siste = 0, None
+        while True:
+            if siste is None:
+                rader = self.kilde.fetch_all(første, (fra, BOLK))
+            else:                                           # Neste bolk etter siste rad (keyset, som database/paging.py)
+                rader = self.kilde.fetch_all(neste, (fra,) + siste + (BOLK,))
+            if rader:
+                with tilkobling:                            # Én transaksjon per bolk
+                    tilkobling.executemany(lagre, rader)
+                antall += len(rader)
+                siste = tuple(rader[-1][i] for i in posisjon)
+            if len(rader) < BOLK:
+                return antall
+
+    #Fjerner rader som er slettet i MySQL. Nøklene sammenlignes bare hvis antallet er forskjellig.
+    def _avstem(self, tabell):
+        _, nøkkel = self.skjema[tabell]
+        tilkobling = self._tilkobling()
+        der = self.kilde.fetch_one(f"SELECT COUNT(*) FROM {tabell}")[0]
+        her = tilkobling.execute(f"SELECT COUNT(*) FROM {tabell}").fetchone()[0]
+        if der == her:
+            return 0
+        liste = ", ".join(nøkkel)
+        finnes = {tuple(rad) for rad in self.kilde.stream_rows(f"SELECT {liste} FROM {tabell}")}
+        borte = [rad for rad in tilkobling.execute(f"SELECT {liste} FROM {tabell}").fetchall() if rad not in finnes]
+        with tilkobling:
+            tilkobling.executemany(f"DELETE FROM {tabell} WHERE {' AND '.join(f'{kolonne} = ?' for kolonne in nøkkel)}", borte)
+        return len(borte)
+
+    #Henter alle endringer fra MySQL. Returnerer {"rader", "slettet", "sekunder", "per_tabell"} for synken.
+    def synk(self):
+        with self._synk_lås:
+            lokal_tid, start = time.time(), time.perf_counter()
+            per_tabell, slettet = {}, 0
+            try:
+                nå = self.kilde.fetch_one("SELECT NOW(6)")[0]          # Serverens klokke, samme som endret settes med
+                tilkobling = self._tilkobling()
+                for tabell in TABELLER:
+                    if tabell not in self.skjema:
+                        self.skjema[tabell] = self._lag_tabell(tabell)
+                    rad = tilkobling.execute("SELECT synket_til FROM replika_status WHERE tabell = ?", (tabell,)).fetchone()
+                    fra = rad[0] - timedelta(seconds=OVERLAPP) if rad else START
+                    per_tabell[tabell] = self._hent_endringer(tabell, fra)
+                    if self.stats["synker"] % AVSTEM_HVER == 0:         # Også første gang, det kan være slettet rader mens programmet var lukket
+                        slettet += self._avstem(tabell)
+                    with tilkobling:
+                        tilkobling.execute("INSERT OR REPLACE INTO replika_status (tabell, synket_til, lokal_tid) VALUES (?, ?, ?)", (tabell, nå, lokal_tid))
+            except Exception as e:
+                with self._lås:
+                    self.stats["feil"] += 1
+                    self.siste_feil = str(e)
+                raise
+            synk = {"tid": datetime.now().replace(microsecond=0), "rader": sum(per_tabell.values()), "slettet": slettet,
+                    "sekunder": time.perf_counter() - start, "per_tabell": per_tabell}
+            with self._lås:
+                self.stats["synker"] += 1
+                self.stats["rader_totalt"] += synk["rader"]
+                self.stats["slettet_totalt"] += slettet
+                self.historikk.append(synk)
+                self.klar = True
+                self._synket = lokal_tid
+            return synk
+
+    #Starter synkingen i en bakgrunnstråd
+    def start(self):
+        if self._tråd is None:
+            self._tråd = threading.Thread(target=self._løkke, name="replika", daemon=True)
+            self._tråd.start()
+
+    def stopp(self):
+        self._stopp.set()
+        self._vekk.set()
+
+    #Synker med en gang i stedet for å vente på neste runde
+    def synk_nå(self):
+        self._vekk.set()
+
+    def _løkke(self):                                       # Kjører i bakgrunnstråden
+        while not self._stopp.is_set():
+            try:
+                self.synk()
+            except Exception as e:                          # Serveren kan være nede en stund, vi prøver igjen neste runde
+                print(f"Feil i synkingen av replikaen: {e}")
+            self._vekk.wait(self.intervall)
+            self._vekk.clear()
+
+    #Om spørringen kan kjøres i SQLite: alle tabellene er kopiert, og den bruker bare kopierte tabeller
+    def kan_lese(self, sql):
+        tabeller = tables_in(sql)
+        return self.klar and bool(tabeller) and all(tabell in REPLIKERTE for tabell in tabeller) and sql not in self._bare_mysql
+
+    #Spørringen feilet i SQLite og sendes til MySQL heretter. En låst database er ikke feil i spørringen.
+    def bare_mysql(self, sql, feil):
+        if "locked" not in str(feil):
+            self._bare_mysql.add(sql)
+
+    #Alle radene fra en spørring skrevet for MySQL (med %s)
+    def les(self, sql, params=None):
+        return self._tilkobling().execute(lokal_sql(sql), tuple(params or ())).fetchall()
+
+    #Radene én og én. Spørringen kjøres med en gang, så feil kommer her og ikke når radene leses.
+    def strøm(self, sql, params=None, størrelse=STREAM_BOLK):
+        tilkobling = self._ny_tilkobling()                  # Egen tilkobling, generatoren kan leve lenge
+        try:
+            cursor = tilkobling.execute(lokal_sql(sql), tuple(params or ()))
+        except Exception:
+            tilkobling.close()
+            raise
+        return self._bolkvis(tilkobling, cursor, størrelse)
+
+    def _bolkvis(self, tilkobling, cursor, størrelse):
+        try:
+            while True:
+                rader = cursor.fetchmany(størrelse)
+                if not rader:
+                    break
+                yield from rader
+        finally:
+            tilkobling.close()
+
+    #Gjør en INSERT, UPDATE eller DELETE som allerede har lykkes i MySQL
+    def utfør(self, sql, params):
+        tabeller = tables_in(sql)
+        if not tabeller or not all(tabell in REPLIKERTE for tabell in tabeller) or not self.klar:
+            return
+        try:
+            tilkobling = self._tilkobling()
+            with tilkobling:
+                tilkobling.execute(lokal_sql(sql), tuple(params))
+        except sqlite3.Error as e:                          # Endringen har endret-tid i MySQL og kommer med neste synk
+            print(f"Replikaen kunne ikke gjøre endringen selv, den hentes ved neste synk: {e}")
+            self.synk_nå()
+
+    #Lagrer nye rader som allerede er lagt inn i MySQL
+    def lagre(self, tabell, kolonner, rader):
+        if tabell not in self.skjema or not rader:
+            return
+        try:
+            tilkobling = self._tilkobling()
+            with tilkobling:
+                tilkobling.executemany(f"INSERT OR REPLACE INTO {tabell} ({', '.join(kolonner)}) VALUES ({', '.join('?' * len(kolonner))})", rader)
+        except sqlite3.Error as e:
+            print(f"Replikaen kunne ikke lagre radene selv, de hentes ved neste synk: {e}")
+            self.synk_nå()
+
+    #De siste synkene, nyeste først
+    def siste_synker(self):
+        with self._lås:
+            return list(reversed(self.historikk))
+
+    #Tellere, etterslep (sekunder siden dataene sist var ferske) og hvor mye siste synk hentet
+    def get_stats(self):
+        with self._lås:
+            stats = dict(self.stats)
+            siste = self.historikk[-1] if self.historikk else None
+            stats["klar"] = self.klar
+            stats["etterslep_sekunder"] = round(time.time() - self._synket, 1) if self._synket is not None else None
+            stats["rader_siste_synk"] = siste["rader"] if siste else None
+            stats["sekunder_siste_synk"] = round(siste["sekunder"], 3) if siste else None
+            stats["siste_feil"] = self.siste_feil
+        return stats
+
+
+class ReplikaDatabase(Database):
+    def __init__(self, sti, pooled=False, pool_size=POOL_SIZE, idle_timeout=IDLE_TIMEOUT, cached=False, start=True):
+        super().__init__(pooled, pool_size, idle_timeout, cached)
+        self.replika = Replika(sti, Database(pooled=pooled, pool_size=pool_size, idle_timeout=idle_timeout))
+        if start:
+            self.replika.start()
+
+    #Svaret fra replikaen, None hvis spørringen må kjøres i MySQL
+    def _lokalt(self, sql, les):
+        if not self.replika.kan_lese(sql):
+            return None
+        try:
+            return les()
+        except sqlite3.OperationalError as e:
+            self.replika.bare_mysql(sql, e)
+            return None
+
+    @målt(lambda query, *_, **__: "replika: " + sql_navn(query))
+    def _les(self, query, params):
+        return self.replika.les(query, params)
+
+    @målt(lambda navn, *_, **__: "replika: " + navn)
+    def _les_query(self, navn, sql, params):
+        return [queries.QUERIES[navn].Rad._make(desimaler(rad)) for rad in self.replika.les(sql, params)]
+
+    def fetch_all(self, query, params=None, cached=False, key_index=None, complete=False):
+        rader = self._lokalt(query, lambda: self._les(query, params))
+        return rader if rader is not None else super().fetch_all(query, params, cached, key_index, complete)
+
+    def fetch_one(self, query, params=None):
+        rader = self._lokalt(query, lambda: self._les(query, params))
+        if rader is None:
+            return super().fetch_one(query, params)
+        return rader[0] if rader else None
+
+    def query(self, navn, params=(), cached=False):
+        params = tuple(params)
+        sql = queries.QUERIES[navn].sql_for(len(params))
+        rader = self._lokalt(sql, lambda: self._les_query(navn, sql, params))
+        return rader if rader is not None else super().query(navn, params, cached)
+
+    def stream_rows(self, query, params=None, størrelse=STREAM_BOLK):
+        rader = self._lokalt(query, lambda: self.replika.strøm(query, params, størrelse))
+        return rader if rader is not None else super().stream_rows(query, params, størrelse)
+
+    def call_procedure(self, procedure, args=(), cached=False):
+        sql = LOKALE_PROSEDYRER.get(procedure)
+        rader = self._lokalt(sql, lambda: self._les(sql, ())) if sql and not args else None
+        return rader if rader is not None else super().call_procedure(procedure, args, cached)
+
+    def update_one(self, query, params, invalidate=True):
+        super().update_one(query, params, invalidate)
+        self.replika.utfør(query, params)
+
+    def insert_kunde(self, Fornavn, Etternavn, Adresse, Postnr):
+        kNr = super().insert_kunde(Fornavn, Etternavn, Adresse, Postnr)
+        self.replika.lagre("kunde", ("KNr", "Fornavn", "Etternavn", "Adresse", "PostNr", "is_active"), [(kNr, Fornavn, Etternavn, Adresse, Postnr, 1)])
+        return kNr
+
+    def insert_kunder(self, rader):
+        rader = [tuple(rad) for rad in rader]
+        kNumre = super().insert_kunder(rader)
+        self.replika.lagre("kunde", ("KNr", "Fornavn", "Etternavn", "Adresse", "PostNr", "is_active"), [(kNr,) + rad + (1,) for kNr, rad in zip(kNumre, rader)])
+        return kNumre
+
+    def insert_varer(self, rader):
+        rader = [tuple(rad) for rad in rader]
+        antall = super().insert_varer(rader)
+        self.replika.lagre("vare", ("VNr", "Betegnelse", "Pris", "KatNr", "Antall", "Hylle"), rader)
+        return antall
+
+    def replika_stats(self):
+        return self.replika.get_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synker den lokale SQLite-replikaen fra MySQL.")
+    parser.add_argument("fil", nargs="?", default=REPLIKA_FIL, help="SQLite-filen (standard: LOKAL_REPLIKA i .env)")
+    parser.add_argument("--løkke", action="store_true", help="fortsett å synke hvert SYNK_SEKUNDER til Ctrl+C")
+    args = parser.parse_args()
+    if not args.fil:
+        parser.error("oppgi filen eller sett LOKAL_REPLIKA i .env")
+
+    replika = Replika(args.fil, Database(pooled=True))
+    while True:
+        synk = replika.synk()
+        tabeller = ", ".join(f"{tabell} {antall}" for tabell, antall in synk["per_tabell"].items())
+        print(f"{synk['tid']:%H:%M:%S}  {synk['rader']:8} rader ({tabeller}), {synk['slettet']} slettet, {synk['sekunder']:.2f} s")
+        if not args.løkke:
+            break
+        time.sleep(SYNK_SEKUNDER)
+
+
+if __name__ == "__main__":
+    main()
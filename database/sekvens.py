@@ -0,0 +1,66 @@
+# database/sekvens.py
+# Tildeling av nye nøkler (f.eks. KNr) fra en sekvenstabell
+# ----------------------------------------------
+# I stedet for SELECT MAX(KNr) + 1, som gir like numre når flere legger inn kunder samtidig,
+# reserverer hver prosess en blokk med numre i én UPDATE:
+#   UPDATE sekvens SET neste = LAST_INSERT_ID(neste + n) WHERE navn = 'kunde'
+# UPDATE låser raden, så to klienter kan aldri få samme blokk, og LAST_INSERT_ID(...) gjør at den
+# nye verdien kommer tilbake i svaret (cursor.lastrowid) uten en ekstra SELECT. Numrene i blokken
+# deles så ut fra minnet til blokken er brukt opp. Numre i en blokk som ikke blir brukt (f.eks. når
+# programmet avsluttes) hoppes over, det er greit for et kundenummer.
+# Tabellen lages av database/migrations.py.
+
+import threading
+
+BLOKK = 20                      # Antall numre som reserveres om gangen
+
+
+class Sekvens:
+    def __init__(self, navn, blokk=BLOKK):
+        self.navn = navn                        # Navnet på raden i sekvenstabellen, f.eks. "kunde"
+        self.blokk = blokk                      # Minste antall numre vi reserverer om gangen
+        self._neste = 0                         # Neste ledige nummer i blokken vi har
+        self._slutt = 0                         # Første nummer etter blokken
+        self._lås = threading.Lock()            # Trådene i prosessen deler blokken
+        self.stats = {"tildelt": 0, "reservasjoner": 0}     # Tellere, viser hvor sjelden databasen spørres
+
+    #Returnerer "antall" nye numre i stigende rekkefølge. db er en åpen tilkobling som brukes hvis en ny blokk trengs.
+    def neste(self, db, antall=1):
+        with self._lås:
+            numre = list(range(self._neste, min(self._neste + antall, self._slutt)))   # Det som er igjen av blokken vi har
+            mangler = antall - len(numre)
+            if mangler > 0:                                                             # Trenger en ny blokk
+                start = self._reserver(db, max(mangler, self.blokk))
+                numre.extend(range(start, start + mangler))
+                self._neste = start + mangler
+            else:
+                self._neste += antall
+            self.stats["tildelt"] += antall
+            return numre
+
+    #Reserverer n numre og returnerer det første. Reservasjonen bekreftes med en gang, uavhengig av hva som skjer etterpå.
+    def _reserver(self, db, n):
+        cursor = db.cursor()
+        try:
+            cursor.execute("UPDATE sekvens SET neste = LAST_INSERT_ID(neste + %s) WHERE navn = %s", (n, self.navn))
+            if cursor.rowcount != 1:                                                    # Raden finnes ikke
+                raise RuntimeError(f"Sekvensen '{self.navn}' finnes ikke, kjør python -m database.migrations")
+            slutt = cursor.lastrowid                                                    # Verdien fra LAST_INSERT_ID(neste + n)
+            db.commit()                                                                 # Låsen på raden slippes med en gang
+        finally:
+            cursor.close()
+        self._slutt = slutt
+        self.stats["reservasjoner"] += 1
+        return slutt - n
+
+
+_sekvenser = {}                 # Én sekvens per navn i hele prosessen
+_sekvenser_lås = threading.Lock()
+
+
+#Henter den delte sekvensen med dette navnet, eller lager den første gang
+def get_sekvens(navn, blokk=BLOKK):
+    with _sekvenser_lås:
+        if navn not in _sekvenser:
+            _sekvenser[navn] = Sekvens(navn, blokk)
+        return _sekvenser[navn]
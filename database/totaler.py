@@ -0,0 +1,154 @@
+# database/totaler.py
+# Fakturatotaler i hele øre
+# ----------------------------------------------
+# Regner ut linjesummer, netto, MVA og brutto uten avrundingsfeil. Alle beløp regnes i hele øre (heltall), så summen
+# av linjene blir nøyaktig den samme som SUM(PrisPrEnhet * Antall) i databasen (DECIMAL). MVA regnes én gang per sats
+# av summen for satsen, og rundes av til nærmeste øre (halve øre opp).
+# Hver vare kan ha sin egen MVA-sats etter kategori (KatNr), satt i .env:
+#   MVA_SATSER=3:0.15,7:0.12        KatNr 3 har 15 %, KatNr 7 har 12 %, resten har 25 %
+#
+# Ordrelinjene leses i samme format som PDFGenerator: (OrdreNr, VNr, PrisPrEnhet, Antall, Betegnelse[, KatNr]).
+# Bruk:
+#   totaler = beregn(ordrelinjer)                   én faktura
+#   alle = beregn_mange(linjer_per_ordre)           mange fakturaer i én gjennomgang, {OrdreNr: Totaler}
+
+import os
+from itertools import groupby
+from operator import itemgetter
+from decimal import Decimal, ROUND_HALF_UP
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STANDARD_SATS = Decimal("0.25")                                             #25 % MVA for varer uten egen sats
+HUNDRE = Decimal(100)                                                       #Pris * HUNDRE slipper å gjøre om 100 til Decimal for hver linje
+
+
+#Leser "3:0.15,7:0.12" til {3: Decimal("0.15"), 7: Decimal("0.12")}
+def les_satser(tekst):
+    satser = {}
+    for del_ in (tekst or "").split(","):
+        if del_.strip():
+            katnr, sats = del_.split(":")
+            satser[int(katnr)] = Decimal(sats.strip())
+    return satser
+
+
+MVA_SATSER = les_satser(os.getenv("MVA_SATSER"))                            #KatNr -> sats for varer som ikke har standard sats
+
+
+#Gjør om et beløp i kroner (Decimal, int, str eller float) til hele øre
+def til_øre(beløp):
+    if type(beløp) is not Decimal:                                          #Decimal fra databasen er det vanlige, sjekkes først
+        if isinstance(beløp, int):
+            return beløp * 100
+        beløp = Decimal(str(beløp))                                         #str() så 0.1 blir 0.1 og ikke 0.1000000000000000055
+    return int((beløp * HUNDRE).to_integral_value(ROUND_HALF_UP))
+
+
+#Gjør om øre til kroner med to desimaler
+def til_kroner(øre):
+    return Decimal(øre).scaleb(-2)
+
+
+#MVA for et grunnlag i øre, avrundet til nærmeste øre
+def mva_av(grunnlag_øre, sats):
+    return int((grunnlag_øre * sats).to_integral_value(ROUND_HALF_UP))
+
+
+class Totaler:
+    __slots__ = ("linjesummer", "netto_øre", "grunnlag")
+
+    def __init__(self, linjesummer, netto_øre, grunnlag):
+        self.linjesummer = linjesummer          # Summen for hver linje i øre, i samme rekkefølge som linjene
+        self.netto_øre = netto_øre              # Summen av alle linjene i øre
+        self.grunnlag = grunnlag                # Sats -> netto i øre for linjene med den satsen
+
+    #[(sats, grunnlag i kroner, MVA i kroner)], høyeste sats først
+    @property
+    def per_sats(self):
+        return [(sats, til_kroner(grunnlag), til_kroner(mva_av(grunnlag, sats))) for sats, grunnlag in sorted(self.grunnlag.items(), reverse=True)]
+
+    @property
+    def mva_øre(self):
+        return sum(mva_av(grunnlag, sats) for sats, grunnlag in self.grunnlag.items())
+
+    @property
+    def netto(self):
+        return til_kroner(self.netto_øre)
+
+    @property
+    def mva(self):
+        return til_kroner(self.mva_øre)
+
+    @property
+    def brutto(self):
+        return til_kroner(self.netto_øre + self.mva_øre)
+
+    #Legger totalene for flere linjer til disse (ikke linjesummene), brukes når en stor faktura lages side for side
+    def legg_til(self, andre):
+        self.netto_øre += andre.netto_øre
+        for sats, grunnlag in andre.grunnlag.items():
+            self.grunnlag[sats] = self.grunnlag.get(sats, 0) + grunnlag
+        return self
+
+    def __iter__(self):                                                     #netto, mva, brutto = totaler
+        return iter((self.netto, self.mva, self.brutto))
+
+    def __repr__(self):
+        return f"Totaler(netto={self.netto}, mva={self.mva}, brutto={self.brutto})"
+
+
+#Satsen for en linje, etter KatNr hvis linjen har den
+def sats_for(linje, satser=None):
+    satser = MVA_SATSER if satser is None else satser
+    return satser.get(linje[5], STANDARD_SATS) if len(linje) > 5 and linje[5] is not None else STANDARD_SATS
+
+
+#Totalene for én faktura, med én gjennomgang av linjene
+def beregn(ordrelinjer, satser=None):
+    satser = MVA_SATSER if satser is None else satser
+    return _legg_til_linjer(Totaler([], 0, {}), ordrelinjer, satser)
+
+
+#Totalene for mange fakturaer på en gang. linjer er {OrdreNr: [ordrelinje, ...]} eller linjene for alle
+#ordrene etter hverandre (OrdreNr er første kolonne, f.eks. fra Database.stream_rows). Returnerer {OrdreNr: Totaler}.
+#Linjene gås gjennom én gang uten å samles i lister per ordre først; linjer for samme ordre som kommer
+#etter hverandre regnes som én gruppe, og kommer ordren igjen senere legges linjene til de samme totalene.
+def beregn_mange(linjer, satser=None):
+    satser = MVA_SATSER if satser is None else satser
+    grupper = linjer.items() if isinstance(linjer, dict) else groupby(linjer, itemgetter(0))
+    resultat = {}
+    for ordreNr, ordrelinjer in grupper:
+        totaler = resultat.get(ordreNr)
+        if totaler is None:
+            totaler = resultat[ordreNr] = Totaler([], 0, {})
+        _legg_til_linjer(totaler, ordrelinjer, satser)
+    return resultat
+
+
+#Legger linjesummene og grunnlaget for linjene til totaler. Uten egne satser summeres alt på standard sats
+#uten å se på KatNr.
+def _legg_til_linjer(totaler, ordrelinjer, satser):
+    summer = totaler.linjesummer
+    start = len(summer)
+    if satser:
+        grunnlag = totaler.grunnlag
+        for linje in ordrelinjer:
+            øre = til_øre(linje[2]) * int(linje[3])                         #Pris i øre ganger antall, helt nøyaktig
+            summer.append(øre)
+            sats = sats_for(linje, satser)
+            grunnlag[sats] = grunnlag.get(sats, 0) + øre
+        totaler.netto_øre += sum(summer[start:]) if start else sum(summer)
+        return totaler
+    summer.extend([til_øre(linje[2]) * int(linje[3]) for linje in ordrelinjer])
+    if len(summer) > start:
+        netto = sum(summer[start:]) if start else sum(summer)
+        totaler.netto_øre += netto
+        totaler.grunnlag[STANDARD_SATS] = totaler.grunnlag.get(STANDARD_SATS, 0) + netto
+    return totaler
+
+
+#"25 %" for en sats
+def prosent(sats):
+    return f"{(sats * 100).normalize():f} %"
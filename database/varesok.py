@@ -0,0 +1,77 @@
+# database/varesok.py
+# Fritekstsøk i varenavn
+# ----------------------------------------------
+# Betegnelse har en FULLTEXT-indeks (migrasjon 6), så søket slår opp ordene i indeksen i stedet for å lese hver rad
+# slik LIKE '%ord%' må. Søket kjøres i BOOLEAN MODE der hvert ord må finnes og kan være starten på et ord
+# ("skru" finner både "skrue" og "skrutrekker"), og treffene sorteres på relevans og deretter VNr.
+# Ord kortere enn MIN_ORD er ikke med i indeksen (innodb_ft_min_token_size). Består søket bare av slike ord,
+# søkes det i stedet på starten av Betegnelse.
+# De mest brukte søkene holdes i en egen LRU-cache, så et populært søk ikke går til databasen hver gang.
+#
+# Bruk:
+#   vare_søk = VareSøk(db)
+#   vare_søk.søk("skrue 50mm", grense=20, start=0)      # [VareTreff(VNr, Betegnelse, Pris, Antall, Relevans)]
+
+import re
+from database.cache import QueryCache
+from database.queries import definer
+
+MIN_ORD = 3                     # Korteste ord i FULLTEXT-indeksen (innodb_ft_min_token_size)
+STANDARD_GRENSE = 50            # Antall treff hvis ikke annet er sagt
+CACHE_STØRRELSE = 256           # Maks antall søk i LRU-cachen
+CACHE_TTL = 30                  # Sekunder et søkeresultat kan brukes
+
+VARETREFF_KOLONNER = ("VNr", "Betegnelse", "Pris", "Antall", "Relevans")
+
+ORD = re.compile(r"\w+")        # Operatorene i BOOLEAN MODE (+ - * " osv.) fjernes, bare ordene brukes
+
+definer(
+    "vare_sok",
+    "SELECT VNr, Betegnelse, Pris, Antall, MATCH(Betegnelse) AGAINST (%s IN BOOLEAN MODE) AS Relevans FROM vare "
+    "WHERE MATCH(Betegnelse) AGAINST (%s IN BOOLEAN MODE) ORDER BY Relevans DESC, VNr LIMIT %s OFFSET %s",
+    VARETREFF_KOLONNER, "VareTreff",
+)
+definer(                                                    # Søk med bare korte ord, på starten av varenavnet
+    "vare_sok_start",
+    "SELECT VNr, Betegnelse, Pris, Antall, 0 AS Relevans FROM vare WHERE Betegnelse LIKE %s ORDER BY VNr LIMIT %s OFFSET %s",
+    VARETREFF_KOLONNER, "VareTreff",
+)
+
+
+#Spørringen og parameterne for et søk, (None, ()) hvis søket ikke har noen ord
+def spørring_for(tekst, grense=STANDARD_GRENSE, start=0):
+    ordene = ORD.findall(tekst.casefold())
+    lange = [ord for ord in ordene if len(ord) >= MIN_ORD]
+    if lange:
+        uttrykk = " ".join(f"+{ord}*" for ord in lange)     # Alle ordene må finnes, * gir treff på ord som starter med dette
+        return "vare_sok", (uttrykk, uttrykk, grense, start)
+    if ordene:
+        starten = " ".join(ordene).replace("_", "\\_")      # _ er jokertegn i LIKE
+        return "vare_sok_start", (starten + "%", grense, start)
+    return None, ()
+
+
+class VareSøk:
+    def __init__(self, db, størrelse=CACHE_STØRRELSE, levetid=CACHE_TTL):
+        self.db = db                                        # Database søket kjøres mot
+        self.cache = QueryCache(max_entries=størrelse, ttl=levetid)     # Egen LRU for søkene, så de ikke skyver ut andre spørringer
+
+    #Treffene for søket, de mest relevante først. versjon (f.eks. endringsmerket for vare-tabellen) er med i
+    #nøkkelen i cachen, så et nytt merke gir nye svar med en gang.
+    def søk(self, tekst, grense=STANDARD_GRENSE, start=0, versjon=None):
+        navn, params = spørring_for(tekst, grense, start)
+        if navn is None:
+            return []
+        nøkkel = QueryCache.key(navn, params + (versjon,))
+        rader = self.cache.get(nøkkel)
+        if rader is None:
+            rader = self.db.query(navn, params)
+            self.cache.put(nøkkel, rader, ("vare",))
+        return rader
+
+    #Glemmer alle søkene, f.eks. når varetabellen er endret
+    def tøm(self):
+        self.cache.clear()
+
+    def get_stats(self):
+        return self.cache.get_stats()
@@ -0,0 +1,116 @@
+#Eksporterer ordrer, ordrelinjer og varer til CSV eller NDJSON
+#Radene leses med en ubufret cursor (Database.stream_rows) og skrives ut bolk for bolk fra en generator,
+#så minnebruken er den samme for tusen som for millioner av rader, og de første bytene sendes med en gang.
+#Brukes både fra terminalen og av /api/export/<tabell>.<format> i app.py.
+#
+#Formater:
+#   csv    komma mellom feltene, punktum som desimaltegn
+#   excel  CSV som norsk Excel åpner direkte: BOM først og semikolon mellom feltene
+#   ndjson ett JSON-objekt per linje
+#
+#Bruk fra terminalen:
+#   python eksport.py ordrelinje --format excel -o ordrelinjer.csv
+#   python eksport.py vare --format ndjson > varer.ndjson
+
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from database.database_program_staticmethod import Database
+
+BOLK = 1000                                                                 #Rader som skrives ut i hver bit fra generatoren
+
+EKSPORTER = {                                                               #Spørring og kolonnenavn for hver tabell som kan eksporteres
+    "ordre": (
+        "SELECT OrdreNr, OrdreDato, SendtDato, BetaltDato, KNr FROM ordre ORDER BY OrdreNr",
+        ("OrdreNr", "OrdreDato", "SendtDato", "BetaltDato", "KNr"),
+    ),
+    "ordrelinje": (
+        "SELECT ordrelinje.OrdreNr, ordrelinje.VNr, vare.Betegnelse, ordrelinje.PrisPrEnhet, ordrelinje.Antall "
+        "FROM ordrelinje JOIN vare ON ordrelinje.VNr = vare.VNr ORDER BY ordrelinje.OrdreNr, ordrelinje.VNr",
+        ("OrdreNr", "VNr", "Betegnelse", "PrisPrEnhet", "Antall"),
+    ),
+    "vare": (
+        "SELECT VNr, Betegnelse, Pris, KatNr, Antall, Hylle FROM vare ORDER BY VNr",
+        ("VNr", "Betegnelse", "Pris", "KatNr", "Antall", "Hylle"),
+    ),
+}
+
+FORMATER = {                                                                #Filendelse og MIME-type for hvert format
+    "csv": ("csv", "text/csv; charset=utf-8"),
+    "excel": ("csv", "text/csv; charset=utf-8"),
+    "ndjson": ("ndjson", "application/x-ndjson"),
+}
+
+
+#Gjør om en verdi fra databasen til tekst (datoer som 2025-01-31, Decimal uten avrunding, NULL som tomt felt)
+def til_tekst(verdi):
+    if verdi is None:
+        return ""
+    if hasattr(verdi, "isoformat"):
+        return verdi.isoformat()
+    return str(verdi)
+
+
+#Gir eksporten som tekstbiter, én bit per BOLK rader. teller["rader"] oppdateres underveis.
+def eksporter(tabell, format="csv", db=None, teller=None):
+    if tabell not in EKSPORTER:
+        raise ValueError(f"Kan ikke eksportere {tabell}, velg en av {', '.join(EKSPORTER)}")
+    if format not in FORMATER:
+        raise ValueError(f"Ukjent format {format}, velg en av {', '.join(FORMATER)}")
+    db = db or Database(pooled=True)
+    spørring, kolonner = EKSPORTER[tabell]
+    teller = teller if teller is not None else {}
+    teller["rader"] = 0
+
+    buffer = io.StringIO()
+    if format == "ndjson":
+        skriv = lambda rad: buffer.write(json.dumps(dict(zip(kolonner, map(til_tekst, rad))), ensure_ascii=False) + "\n")
+    else:
+        skriver = csv.writer(buffer, delimiter=";" if format == "excel" else ",", lineterminator="\r\n")
+        skriv = lambda rad: skriver.writerow(map(til_tekst, rad))
+        if format == "excel":
+            buffer.write("\ufeff")                                          #BOM, så Excel leser filen som UTF-8 (æøå)
+        skriver.writerow(kolonner)
+        yield buffer.getvalue()                                             #Overskriften sendes før første spørring er ferdig
+        buffer.seek(0)
+        buffer.truncate()
+
+    antall = 0
+    for rad in db.stream_rows(spørring):
+        skriv(rad)
+        antall += 1
+        if antall % BOLK == 0:                                              #Sender en bit og tømmer bufferen
+            teller["rader"] = antall
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    teller["rader"] = antall
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eksporterer ordrer, ordrelinjer eller varer.")
+    parser.add_argument("tabell", choices=sorted(EKSPORTER), help="hva som skal eksporteres")
+    parser.add_argument("--format", choices=sorted(FORMATER), default="csv", help="csv, excel (semikolon og BOM) eller ndjson")
+    parser.add_argument("-o", "--fil", help="filen eksporten skrives til (standard: skjermen)")
+    args = parser.parse_args()
+
+    teller = {}
+    start = time.perf_counter()
+    ut = open(args.fil, "w", newline="", encoding="utf-8") if args.fil else sys.stdout
+    try:
+        for bit in eksporter(args.tabell, args.format, teller=teller):
+            ut.write(bit)
+    finally:
+        if args.fil:
+            ut.close()
+    sekunder = time.perf_counter() - start
+    print(f"Eksporterte {teller['rader']} rader fra {args.tabell} på {sekunder:.2f} s ({teller['rader'] / max(sekunder, 1e-9):.0f} rader/s)", file=sys.stderr)  #stderr, så det ikke havner i eksporten
+
+
+if __name__ == "__main__":
+    main()
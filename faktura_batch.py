@@ -0,0 +1,127 @@
+#Lager fakturaer for mange ordrer på en gang, f.eks. ved månedsslutt
+#Henter ordrer, ordrelinjer og kunder med noen få spørringer (WHERE ... IN), lagrer alle fakturaene
+#i én INSERT, og lager PDF-ene parallelt i flere prosesser.
+#
+#Bruk fra terminalen:
+#   python faktura_batch.py 1001-1500 1733 --mappe fakturaer --prosesser 4
+#Bruk fra kode:
+#   from faktura_batch import lag_fakturaer
+#   rapport = lag_fakturaer(range(1001, 1501))
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from database.database_program_staticmethod import Database
+from database.totaler import beregn_mange
+from pdf_generator import PDFGenerator
+
+BOLK = 1000                                                                 #Maks antall ordrenumre i én IN (...)-liste
+
+
+#Gjør om "1001-1500" og "1733" til en sortert liste med ordrenumre
+def les_ordrenumre(argumenter):
+    ordrenumre = set()
+    for argument in argumenter:
+        if "-" in argument:                                                 #Et intervall, begge ender tas med
+            fra, til = argument.split("-", 1)
+            ordrenumre.update(range(int(fra), int(til) + 1))
+        else:
+            ordrenumre.add(int(argument))
+    return sorted(ordrenumre)
+
+
+#Deler en liste opp i biter på maks "størrelse" elementer
+def i_bolker(liste, størrelse=BOLK):
+    for i in range(0, len(liste), størrelse):
+        yield liste[i:i + størrelse]
+
+
+#Henter ordrer, ordrelinjer og kunder for alle ordrenumrene med tre spørringer per bolk
+def hent_fakturadata(db, ordrenumre):
+    ordrer, linjer, kunder = {}, {}, {}
+    for bolk in i_bolker(list(ordrenumre)):
+        for ordre in db.query("ordrer_in", bolk):                           #%s for hvert ordrenummer, beskyttet mot SQL-injeksjon
+            ordrer[ordre.OrdreNr] = ordre
+        for linje in db.query("fakturalinjer_in", bolk):
+            linjer.setdefault(linje.OrdreNr, []).append(linje)              #Samme kolonner som printPdf henter for én ordre
+    kundenumre = sorted({ordre.KNr for ordre in ordrer.values()})           #Hver kunde hentes bare én gang
+    for bolk in i_bolker(kundenumre):
+        for kunde in db.query("kunder_in", bolk):
+            kunder[kunde.KNr] = kunde
+    return ordrer, linjer, kunder
+
+
+#Kjøres i en egen prosess, lager én PDF
+def _lag_pdf(ordre, ordrelinjer, kunde, faktura_nummer, mappe, totaler=None):
+    pdf_filename = os.path.join(mappe, f"faktura_{faktura_nummer}.pdf")
+    PDFGenerator().build_invoice(ordre, ordrelinjer, kunde, faktura_nummer, pdf_filename, totaler)  #Feil sendes tilbake til hovedprosessen
+    return pdf_filename
+
+
+#Lager fakturaer for alle ordrenumrene og returnerer en rapport med tider og feil per ordre
+def lag_fakturaer(ordrenumre, db=None, mappe="fakturaer", prosesser=None):
+    db = db or Database(pooled=True)
+    os.makedirs(mappe, exist_ok=True)                                       #Lager mappen hvis den ikke finnes
+    ordrenumre = sorted(set(int(ordreNr) for ordreNr in ordrenumre))
+    start = time.perf_counter()
+    feil = {}                                                               #{ordreNr: feilmelding}
+
+    ordrer, linjer, kunder = hent_fakturadata(db, ordrenumre)
+    totaler = beregn_mange(linjer)                                          #Totalene for alle fakturaene i én gjennomgang, i hele øre
+    klare = []                                                              #Ordrer vi har alt vi trenger for
+    for ordreNr in ordrenumre:
+        ordre = ordrer.get(ordreNr)
+        if ordre is None:
+            feil[ordreNr] = "Ordren finnes ikke"
+        elif ordre.KNr not in kunder:
+            feil[ordreNr] = f"Kunde {ordre.KNr} finnes ikke"
+        elif ordreNr not in linjer:
+            feil[ordreNr] = "Ordren har ingen ordrelinjer"
+        else:
+            klare.append(ordre)
+    hentet = time.perf_counter()
+
+    faktura_ider = {}
+    for bolk in i_bolker(klare):                                            #Én INSERT per bolk i stedet for én per faktura
+        faktura_ider.update(db.insert_fakturaer([(ordre.OrdreNr, ordre.KNr) for ordre in bolk]))
+    lagret = time.perf_counter()
+
+    filer = {}                                                              #{ordreNr: filnavn}
+    with ProcessPoolExecutor(max_workers=prosesser) as pool:                #PDF-ene lages på alle kjernene
+        jobber = {pool.submit(_lag_pdf, ordre, linjer[ordre.OrdreNr], kunder[ordre.KNr], faktura_ider[ordre.OrdreNr], mappe, totaler[ordre.OrdreNr]): ordre.OrdreNr for ordre in klare}
+        for jobb in as_completed(jobber):
+            ordreNr = jobber[jobb]
+            try:
+                filer[ordreNr] = jobb.result()
+            except Exception as e:                                          #Fakturaen er lagret, men PDF-en feilet
+                feil[ordreNr] = f"PDF feilet for faktura {faktura_ider[ordreNr]}: {e}"
+    ferdig = time.perf_counter()
+
+    return {
+        "fakturaer": filer,
+        "feil": feil,
+        "sekunder_henting": hentet - start,
+        "sekunder_lagring": lagret - hentet,
+        "sekunder_pdf": ferdig - lagret,
+        "sekunder_totalt": ferdig - start,
+        "fakturaer_per_sekund": len(filer) / (ferdig - start) if ferdig > start else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lager fakturaer for mange ordrer på en gang.")
+    parser.add_argument("ordrenumre", nargs="+", help="ordrenumre eller intervaller, f.eks. 1001-1500 1733")
+    parser.add_argument("--mappe", default="fakturaer", help="mappen PDF-ene lagres i")
+    parser.add_argument("--prosesser", type=int, default=None, help="antall prosesser (standard: antall kjerner)")
+    args = parser.parse_args()
+
+    rapport = lag_fakturaer(les_ordrenumre(args.ordrenumre), mappe=args.mappe, prosesser=args.prosesser)
+    print(f"Laget {len(rapport['fakturaer'])} fakturaer på {rapport['sekunder_totalt']:.2f} s ({rapport['fakturaer_per_sekund']:.1f} fakturaer/s)")
+    print(f"  henting {rapport['sekunder_henting']:.2f} s, lagring {rapport['sekunder_lagring']:.2f} s, PDF {rapport['sekunder_pdf']:.2f} s")
+    for ordreNr, melding in sorted(rapport["feil"].items()):
+        print(f"  Ordre {ordreNr}: {melding}")
+
+
+if __name__ == "__main__":
+    main()
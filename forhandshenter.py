@@ -0,0 +1,155 @@
+#Henter data for rader i et Treeview før brukeren åpner dem
+#Når en rad velges (klikk eller piltaster) hentes detaljene for raden og naboene i bakgrunnen, og når musen
+#blir stående over en rad hentes den raden. Svarene legges i en liten cache (LRU med levetid), så
+#detaljvinduet åpnes med en gang. Hentingen er stille: den viser ikke opptatt-indikatoren og feil vises ikke,
+#siden brukeren ikke har bedt om noe ennå. Åpner brukeren en rad som er under henting, vises den når svaret kommer.
+#
+#Bruk:
+#   forhånd = ForhåndsHenter(bakgrunn, db.ordre_detaljer)
+#   forhånd.koble(tree)                                 #<<TreeviewSelect>> og musebevegelser
+#   forhånd.hent(ordreNr, ferdig=visDetaljer)           #fra cachen hvis den finnes, ellers fra databasen
+
+import time
+from collections import OrderedDict
+
+STØRRELSE = 50                                                              #Maks antall rader i cachen
+NABOER = 2                                                                  #Rader over og under den valgte som også hentes
+LEVETID = 30                                                                #Sekunder et svar kan brukes, så endringer fra andre maskiner kommer med
+LEDIGE_TRÅDER = 2                                                           #Bakgrunnstråder som alltid holdes ledige for det brukeren ber om
+HOVER_MS = 150                                                              #Hvor lenge musen må stå over en rad før den hentes
+
+
+class ForhåndsHenter:
+    def __init__(self, bakgrunn, hent, størrelse=STØRRELSE, naboer=NABOER, levetid=LEVETID):
+        self.bakgrunn = bakgrunn                                            #Bakgrunn som kjører hentingen
+        self.hent_funksjon = hent                                           #hent(nøkkel) gir detaljene, kjøres i en bakgrunnstråd
+        self.størrelse = størrelse
+        self.naboer = naboer
+        self.levetid = levetid
+        self.maks_underveis = max(1, bakgrunn.antall_tråder - LEDIGE_TRÅDER)  #Maks samtidige hentinger, så de ikke står i veien for et ekte klikk
+        self._cache = OrderedDict()                                         #Nøkkel -> (utløper, detaljer, brukt), sist brukte sist
+        self._underveis = set()                                             #Nøkler som hentes nå
+        self._venter = None                                                 #(nøkkel, ferdig) for en rad brukeren åpnet mens den ble hentet
+        self._hover = None                                                  #after-id for hover-hentingen
+        self._hover_rad = None
+        self.stats = {"treff": 0, "bom": 0, "treff_underveis": 0, "hentet": 0, "ubrukt": 0}  #Tellere for treffraten
+
+    #Kobler til et Treeview. nøkkel_indeks er kolonnen med nøkkelen (f.eks. OrdreNr).
+    def koble(self, tree, nøkkel_indeks=0):
+        nøkkel = lambda iid: tree.item(iid, "values")[nøkkel_indeks] if tree.item(iid, "values") else None
+        tree.bind("<<TreeviewSelect>>", lambda _: self._valgt(tree, nøkkel), add="+")
+        tree.bind("<Motion>", lambda e: self._musFlyttet(tree, nøkkel, e), add="+")
+        tree.bind("<Leave>", lambda _: self._avbrytHover(tree), add="+")
+
+    #Gir detaljene til ferdig(detaljer), fra cachen uten å vente hvis de finnes
+    def hent(self, nøkkel, ferdig):
+        funnet, detaljer = self._fraCache(nøkkel)
+        if funnet:
+            self.stats["treff"] += 1
+            ferdig(detaljer)
+            return
+        if nøkkel in self._underveis:                                       #Hentes allerede, vises når svaret kommer
+            self.stats["treff_underveis"] += 1
+            self._venter = (nøkkel, ferdig)
+            return
+        self.stats["bom"] += 1
+        self._venter = None
+        self.bakgrunn.kjør(self.hent_funksjon, nøkkel, ferdig=lambda detaljer: (self._lagre(nøkkel, detaljer), ferdig(detaljer)), nøkkel=id(self))  #Et nytt klikk erstatter det forrige
+
+    #Detaljene hvis de ligger i cachen, ellers None. Teller ikke med i treffraten.
+    def fraCache(self, nøkkel):
+        return self._fraCache(nøkkel)[1]
+
+    #Henter nøklene i bakgrunnen hvis de ikke allerede er i cachen eller hentes
+    def forhåndshent(self, nøkler):
+        for nøkkel in nøkler:
+            if nøkkel is None or nøkkel in self._underveis or self._fraCache(nøkkel, merk=False)[0]:
+                continue
+            if len(self._underveis) >= self.maks_underveis:
+                break
+            self._underveis.add(nøkkel)
+            self.bakgrunn.kjør(self._hentStille, nøkkel, ferdig=lambda svar, n=nøkkel: self._forhåndshentet(n, svar), stille=True)
+
+    #Tømmer cachen, f.eks. etter at en kunde er endret
+    def tøm(self):
+        self.stats["ubrukt"] += sum(1 for _, (_, _, brukt) in self._cache.items() if not brukt)
+        self._cache.clear()
+
+    #Tellerne og treffraten (andel åpninger som ikke måtte vente på databasen)
+    def get_stats(self):
+        stats = dict(self.stats)
+        åpnet = stats["treff"] + stats["treff_underveis"] + stats["bom"]
+        stats["treffrate"] = (stats["treff"] + stats["treff_underveis"]) / åpnet if åpnet else 0.0
+        stats["i_cache"] = len(self._cache)
+        return stats
+
+    def _hentStille(self, nøkkel):                                          #Kjøres i bakgrunnstråd, feil gir bare ingen forhåndshenting
+        try:
+            return True, self.hent_funksjon(nøkkel)
+        except Exception:
+            return False, None
+
+    def _forhåndshentet(self, nøkkel, svar):                                #Kjøres i hovedtråden
+        self._underveis.discard(nøkkel)
+        ok, detaljer = svar
+        if ok:
+            self.stats["hentet"] += 1
+            self._lagre(nøkkel, detaljer, brukt=False)
+        if self._venter is not None and self._venter[0] == nøkkel:          #Brukeren har åpnet raden mens den ble hentet
+            _, ferdig = self._venter
+            self._venter = None
+            if ok:
+                self._merkBrukt(nøkkel)
+                ferdig(detaljer)
+            else:                                                           #Prøver på nytt, nå med vanlig feilmelding
+                self.stats["treff_underveis"] -= 1
+                self.hent(nøkkel, ferdig)
+
+    def _fraCache(self, nøkkel, merk=True):                                 #merk=False teller ikke som bruk (sjekk før forhåndshenting)
+        oppføring = self._cache.get(nøkkel)
+        if oppføring is None:
+            return False, None
+        utløper, detaljer, _ = oppføring
+        if utløper < time.monotonic():                                      #For gammel
+            del self._cache[nøkkel]
+            return False, None
+        if merk:
+            self._merkBrukt(nøkkel)
+        return True, detaljer
+
+    def _merkBrukt(self, nøkkel):
+        utløper, detaljer, _ = self._cache[nøkkel]
+        self._cache[nøkkel] = (utløper, detaljer, True)
+        self._cache.move_to_end(nøkkel)
+
+    def _lagre(self, nøkkel, detaljer, brukt=True):
+        self._cache[nøkkel] = (time.monotonic() + self.levetid, detaljer, brukt)
+        self._cache.move_to_end(nøkkel)
+        while len(self._cache) > self.størrelse:                            #Fjerner det som er brukt minst nylig
+            _, (_, _, var_brukt) = self._cache.popitem(last=False)
+            self.stats["ubrukt"] += not var_brukt
+
+    def _valgt(self, tree, nøkkel):                                         #Den valgte raden først, deretter naboene nærmest først
+        valgt = tree.selection()
+        if not valgt:
+            return
+        rader, forrige, neste = [valgt[0]], valgt[0], valgt[0]
+        for _ in range(self.naboer):
+            neste = tree.next(neste) if neste else ""
+            forrige = tree.prev(forrige) if forrige else ""
+            rader += [rad for rad in (neste, forrige) if rad]               #Piltastene går oftest nedover, så neste kommer først
+        self.forhåndshent([nøkkel(rad) for rad in rader])
+
+    def _musFlyttet(self, tree, nøkkel, event):                             #Henter raden musen blir stående over
+        rad = tree.identify_row(event.y)
+        if rad == self._hover_rad:
+            return
+        self._avbrytHover(tree)
+        self._hover_rad = rad
+        if rad:
+            self._hover = tree.after(HOVER_MS, lambda: self.forhåndshent([nøkkel(rad)]) if tree.exists(rad) else None)
+
+    def _avbrytHover(self, tree):
+        if self._hover is not None:
+            tree.after_cancel(self._hover)
+        self._hover, self._hover_rad = None, None
@@ -0,0 +1,77 @@
+#Måler hvor lang tid det tar å starte GUI-et: importene, tiden til vinduet vises og tiden til første side med ordrer
+#Importene måles ved å pakke inn __import__ mens Program.py importerer, slik python -X importtime gjør. Tiden for en
+#modul er med alt den selv importerer, og bare første import av en modul tar tid (senere kommer den fra sys.modules).
+#Tidene regnes fra Oppstartsprofil lages øverst i Program.py, oppstarten av selve Python er ikke med.
+#
+#Bruk:
+#   python Program.py --profile-startup
+#
+#   profil = Oppstartsprofil()
+#   profil.mål_importer()
+#   ...importer...
+#   profil.stopp_importer()
+#   profil.merk("vindu vist")
+#   print(profil.rapport())
+
+import builtins
+import sys
+import time
+
+ANTALL_TREGESTE = 10                                                        #Moduler som vises i listen over de tregeste importene
+
+
+class Oppstartsprofil:
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.merker = []                                                    #(navn, tid) i rekkefølgen de skjedde
+        self.importer = {}                                                  #Modul -> (sekunder, nivå), nivå 0 er importene i Program.py
+        self._original = None                                               #__import__ før vi pakket den inn
+        self._nivå = 0
+
+    def mål_importer(self):                                                 #Måler alle importene fra nå av
+        if self._original is not None:
+            return
+        self._original = builtins.__import__
+
+        def importer(navn, globals=None, locals=None, fromlist=(), level=0):
+            if navn in sys.modules:                                         #"from pakke import modul" kan fortsatt laste en ny undermodul
+                nye = [f"{navn}.{del_}" for del_ in fromlist or () if f"{navn}.{del_}" not in sys.modules]
+            else:
+                nye = [navn]
+            if level or not nye:                                            #Allerede importert (eller relativ import), tar ingen tid å måle
+                return self._original(navn, globals, locals, fromlist, level)
+            nivå, start = self._nivå, time.perf_counter()
+            self._nivå += 1
+            try:
+                return self._original(navn, globals, locals, fromlist, level)
+            finally:
+                self._nivå -= 1
+                lastet = [modul for modul in nye if modul in sys.modules]   #Navn i fromlist som ikke er moduler (funksjoner, klasser) telles ikke
+                if lastet:
+                    self.importer.setdefault(", ".join(lastet), (time.perf_counter() - start, nivå))
+
+        builtins.__import__ = importer
+
+    def stopp_importer(self):
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+        self.merk("importer")
+
+    def merk(self, navn):                                                   #Husker når noe skjedde, bare første gang
+        if all(merke != navn for merke, _ in self.merker):
+            self.merker.append((navn, time.perf_counter()))
+
+    def rapport(self):
+        linjer = ["Oppstart (ms fra start av Program.py):"]
+        forrige = self.start
+        for navn, tid in self.merker:
+            linjer.append(f"  {navn:<28} {(tid - self.start) * 1000:8.1f}  (+{(tid - forrige) * 1000:.1f})")
+            forrige = tid
+        linjer.append("Importer i Program.py (ms, med det de selv importerer):")
+        for navn, (sekunder, _) in sorted(((navn, verdi) for navn, verdi in self.importer.items() if verdi[1] == 0), key=lambda m: -m[1][0]):
+            linjer.append(f"  {navn:<40} {sekunder * 1000:8.1f}")
+        linjer.append(f"De {ANTALL_TREGESTE} tregeste modulene:")
+        for navn, (sekunder, _) in sorted(self.importer.items(), key=lambda m: -m[1][0])[:ANTALL_TREGESTE]:
+            linjer.append(f"  {navn:<40} {sekunder * 1000:8.1f}")
+        return "\n".join(linjer)
@@ -1,22 +1,126 @@
 #importering av elementer for å lage PDF generatoren Reportlab
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, Spacer, Image  
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, Spacer, Flowable, PageBreak
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from PIL import Image                                                           #Skalerer logoen ned til størrelsen den skrives ut i (PIL følger med ReportLab)
+import io
 import os
+import pathlib
+import threading
+import webbrowser
+from itertools import islice
+from database.totaler import Totaler, beregn, til_kroner, til_øre, prosent    #Totalene regnes i hele øre, med MVA-sats per varekategori
+
+LOGO_PATH = r"static/logo.png"                                                  #Sti til logoen på fakturaen
+LOGO_PIKSLER = (300, 150)                                                       #Logoen tegnes 100 x 50 punkter, dette er ca. 216 dpi
+RAD_HØYDE = 16                                                                  #Høyden på hver rad i ordretabellen (punkter)
+LINJER_FØRSTE_SIDE = 30                                                         #Ordrelinjer på første side, under logoen og kundeinfoen
+LINJER_PER_SIDE = 38                                                            #Ordrelinjer på de andre sidene, så overskrift og sidesummer også får plass
+
+
+#Ressurser som er like for alle fakturaer: stilark, tabellstil og logoen ferdig skalert og komprimert.
+#Lages én gang per prosess og gjenbrukes, så hver faktura bare koster den delen som avhenger av data.
+class PDFRessurser:
+    def __init__(self, logo_path=LOGO_PATH):
+        self.logo_path = logo_path                                              #Hvor logoen leses fra
+        self.styles = getSampleStyleSheet()                                     #Styleelement (stil) med fonter osv i PDF-en
+        self.table_style = TableStyle([                                         #setter utseende på tabellen
+            ("GRID", (0, 0), (-1, -1), 1, colors.black),                        #setter stil på linje i tabell sort
+            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),                  #setter stil på bakgrunn (øverste rad) i tabell grå
+            ("ALIGN", (1, 1), (-1, -1), "CENTER"),                              #sentrerer og setter hvor ting skal være på skjermen
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold")                     #setter font helvetica-bold (innebygd font, trenger ikke registreres)
+        ])
+        self.sum_style = TableStyle([                                           #samme stil, med sidesummene nederst i fet skrift
+            ("FONTNAME", (0, -2), (-1, -1), "Helvetica-Bold"),
+            ("BACKGROUND", (0, -2), (-1, -1), colors.whitesmoke),
+        ], parent=self.table_style)
+        self.logo_jpeg = None                                                   #Logoen som JPEG-bytes i utskriftsstørrelsen
+        self.logo_mtime = None                                                  #Endringstidspunktet til logofilen da den ble lest
+        self._lås = threading.Lock()                                            #Bakgrunnstrådene i GUI-et kan lage fakturaer samtidig
+
+    def hent_logo(self):                                                        #Returnerer logoen, leser filen på nytt bare hvis den er endret
+        mtime = os.path.getmtime(self.logo_path)
+        with self._lås:
+            if self.logo_jpeg is None or mtime != self.logo_mtime:
+                self.logo_jpeg, self.logo_mtime = lag_logo(self.logo_path), mtime
+            jpeg = self.logo_jpeg
+        return ImageReader(io.BytesIO(jpeg))                                    #Egen leser per faktura, JPEG-bytene legges rett inn i PDF-en uten å komprimeres på nytt
+
+
+#Logoen skalert ned til LOGO_PIKSLER og lagt på hvit bakgrunn (som fakturaen) som JPEG.
+#Originalen er 1024 x 1024 RGBA, og ReportLab komprimerte og kodet alle pikslene på nytt for hver faktura.
+def lag_logo(sti, størrelse=LOGO_PIKSLER):
+    bilde = Image.open(sti).convert("RGBA").resize(størrelse, Image.LANCZOS)
+    hvit = Image.new("RGB", størrelse, "white")
+    hvit.paste(bilde, mask=bilde.getchannel("A"))                               #Gjennomsiktige piksler blir hvite
+    buffer = io.BytesIO()
+    hvit.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+_ressurser = None                                                               #Delte ressurser for denne prosessen
+_ressurser_lås = threading.Lock()
+
+
+def hent_ressurser():                                                           #Henter de delte ressursene, lager dem første gang
+    global _ressurser
+    with _ressurser_lås:
+        if _ressurser is None:
+            _ressurser = PDFRessurser()
+        return _ressurser
+
+
+def nullstill_ressurser():                                                      #Kaster de delte ressursene, brukes av benchmarken for å måle uten cache
+    global _ressurser
+    with _ressurser_lås:
+        _ressurser = None
+
+
+class Logo(Flowable):                                                           #Tegner den ferdig komprimerte logoen i stedet for å lese filen for hver faktura
+    def __init__(self, bilde, width, height):
+        Flowable.__init__(self)
+        self.bilde = bilde                                                      #ImageReader fra PDFRessurser.hent_logo
+        self.width = width                                                      #Bredde på bildet
+        self.height = height                                                    #Høyde på bildet
+
+    def wrap(self, availWidth, availHeight):                                    #Forteller ReportLab hvor mye plass logoen trenger
+        return self.width, self.height
+
+    def draw(self):                                                             #Tegner logoen
+        self.canv.drawImage(self.bilde, 0, 0, self.width, self.height, mask="auto")
 
 class PDFGenerator:                                                             #Klasse for PDF generering
-    def generate_invoice(self, ordre, ordrelinjer, kunde, faktura_nummer):      #Funksjon for å hente elementer til PDF-en
+    def generate_invoice(self, ordre, ordrelinjer, kunde, faktura_nummer, output_dir=None, open_file=True, totaler=None):  #Lager fakturaen som fil og åpner den, feil sendes videre til den som kaller
         pdf_filename = f"faktura_{faktura_nummer}.pdf"                          #lager navn på PDF dokumentet faktura_nummer.pdf
-        doc = SimpleDocTemplate(pdf_filename, pagesize=A4)                      #Setter maltype på dokumentet og setter størrelse
-        elements = []                                                           #Tom liste for strukturering i generatoren
-        styles = getSampleStyleSheet()                                          #Styleelement (stil) med fonter osv i PDF-en
-        logo_path = r"static/logo.png"                                          #Henter logo fra sti
-        img = Image(logo_path, width=100, height=50)                            #Setter høyde og bredde på bildet
+        if output_dir:                                                          #legger filen i en egen mappe hvis det er oppgitt
+            pdf_filename = os.path.join(output_dir, pdf_filename)
+        self.build_invoice(ordre, ordrelinjer, kunde, faktura_nummer, pdf_filename, totaler)                       #lager fil ut ifra elementer
+        if open_file:                                                                                              #batch-kjøring og bakgrunnstråder åpner ikke filene
+            åpne_fil(pdf_filename)                                                                                 #åpner filen som er laget
+        return pdf_filename                                                                                        #returnerer navnet på filen som ble laget
+
+    def render_invoice(self, ordre, ordrelinjer, kunde, faktura_nummer, buffer=None, totaler=None):  #Lager PDF-en i minnet (ingen fil) og returnerer innholdet som bytes
+        if buffer is None:                                                      #Bruker en ny BytesIO hvis den som kaller ikke har gitt en buffer
+            buffer = io.BytesIO()
+        self.build_invoice(ordre, ordrelinjer, kunde, faktura_nummer, buffer, totaler)  #ReportLab skriver direkte til bufferen
+        return buffer.getvalue()                                                #Returnerer PDF-en som bytes
+
+    def build_invoice(self, ordre, ordrelinjer, kunde, faktura_nummer, pdf_filename, totaler=None):  #Bygger PDF-en, feil sendes videre til den som kaller. totaler er Totaler fra database/totaler.py
+        doc = FakturaDokument(pdf_filename, pagesize=A4)                        #Setter maltype på dokumentet og setter størrelse
+        doc.bygg(self._elementer(ordre, ordrelinjer, kunde, faktura_nummer, totaler), onFirstPage=add_footer, onLaterPages=add_footer)  #Elementene lages etter hvert som ReportLab trenger dem
+
+    #Lager elementene i PDF-en ett og ett. ordrelinjer kan være en liste eller en generator (f.eks. fra Database.stream_rows),
+    #linjene leses én side om gangen, så selv en faktura med 100 000 linjer har bare én side med linjer i minnet.
+    def _elementer(self, ordre, ordrelinjer, kunde, faktura_nummer, totaler):
+        ressurser = hent_ressurser()                                            #Stilark, tabellstil og logo som deles mellom fakturaene
+        styles = ressurser.styles                                               #Styleelement (stil) med fonter osv i PDF-en
+        img = Logo(ressurser.hent_logo(), width=100, height=50)                 #Setter høyde og bredde på bildet
         img.hAlign = 'LEFT'                                                     #Setter bildet til venstre på skjermen
-        elements.append(img)                                                    #legger til bilde i PDF-en som et element
-        elements.append(Spacer(1, 12))                                          #legger til en spacer i PDF-en som et element
+        yield img                                                               #legger til bilde i PDF-en som et element
+        yield Spacer(1, 12)                                                     #legger til en spacer i PDF-en som et element
 
         #Kundeinfo - linje 21-25: variabel for å hente kundeinfo fra def generate_invoice
         customer_info = f"""
@@ -24,57 +128,101 @@ class PDFGenerator:
         <b>Kunde:</b> {kunde[1]} {kunde[2]}<br/>
         <b>Adresse:</b> {kunde[3]}, {kunde[4]}<br/>
         """
-        elements.append(Paragraph(customer_info, styles["Normal"]))             #legge til innholdet i variabelen over i dokumentet
-        elements.append(Spacer(1, 12))                                          #legger til en spacer i PDF-en som et element
+        yield Paragraph(customer_info, styles["Normal"])                        #legge til innholdet i variabelen over i dokumentet
+        yield Spacer(1, 12)                                                     #legger til en spacer i PDF-en som et element
 
-        #ordretabell
-        table_data = [["Antall", "Beskrivelse", "Enhetspris", "Totalt"]]        #definerer kolonnenavnene i dokumentet
-        totalt = 0                                                              #variabel som kalkulerer totalsum
+        #ordretabell, én tabell per side. Linjesummene og totalene regnes i hele øre (database/totaler.py)
+        samlet = Totaler([], 0, {})                                             #Totalene for linjene som er lagt inn så langt
+        sider = sidevis(ordrelinjer)
+        side = next(sider, [])
+        neste = next(sider, None)
+        flere_sider = neste is not None                                         #Sidesummer trengs bare når fakturaen går over flere sider
+        while True:
+            side_totaler = beregn(side)
+            samlet.legg_til(side_totaler)
+            yield self._sidetabell(ressurser, side, side_totaler, samlet if flere_sider else None)
+            if neste is None:
+                break
+            yield PageBreak()                                                   #Neste side starter med ny overskriftsrad
+            side, neste = neste, next(sider, None)
+        if totaler is None:                                                     #bruker totalene regnet ut underveis hvis de ikke er sendt med
+            totaler = samlet
 
-        #For-loop for å gå gjennom alle ordrelinjer
-        for linje in ordrelinjer:                                               #starter for-loop
-            Antall = int(float(linje[3]))                                       #tar ut antall 
-            Enhetspris = float(linje[2])                                        #tar ut enhetspris
-            linje_total = Antall * Enhetspris                                   #regner sammen totalprisen ved å gange antall og enhetspris
+        yield Spacer(1, 12)                                                                                    #legger til mellomrom mellom tabell og totalen (spacer)
+        yield Paragraph(f"<b>Total (eks. MVA):</b> {totaler.netto:,.2f} NOK", styles["Normal"])                #legger til informasjonen i dokumentet
+        for sats, grunnlag, mva_beløp in totaler.per_sats:                                                     #én linje per MVA-sats som er brukt på fakturaen
+            yield Paragraph(f"<b>{prosent(sats)} MVA</b> av {grunnlag:,.2f} NOK: {mva_beløp:,.2f} NOK", styles["Normal"])
+        yield Paragraph(f"<b>Total (inkl. MVA):</b> {totaler.brutto:,.2f} NOK", styles["Normal"])              #legger til informasjonen i dokumentet
 
-            table_data.append([                                                 #legger til informasjonen som er hentet ut over
-                f"{Antall:,}",                                                  #legger til antall
+    #Tabellen for én side: overskrift, linjene og (når fakturaen har flere sider) sum for siden og sum så langt
+    def _sidetabell(self, ressurser, side, side_totaler, samlet):
+        table_data = [["Antall", "Beskrivelse", "Enhetspris", "Totalt"]]        #definerer kolonnenavnene i dokumentet
+        for linje, linje_total in zip(side, side_totaler.linjesummer):          #For-loop for å gå gjennom ordrelinjene på siden
+            table_data.append([                                                 #legger til informasjonen for linjen
+                f"{int(linje[3]):,}",                                           #legger til antall
                 f"{linje[4]}",                                                  #legger til beskrivelsen
-                f"{Enhetspris:,.2f} NOK",                                       #legger til enhetspris med to desimaler (.2f) og viser pris med NOK bak
-                f"{linje_total:,.2f} NOK"                                       #legger til totalprisen med to desimaler (.2f) og viser pris med NOK bak
-            ])          
-
-            totalt += linje_total                                               #variabel for å regne sammen totalsummen
+                f"{til_kroner(til_øre(linje[2])):,.2f} NOK",                    #legger til enhetspris med to desimaler (.2f) og viser pris med NOK bak
+                f"{til_kroner(linje_total):,.2f} NOK"                           #legger til totalprisen med to desimaler (.2f) og viser pris med NOK bak
+            ])
+        style = ressurser.table_style
+        if samlet is not None:
+            table_data.append(["", "Sum denne siden", "", f"{side_totaler.netto:,.2f} NOK"])
+            table_data.append(["", "Sum hittil", "", f"{samlet.netto:,.2f} NOK"])
+            style = ressurser.sum_style
 
         #table for å definere utsende på kolonnene
-        table = Table(table_data, colWidths=[60, 200, 100, 100])                #oppretter tabellen med data fra tabledata
-        table.setStyle(TableStyle([                                             #setter utseende på tabellen
-            ("GRID", (0, 0), (-1, -1), 1, colors.black),                        #setter stil på linje i tabell sort
-            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),                  #setter stil på bakgrunn (øverste rad) i tabell grå
-            ("ALIGN", (1, 1), (-1, -1), "CENTER"),                              #sentrerer og setter hvor ting skal være på skjermen
-            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold")                     #setter font helvetica-bold
-        ]))
-        elements.append(table)                                                  #legge til tabellen i dokumentet
+        table = Table(table_data, colWidths=[60, 200, 100, 100], rowHeights=[RAD_HØYDE] * len(table_data), repeatRows=1)  #Fast radhøyde, så en side med linjer alltid får plass
+        table.setStyle(style)                                                   #setter utseende på tabellen
+        return table
+
+
+#Deler ordrelinjene opp i sider: LINJER_FØRSTE_SIDE på første side (under logoen og kundeinfoen), LINJER_PER_SIDE på resten
+def sidevis(ordrelinjer):
+    linjer = iter(ordrelinjer)
+    side = list(islice(linjer, LINJER_FØRSTE_SIDE))
+    while side:
+        yield side
+        side = list(islice(linjer, LINJER_PER_SIDE))
+
+
+#Dokument som henter elementene fra en generator etter hvert som de legges ut, i stedet for å få alle i en liste.
+#handle_flowable er kroken ReportLab kaller for hvert element. Listen fylles før (så ReportLab kan se framover for
+#keepWithNext) og etter (build stopper når listen er tom), så bare noen få elementer ligger klare om gangen.
+#ReportLab kaller også handle_flowable med sine egne lister (f.eks. elementer som venter på ny side), de fylles ikke.
+class FakturaDokument(SimpleDocTemplate):
+    FORRÅD = 8                                                                  #Elementer som ligger klare i listen
+
+    def bygg(self, elementer, **kwargs):
+        self._kilde = iter(elementer)
+        self._elementer = []                                                    #Listen build tar elementene fra
+        self._fyll(self._elementer)
+        self.build(self._elementer, **kwargs)
 
-        elements.append(Spacer(1, 12))                                                                         #legger til mellomrom mellom tabell og totalen (spacer)
-        elements.append(Paragraph(f"<b>Total (eks. MVA):</b> {totalt:,.2f} NOK", styles["Normal"]))            #legger til informasjonen i dokumentet
+    def handle_flowable(self, flowables):
+        self._fyll(flowables)
+        SimpleDocTemplate.handle_flowable(self, flowables)
+        self._fyll(flowables)
 
-        mva_beløp = totalt * 0.25                                                                              #beregner 25% MVA
-        elements.append(Paragraph(f"<b>25% MVA:</b> {mva_beløp:,.2f} NOK", styles["Normal"]))                  #legger til informasjonen i dokumentet
+    def _fyll(self, flowables):
+        if flowables is not getattr(self, "_elementer", None):
+            return
+        while self._kilde is not None and len(flowables) < self.FORRÅD:
+            try:
+                flowables.append(next(self._kilde))
+            except StopIteration:
+                self._kilde = None
 
-        totalpris_mmva = totalt + mva_beløp                                                                    #beregner ny totalpris ved å ta med moms + totalverdi uten
-        elements.append(Paragraph(f"<b>Total (inkl. MVA):</b> {totalpris_mmva:,.2f} NOK", styles["Normal"]))   #legger til informasjonen i dokumentet
 
+def åpne_fil(pdf_filename):                                                     #Åpner PDF-en i standardprogrammet, os.startfile finnes bare på Windows
+    if hasattr(os, "startfile"):
+        os.startfile(pdf_filename)
+    else:
+        webbrowser.open(pathlib.Path(pdf_filename).resolve().as_uri())
 
-        #generer PDF
-        try:    
-            doc.build(elements, onFirstPage=add_footer, onLaterPages=add_footer)                                   #lager fil ut ifra elementer
-            os.startfile(pdf_filename)                                                                             #åpner filen som er laget
-        except Exception as e:                                                                                     #hvis det skjer en feil
-            print(f"Error generating PDF: {e}")                                                                    #print feilmelding i terminalen
 
 def add_footer(canvas, doc):                                                                                   #funksjon for å legge til footer
     footer_text = "Gruppe 1 AS | +47 911 | Gymnasvegen 27 | Org.nr: 987237910MVA"                              #legger til informasjon om "organisasjonen"                                                                                        #
     canvas.setFont("Helvetica-Bold", 8)                                                                        #legger til font og skriftstørrelse         
     canvas.setFillColor(colors.grey)                                                                           #setter farge på tekst
-    canvas.drawCentredString(A4[0] / 2.0, 15 * mm, footer_text)                                                #plasserer footer og setter størrelse på footer
\ No newline at end of file
+    canvas.drawCentredString(A4[0] / 2.0, 15 * mm, footer_text)                                                #plasserer footer og setter størrelse på footer
+    canvas.drawRightString(A4[0] - doc.rightMargin, 15 * mm, f"Side {doc.page}")                               #sidenummer, store fakturaer går over mange sider
\ No newline at end of file
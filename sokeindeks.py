@@ -0,0 +1,249 @@
+#Søk mens man skriver i kunde- og ordrelistene
+#SøkeIndeks bygges én gang fra alle radene og holdes oppdatert når en rad legges til, endres eller fjernes,
+#så et søk aldri trenger databasen. Hvert ord i feltene som kan søkes i (f.eks. Fornavn, Etternavn, Adresse)
+#ligger i en sortert liste, så ord som starter med søket finnes med binærsøk. Ord med bokstaver ligger også
+#i en trigram-indeks (tre og tre tegn), så "ordsen" finner "Nordsen". Nøkkelen (KNr, OrdreNr) søkes på prefiks.
+#Treffene rangeres: nøkkel eller ord som er helt likt søket først, deretter ord som starter med søket
+#(alfabetisk), og til slutt ord som inneholder søket. Har søket flere ord, må alle finnes i raden.
+#Søkefelt kobler en Entry til en TreeviewTabell og venter til brukeren har sluttet å skrive før den søker.
+#Søkefeltet kan også bruke alt som har søk(tekst), f.eks. VareSøk fra database/varesok.py, og kjører da søket i bakgrunnen.
+#
+#Bruk:
+#   indeks = SøkeIndeks(felt=(1, 2, 3)).bygg(rader)     #nøkkelen er kolonne 0
+#   indeks.søk("ola gymnas")                            #de beste radene, høyst GRENSE
+#   søkefelt = Søkefelt(entry, tabell, lambda: kunde_pager(db))
+#   søkefelt.settIndeks(indeks)
+
+import re
+from bisect import bisect_left, insort
+
+GRENSE = 200                                                                #Maks antall treff som vises
+SØK_MS = 150                                                                #Hvor lenge det må være stille i søkefeltet før det søkes
+MIN_DELORD = 3                                                              #Søk kortere enn dette finner bare ord som starter med søket
+
+ORD = re.compile(r"\w+")
+
+
+def ordene(tekst):                                                          #Ordene i en tekst, små bokstaver
+    return ORD.findall(str(tekst).casefold())
+
+
+def trigrammer(ord):                                                        #Alle tretegnsbitene i et ord
+    return {ord[i:i + 3] for i in range(len(ord) - 2)}
+
+
+class SøkeIndeks:
+    def __init__(self, felt, nøkkel_indeks=0, grense=GRENSE):
+        self.felt = tuple(felt)                                             #Kolonnene som kan søkes i, i tillegg til nøkkelen
+        self.nøkkel_indeks = nøkkel_indeks                                  #Kolonnen med nøkkelen, f.eks. KNr
+        self.grense = grense
+        self._rader = {}                                                    #Nøkkel -> rad
+        self._nøkler = []                                                   #(nøkkel som tekst, nøkkel), sortert, for prefikssøk på nøkkelen
+        self._ord = {}                                                      #Ord -> nøklene til radene som har ordet
+        self._sortert = []                                                  #Alle ordene sortert, for prefikssøk med bisect
+        self._trigram = {}                                                  #Trigram -> ordene som har det (bare ord med bokstaver)
+        self._sorterte = {}                                                 #Ord -> nøklene sortert, lages første gang ordet søkes på
+
+    def __len__(self):
+        return len(self._rader)
+
+    #Bygger indeksen fra alle radene på en gang (raskere enn legg_til for hver), returnerer seg selv
+    def bygg(self, rader):
+        for rad in rader:
+            nøkkel = rad[self.nøkkel_indeks]
+            self._rader[nøkkel] = rad
+            for ord in self._radord(rad):
+                self._ord.setdefault(ord, set()).add(nøkkel)
+        self._nøkler = sorted((str(nøkkel), nøkkel) for nøkkel in self._rader)
+        self._sortert = sorted(self._ord)
+        for ord in self._sortert:
+            for trigram in self._trigrammer(ord):
+                self._trigram.setdefault(trigram, set()).add(ord)
+        return self
+
+    #Legger til en ny rad, eller erstatter raden med samme nøkkel
+    def legg_til(self, rad):
+        nøkkel = rad[self.nøkkel_indeks]
+        if nøkkel in self._rader:
+            self.fjern(nøkkel)
+        self._rader[nøkkel] = rad
+        insort(self._nøkler, (str(nøkkel), nøkkel))
+        for ord in self._radord(rad):
+            nøkler = self._ord.get(ord)
+            if nøkler is None:                                              #Nytt ord
+                nøkler = self._ord[ord] = set()
+                insort(self._sortert, ord)
+                for trigram in self._trigrammer(ord):
+                    self._trigram.setdefault(trigram, set()).add(ord)
+            nøkler.add(nøkkel)
+            self._sorterte.pop(ord, None)
+
+    oppdater = legg_til                                                     #En endret rad erstatter den gamle
+
+    #Fjerner raden med denne nøkkelen, f.eks. når kunden settes inaktiv
+    def fjern(self, nøkkel):
+        rad = self._rader.pop(nøkkel, None)
+        if rad is None:
+            return
+        del self._nøkler[bisect_left(self._nøkler, (str(nøkkel), nøkkel))]
+        for ord in self._radord(rad):
+            nøkler = self._ord[ord]
+            nøkler.discard(nøkkel)
+            self._sorterte.pop(ord, None)
+            if nøkler:
+                continue
+            del self._ord[ord]                                              #Ingen rader har ordet lenger
+            del self._sortert[bisect_left(self._sortert, ord)]
+            for trigram in self._trigrammer(ord):
+                ordliste = self._trigram[trigram]
+                ordliste.discard(ord)
+                if not ordliste:
+                    del self._trigram[trigram]
+
+    #De beste radene for søket, rangert. Tomt søk gir tom liste.
+    def søk(self, tekst, grense=None):
+        grense = self.grense if grense is None else grense
+        termer = {term: self._ordFor(term) for term in ordene(tekst)}
+        if not termer:
+            return []
+        bredde = {term: self._bredde(term, ordliste) for term, ordliste in termer.items()}
+        drivende, *resten = sorted(termer, key=bredde.get)                  #Går gjennom radene for søkeordet med færrest treff
+        andre = [(term, [self._ord[ord] for ord in termer[term]], self._likNøkkel(term)) for term in resten]
+        treff, sett = [], set()
+        for blokk in self._blokker(drivende, termer[drivende], sortert=not andre):
+            if andre:                                                       #Raden må ha alle de andre søkeordene også
+                blokk = sorted(self._filtrer(blokk if type(blokk) is set else set(blokk), andre))
+            for nøkkel in blokk:
+                if nøkkel in sett:
+                    continue
+                sett.add(nøkkel)
+                treff.append(self._rader[nøkkel])
+                if len(treff) >= grense:
+                    return treff
+        return treff
+
+    #Nøklene som også har de andre søkeordene, med mengdeoperasjoner så det går fort selv for store blokker.
+    #De andre søkeordene må være hele nøkkelen for å treffe den, bare søkeordet radene hentes for søkes på prefiks av nøkkelen.
+    def _filtrer(self, nøkler, andre):
+        for _, mengder, lik_nøkkel in andre:
+            funnet = set().union(*(nøkler & andre_nøkler for andre_nøkler in mengder))
+            if lik_nøkkel in nøkler:
+                funnet.add(lik_nøkkel)
+            nøkler = funnet
+            if not nøkler:
+                break
+        return nøkler
+
+    #Ordene som passer til ett søkeord, de beste først: likt ord, ord som starter med søkeordet (alfabetisk), ord som inneholder det
+    def _ordFor(self, term):
+        start = bisect_left(self._sortert, term)
+        ordliste = list(self._prefiks(self._sortert, start, term, lambda ord: ord))
+        if len(term) >= MIN_DELORD:
+            ordliste += sorted(ord for ord in self._delord(term) if not ord.startswith(term))
+        return ordliste
+
+    #Nøklene for ett søkeord i blokker, i rangert rekkefølge: lik nøkkel, likt ord, nøkler som starter med søkeordet, resten av ordene.
+    #sortert=False gir ordenes nøkler som mengder (ikke sortert), for søk med flere ord som filtrerer blokkene først.
+    def _blokker(self, term, ordliste, sortert=True):
+        poster = self._sortertePoster if sortert else self._ord.__getitem__
+        første_nøkkel = bisect_left(self._nøkler, (term,))
+        lik_nøkkel = første_nøkkel < len(self._nøkler) and self._nøkler[første_nøkkel][0] == term
+        likt_ord = bool(ordliste) and ordliste[0] == term
+        if lik_nøkkel:
+            yield [self._nøkler[første_nøkkel][1]]
+        if likt_ord:
+            yield poster(term)
+        yield (nøkkel for _, nøkkel in self._prefiks(self._nøkler, første_nøkkel + lik_nøkkel, term, lambda oppføring: oppføring[0]))
+        for ord in ordliste[likt_ord:]:
+            yield poster(ord)
+
+    def _sortertePoster(self, ord):                                         #Nøklene for ordet i stigende rekkefølge
+        nøkler = self._sorterte.get(ord)
+        if nøkler is None:
+            nøkler = self._sorterte[ord] = sorted(self._ord[ord])
+        return nøkler
+
+    def _prefiks(self, liste, start, term, tekst):                          #Elementene fra start i den sorterte listen som starter med term
+        for i in range(start, len(liste)):
+            if not tekst(liste[i]).startswith(term):
+                break
+            yield liste[i]
+
+    def _delord(self, term):                                                #Ordene som inneholder term, via trigrammene
+        mengder = sorted((self._trigram.get(trigram, ()) for trigram in trigrammer(term)), key=len)
+        if not mengder or not mengder[0]:
+            return set()
+        kandidater = set(mengder[0]).intersection(*mengder[1:])
+        return {ord for ord in kandidater if term in ord}                   #Trigrammene kan komme i feil rekkefølge
+
+    def _bredde(self, term, ordliste):                                      #Antall rader søkeordet kan gi (nøkler med prefikset og radene for ordene)
+        return self._antallNøkler(term) + sum(len(self._ord[ord]) for ord in ordliste)
+
+    def _antallNøkler(self, term):                                          #Antall nøkler som starter med term
+        return bisect_left(self._nøkler, (term + "\U0010ffff",)) - bisect_left(self._nøkler, (term,))
+
+    def _likNøkkel(self, term):                                             #Nøkkelen som skrevet som tekst er lik term, ellers None
+        første = bisect_left(self._nøkler, (term,))
+        if første < len(self._nøkler) and self._nøkler[første][0] == term:
+            return self._nøkler[første][1]
+        return None
+
+    def _radord(self, rad):                                                 #Ordene i feltene som kan søkes i
+        return [ord for indeks in self.felt for ord in ordene(rad[indeks])]
+
+    def _trigrammer(self, ord):                                             #Tall søkes bare på prefiks, så de trenger ikke trigrammer
+        return () if ord.isdigit() else trigrammer(ord)
+
+
+#Søkefelt over en TreeviewTabell. Viser treffene fra indeksen mens man skriver, og sidene fra databasen igjen når feltet tømmes.
+class Søkefelt:
+    def __init__(self, entry, tabell, lag_pager, ventetid=SØK_MS, bakgrunn=None):
+        self.entry = entry                                                  #Entry brukeren skriver i
+        self.tabell = tabell                                                #TreeviewTabell som viser radene
+        self.lag_pager = lag_pager                                          #Lager en ny pager når hele listen skal vises igjen
+        self.ventetid = ventetid
+        self.bakgrunn = bakgrunn                                            #Bakgrunn som kjører søket hvis det går mot databasen
+        self.indeks = None                                                  #SøkeIndeks (eller noe annet med søk(tekst)), None til den er klar
+        self.viser_treff = False                                            #Om tabellen viser søketreff i stedet for sidene
+        self._venter = None                                                 #after-id for søket som venter
+        entry.bind("<KeyRelease>", lambda _: self._tastet(), add="+")
+
+    def settIndeks(self, indeks):                                           #Indeksen er klar, søker med det som allerede er skrevet
+        self.indeks = indeks
+        self.søk()
+
+    def søk(self):                                                          #Søker med teksten i feltet nå, kalles også etter at en rad er endret
+        self._venter = None
+        if not self.entry.winfo_exists():                                   #Vinduet er lukket
+            return
+        tekst = self.entry.get().strip()
+        if not tekst:
+            if self.bakgrunn is not None:
+                self.bakgrunn.avbryt(id(self))                              #Et søk som er underveis skal ikke vises
+            if self.viser_treff:                                            #Tilbake til hele listen
+                self.viser_treff = False
+                self.tabell.visSider(self.lag_pager())
+            return
+        if self.indeks is None:                                             #Søket kjøres når indeksen er bygget
+            return
+        self.viser_treff = True
+        if self.bakgrunn is not None:                                       #Et nytt søk erstatter det forrige som ikke er ferdig
+            self.bakgrunn.kjør(self.indeks.søk, tekst, ferdig=self._visTreff, nøkkel=id(self))
+        else:
+            self.tabell.visRader(self.indeks.søk(tekst))
+
+    def _visTreff(self, rader):                                             #Kjøres i hovedtråden når søket i bakgrunnen er ferdig
+        if self.viser_treff and self.entry.winfo_exists():
+            self.tabell.visRader(rader)
+
+    def tøm(self):                                                          #Tømmer feltet, den som kaller viser hele listen igjen
+        if self._venter is not None:
+            self.entry.after_cancel(self._venter)
+            self._venter = None
+        self.entry.delete(0, "end")
+        self.viser_treff = False
+
+    def _tastet(self):                                                      #Venter til brukeren har sluttet å skrive
+        if self._venter is not None:
+            self.entry.after_cancel(self._venter)
+        self._venter = self.entry.after(self.ventetid, self.søk)
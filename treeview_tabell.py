@@ -0,0 +1,233 @@
+#Treeview som laster rader side for side etter hvert som brukeren scroller
+#I stedet for å sette inn hele tabellen på en gang lastes bare første side, og neste side hentes
+#når det er færre enn "prefetch" rader igjen under det synlige vinduet. Sidene hentes med en
+#KeysetPager fra database/paging.py. Får tabellen et Bakgrunn-objekt, hentes sidene i en bakgrunnstråd.
+#Hver rad har nøkkelen (f.eks. KNr) som iid, så én endret, ny eller slettet rad kan oppdateres
+#for seg selv med oppdaterRad, settInnRad og fjernRad uten å laste hele listen på nytt.
+#visRader viser en ferdig liste (søketreff fra sokeindeks.py) i stedet, til visSider kalles igjen.
+#Treet får den virtuelle hendelsen <<SideLastet>> hver gang en side eller liste er satt inn.
+#Treet holder høyst MAKS_SIDER sider. Blir det flere, fjernes siden lengst unna det synlige området, og
+#startnøkkelen dens (last_key før siden ble hentet) huskes. Scroller brukeren tilbake dit, hentes siden
+#igjen med KeysetPager.page_after(startnøkkel), så minnet i Tk holder seg likt uansett hvor langt det blas.
+
+import copy
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+PREFETCH = 50                                                               #Antall rader under synlig område før neste side lastes
+MAKS_SIDER = 10                                                             #Sider som holdes i treet samtidig, resten hentes igjen ved behov
+
+
+class TreeviewTabell:
+    def __init__(self, tree, scrollbar, nøkkel_indeks=0, prefetch=PREFETCH, bakgrunn=None, sortering=None):
+        self.tree = tree                                                    #Treeview som viser radene
+        self.bakgrunn = bakgrunn                                            #Kjører sidehentingen utenfor hovedtråden hvis satt
+        self.scrollbar = scrollbar                                          #Scrollbaren som hører til treet
+        self.nøkkel_indeks = nøkkel_indeks                                  #Kolonnen som brukes som iid for hver rad
+        self.sortering = sortering or (lambda rad: rad[nøkkel_indeks])      #Rekkefølgen radene vises i, standard er nøkkelen
+        self._rekkefølge = []                                               #Sorteringsverdien til hver rad, i samme rekkefølge som treet
+        self._sorteringsverdi = {}                                          #iid -> sorteringsverdi, så en rad kan finnes uten å lese treet
+        self.prefetch = prefetch                                            #Hvor mange rader vi vil ha i reserve under synlig område
+        self.pager = None                                                   #Pageren som gir neste side, None når treet ikke er sidevis
+        self._sidepager = None                                              #Siste pager fra visSider, så fullSynk virker også mens søketreff vises
+        self.antall = 0                                                     #Antall rader som er lastet inn i treet
+        self._laster = False                                                #Hindrer at samme side blir bedt om flere ganger
+        self.maks_sider = MAKS_SIDER
+        self._sider = deque()                                               #[startnøkkel, antall rader] for sidene i treet, øverst først
+        self._over = []                                                     #Startnøkler for sider fjernet over treet, nærmeste sist
+        self._under = []                                                    #Startnøkler for sider fjernet under treet, nærmeste sist
+        self.tree.configure(yscrollcommand=self._påScroll)                  #Får beskjed hver gang synlig område endres
+
+    def settKolonner(self, kolonner):                                       #Setter opp kolonnene i treet
+        self.tree["columns"] = kolonner                                     #Oppdaterer kolonnene i treet
+        for col in kolonner:                                                #for loop for å gå gjennom kolonnene
+            self.tree.heading(col, text=col)                                #Setter overskrift i kolonnen
+            self.tree.column(col, width=100, anchor="center")               #Setter bredde og justerer for kolonnen
+
+    def tøm(self):                                                          #Fjerner alle rader og kobler fra pageren
+        if self.bakgrunn is not None:
+            self.bakgrunn.avbryt(id(self))                                  #Svar på sider fra forrige pager skal ikke vises
+        self.pager = None
+        self.antall = 0
+        self._laster = False
+        self._rekkefølge = []
+        self._sorteringsverdi = {}
+        self._sider = deque()
+        self._over = []
+        self._under = []
+        self.tree.delete(*self.tree.get_children())                         #Sletter alle elementene i ett kall
+
+    def visSider(self, pager):                                              #Viser resultatet fra en pager, starter på første side
+        self.tøm()                                                          #Tømmer treet før nye data vises
+        self.pager = pager
+        self._sidepager = pager
+        self.lastNesteSide()                                                #Laster første side med en gang
+
+    def lastNesteSide(self):                                                #Henter neste side fra pageren og setter den inn nederst
+        if self.pager is None or (self.pager.done and not self._under):     #Ingenting mer å hente
+            self._laster = False
+            return
+        self._laster = True
+        if self._under:                                                     #En side som er fjernet nederst hentes igjen først
+            start = self._under.pop()
+            pager = self.pager
+            hent = lambda: pager.page_after(start)
+        else:
+            start = self.pager.last_key
+            hent = self.pager.next_page
+        if self.bakgrunn is not None:                                       #Henter siden i en bakgrunnstråd, nøkkelen er tabellen
+            self.bakgrunn.kjør(hent, ferdig=lambda rader: self._settInnSide(rader, start), nøkkel=id(self))
+        else:
+            self._settInnSide(hent(), start)                                #Henter neste side fra databasen
+
+    def lastForrigeSide(self):                                              #Henter siden over treet igjen og setter den inn øverst
+        if self.pager is None or not self._over:
+            self._laster = False
+            return
+        self._laster = True
+        start = self._over.pop()
+        pager = self.pager
+        if self.bakgrunn is not None:
+            self.bakgrunn.kjør(pager.page_after, start, ferdig=lambda rader: self._settInnSideØverst(rader, start), nøkkel=id(self))
+        else:
+            self._settInnSideØverst(pager.page_after(start), start)
+
+    def _settInnSide(self, rader, start=None):                              #Setter inn en side med rader nederst i treet
+        self._laster = False
+        satt_inn = 0
+        for rad in rader:                                                   #Setter inn radene på slutten av treet
+            iid = str(rad[self.nøkkel_indeks])
+            if self.tree.exists(iid):                                       #Allerede satt inn med settInnRad
+                continue
+            self.tree.insert("", "end", iid=iid, values=rad)
+            verdi = self.sortering(rad)
+            self._rekkefølge.append(verdi)
+            self._sorteringsverdi[iid] = verdi
+            satt_inn += 1
+        self.antall += satt_inn
+        if satt_inn:                                                        #Tom siste side telles ikke
+            self._sider.append([start, satt_inn])
+        if self.pager is not None and len(self._sider) > self.maks_sider:   #For mange sider, fjerner den øverste
+            self._fjernSide(nederst=False)
+        self.tree.event_generate("<<SideLastet>>")                          #Andre kan lytte på at radene er satt inn (f.eks. oppstartsmålingen i Program.py)
+
+    def _settInnSideØverst(self, rader, start):                             #Setter inn en side som er hentet igjen øverst i treet
+        self._laster = False
+        før = self.antall
+        øverst = self.tree.yview()[0] * før                                 #Raden øverst i synlig område før innsettingen
+        verdier = []
+        for rad in rader:
+            iid = str(rad[self.nøkkel_indeks])
+            if self.tree.exists(iid):                                       #Siden kan ha endret seg siden den ble fjernet
+                continue
+            self.tree.insert("", len(verdier), iid=iid, values=rad)
+            verdi = self.sortering(rad)
+            verdier.append(verdi)
+            self._sorteringsverdi[iid] = verdi
+        self._rekkefølge[0:0] = verdier
+        self.antall += len(verdier)
+        if verdier:
+            self._sider.appendleft([start, len(verdier)])
+            self._flyttVisning(øverst + len(verdier))                       #Holder de samme radene i synlig område
+        if len(self._sider) > self.maks_sider:                              #For mange sider, fjerner den nederste
+            self._fjernSide(nederst=True)
+        self.tree.event_generate("<<SideLastet>>")
+
+    def _fjernSide(self, nederst):                                          #Fjerner siden øverst eller nederst og husker startnøkkelen
+        start, antall = self._sider.pop() if nederst else self._sider.popleft()
+        barn = self.tree.get_children()
+        fjernes = barn[len(barn) - antall:] if nederst else barn[:antall]
+        øverst = self.tree.yview()[0] * self.antall
+        for iid in fjernes:
+            self._sorteringsverdi.pop(iid, None)
+        if nederst:
+            del self._rekkefølge[len(self._rekkefølge) - antall:]
+            self._under.append(start)
+        else:
+            del self._rekkefølge[:antall]
+            self._over.append(start)
+        self.tree.delete(*fjernes)
+        self.antall -= antall
+        if not nederst:
+            self._flyttVisning(øverst - antall)                             #Radene over forsvant, synlig område flyttes like mye opp
+
+    def _flyttVisning(self, rad):                                           #Scroller så raden nummer rad er øverst i synlig område
+        if self.antall:
+            self.tree.yview_moveto(max(0.0, rad) / self.antall)
+
+    def _side(self, plass):                                                 #Siden som har raden på plass, sidene ligger etter hverandre i treet
+        for side in self._sider:
+            if plass < side[1]:
+                return side
+            plass -= side[1]
+        return self._sider[-1] if self._sider else None                     #Nederst i treet hører til siste side
+
+    def visRader(self, rader):                                              #Viser en fast liste med rader (f.eks. søketreff) i stedet for sidene
+        self.tøm()                                                          #Radene står i den rekkefølgen de kommer, så enkeltrader oppdateres ikke her
+        self._settInnSide(rader)
+
+    def fullSynk(self):                                                     #Laster hele listen på nytt fra første side, bare når brukeren ber om det ("Oppdater liste")
+        pager = self.pager or self._sidepager
+        if pager is None:
+            return
+        if self.bakgrunn is not None:
+            self.bakgrunn.avbryt(id(self))                                  #En side som er underveis skal ikke settes inn etter synken
+        pager = copy.copy(pager)                                            #En side som allerede kjører i en tråd skriver last_key til den gamle pageren, ikke denne
+        pager.reset()                                                       #Starter pageren fra begynnelsen
+        self.visSider(pager)
+
+    def oppdaterRad(self, nøkkel, rad):                                     #Oppdaterer én rad, flytter den hvis sorteringen endres
+        iid = str(nøkkel)
+        if not self.tree.exists(iid):                                       #Raden er ikke lastet inn ennå
+            return
+        if self.sortering(rad) == self._sorteringsverdi[iid]:
+            self.tree.item(iid, values=rad)                                 #Samme plass, bare nye verdier
+        else:
+            self.fjernRad(nøkkel)
+            self.settInnRad(nøkkel, rad)
+
+    def settInnRad(self, nøkkel, rad):                                      #Setter inn én ny rad på riktig plass i sorteringen
+        iid = str(nøkkel)
+        if self.tree.exists(iid):
+            self.oppdaterRad(nøkkel, rad)
+            return
+        verdi = self.sortering(rad)
+        if self.pager is not None and (not self.pager.done or self._under) and (not self._rekkefølge or verdi > self._rekkefølge[-1]):
+            return                                                          #Hører hjemme på en side som ikke er lastet ennå, kommer med den
+        if self.pager is not None and self._over and self._rekkefølge and verdi < self._rekkefølge[0]:
+            return                                                          #Hører hjemme på en side som er fjernet øverst, kommer når den hentes igjen
+        plass = bisect_right(self._rekkefølge, verdi)                       #Binærsøk etter plassen i den sorterte listen
+        side = self._side(plass)
+        if side is not None:
+            side[1] += 1                                                    #Siden raden havner på blir én rad lenger
+        self._rekkefølge.insert(plass, verdi)
+        self._sorteringsverdi[iid] = verdi
+        self.tree.insert("", plass, iid=iid, values=rad)                    #Setter inn på samme plass i treet
+        self.antall += 1
+
+    def fjernRad(self, nøkkel):                                             #Fjerner én rad
+        iid = str(nøkkel)
+        if not self.tree.exists(iid):
+            return
+        verdi = self._sorteringsverdi.pop(iid)
+        plass = bisect_left(self._rekkefølge, verdi)                        #Finner raden med binærsøk
+        side = self._side(self.tree.index(iid))
+        if side is not None:
+            side[1] -= 1
+        del self._rekkefølge[plass]
+        self.tree.delete(iid)
+        self.antall -= 1
+
+    def _påScroll(self, første, siste):                                     #Kalles av treet når synlig område endres
+        self.scrollbar.set(første, siste)                                   #Oppdaterer scrollbaren som før
+        if self.pager is None or self._laster:
+            return
+        nederst = float(siste) * self.antall                                #Omtrent hvilken rad som er nederst i synlig område
+        øverst = float(første) * self.antall
+        pager = self.pager
+        if self.antall - nederst <= self.prefetch and (self._under or not self.pager.done):  #Nær slutten av det som er lastet
+            self._laster = True
+            self.tree.after_idle(lambda: pager is self.pager and self.lastNesteSide())  #Laster neste side når Tk er ferdig med å tegne, hvis listen ikke er byttet ut
+        elif øverst <= self.prefetch and self._over:                        #Nær toppen, og sider over er fjernet
+            self._laster = True
+            self.tree.after_idle(lambda: pager is self.pager and self.lastForrigeSide())
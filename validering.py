@@ -0,0 +1,46 @@
+#Felles regler for å sjekke kunder og varer før de lagres
+#Brukes av GUI-et (lagre/endre kunde) og av CSV-importen, så reglene er like begge steder.
+#Hver funksjon returnerer None hvis raden er gyldig, ellers (tittel, melding) som kan vises i en messagebox.
+
+from decimal import Decimal, InvalidOperation
+
+TOMT_FELT = ("Ingen valgt", "Vennligst fyll ut alle feltene.")
+TALL_I_NAVN = ("Feil", "Ikke lov å bruke tall i Fornavn eller Etternavn, vennligst prøv igjen.")
+
+
+#Sjekker én kunde. poststeder er et sett med gyldige postnumre, None hopper over den sjekken.
+def sjekk_kunde(fornavn, etternavn, adresse, postnr, poststeder=None):
+    if fornavn == "" or etternavn == "" or adresse == "" or postnr == "":                  #Sjekker om noen av feltene er tomme
+        return TOMT_FELT
+    if any(char.isdigit() for char in fornavn) or any(char.isdigit() for char in etternavn):  #Sjekker om navnene inneholder tall
+        return TALL_I_NAVN
+    if poststeder is not None and postnr not in poststeder:                                #Postnummeret må finnes i Poststed
+        return ("Feil", f"Postnummer {postnr} finnes ikke.")
+    return None
+
+
+#Sjekker én vare
+def sjekk_vare(vnr, betegnelse, pris, katnr, antall, hylle):
+    if vnr == "" or betegnelse == "" or pris == "" or katnr == "" or antall == "" or hylle == "":
+        return TOMT_FELT
+    try:
+        if Decimal(pris) < 0:
+            return ("Feil", f"Pris kan ikke være negativ: {pris}")
+    except InvalidOperation:
+        return ("Feil", f"Pris er ikke et tall: {pris}")
+    if not katnr.isdigit():
+        return ("Feil", f"Kategorinummer må være et heltall: {katnr}")
+    if not antall.isdigit():
+        return ("Feil", f"Antall må være et heltall som ikke er negativt: {antall}")
+    return None
+
+
+#Sjekker mange kunder på en gang, rader er (linjenummer, (fornavn, etternavn, adresse, postnr))
+#Returnerer [(linjenummer, melding)] for radene som ikke er gyldige
+def sjekk_kunder(rader, poststeder=None):
+    return [(linje, feil[1]) for linje, feil in ((linje, sjekk_kunde(*rad, poststeder=poststeder)) for linje, rad in rader) if feil]
+
+
+#Samme som sjekk_kunder, for varer
+def sjekk_varer(rader):
+    return [(linje, feil[1]) for linje, feil in ((linje, sjekk_vare(*rad)) for linje, rad in rader) if feil]
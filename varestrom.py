@@ -0,0 +1,101 @@
+#Sender endringer i varetabellen til alle som har varelageret åpent (Server-Sent Events)
+#Én bakgrunnstråd spør databasen for alle seerne. Den sjekker først et billig endringsmerke, og bare
+#når det har endret seg hentes tabellen og sammenlignes med forrige gang. Forskjellen (endrede og
+#fjernede varer) gjøres om til tekst én gang og legges i køen til hver seer.
+
+import json
+import queue
+import threading
+
+INTERVALL = 2                                                               #Sekunder mellom hver gang databasen sjekkes
+KØ_STØRRELSE = 100                                                          #Hendelser en treg seer kan ligge etter før den må starte på nytt
+HJERTESLAG = 15                                                             #Sekunder mellom hver tomme melding, holder forbindelsen åpen gjennom proxyer
+
+
+#Gjør om en hendelse til SSE-format
+def sse(hendelse, data):
+    return f"event: {hendelse}\ndata: {json.dumps(data, default=float)}\n\n"   #default=float gjør Decimal (Pris) om til tall
+
+
+class VareStrøm:
+    def __init__(self, hent_merke, hent_rader, ved_endring=None, intervall=INTERVALL):
+        self.hent_merke = hent_merke                                        #Gir et merke som endres når tabellen endres
+        self.hent_rader = hent_rader                                        #Gir alle radene, første kolonne er nøkkelen (VNr)
+        self.ved_endring = ved_endring                                      #Kalles når tabellen er endret, f.eks. for å tømme cachen
+        self.intervall = intervall
+        self._abonnenter = set()                                            #Køene til alle som lytter nå
+        self._lås = threading.Lock()
+        self._merke = None                                                  #Merket vi sist hentet radene for
+        self._rader = None                                                  #{VNr: rad} fra forrige gang, None før første henting
+        self._tråd = None
+        self.stats = {"spørringer": 0, "endringer": 0, "hentet_på_nytt": 0} #Tellere, viser at én spørring betjener alle seerne
+
+    def abonner(self):                                                      #Ny seer, returnerer køen hendelsene kommer i
+        kø = queue.Queue(maxsize=KØ_STØRRELSE)
+        with self._lås:
+            self._abonnenter.add(kø)
+            if self._rader is not None:                                     #Ny seer får tabellen slik poller har den, så siden er i takt fra start
+                kø.put_nowait(sse("alle", list(self._rader.values())))
+            if self._tråd is None:                                          #Tråden startes første gang noen lytter
+                self._tråd = threading.Thread(target=self._løkke, name="varestrom", daemon=True)
+                self._tråd.start()
+        return kø
+
+    def avslutt_abonnement(self, kø):                                       #Seeren har lukket siden
+        with self._lås:
+            self._abonnenter.discard(kø)
+
+    def hendelser(self, kø):                                                #Generator for Flask-responsen, gir tekst i SSE-format
+        try:
+            while True:
+                try:
+                    yield kø.get(timeout=HJERTESLAG)
+                except queue.Empty:
+                    yield ": hjerteslag\n\n"                                #Kommentar, ignoreres av nettleseren
+        finally:                                                            #Kjøres når klienten kobler fra
+            self.avslutt_abonnement(kø)
+
+    def _løkke(self):                                                       #Kjører i bakgrunnstråden
+        stopp = threading.Event()
+        while not stopp.wait(self.intervall):
+            with self._lås:
+                if not self._abonnenter:                                    #Ingen ser på, ingen grunn til å spørre databasen
+                    continue
+            try:
+                self._sjekk()
+            except Exception as e:                                          #Databasen kan være nede en stund, vi prøver igjen neste runde
+                print(f"Feil i varestrømmen: {e}")
+
+    def _sjekk(self):                                                       #Sammenligner tabellen med forrige gang og sender forskjellen
+        merke = self.hent_merke()
+        if merke == self._merke:
+            return
+        rader = {rad[0]: list(rad) for rad in self.hent_rader()}
+        self.stats["spørringer"] += 1
+        with self._lås:                                                     #abonner() leser radene fra en annen tråd
+            forrige, self._rader, self._merke = self._rader, rader, merke
+        if forrige is None:                                                 #Første henting, ingenting å sammenligne med
+            self._send(sse("alle", list(rader.values())))
+            return
+        endret = [rad for nøkkel, rad in rader.items() if forrige.get(nøkkel) != rad]
+        fjernet = [nøkkel for nøkkel in forrige if nøkkel not in rader]
+        if not endret and not fjernet:
+            return
+        self.stats["endringer"] += 1
+        if self.ved_endring is not None:
+            self.ved_endring()
+        self._send(sse("endringer", {"endret": endret, "fjernet": fjernet}))
+
+    def _send(self, melding):                                               #Legger samme ferdige melding i køen til alle seerne
+        with self._lås:
+            for kø in list(self._abonnenter):
+                try:
+                    kø.put_nowait(melding)
+                except queue.Full:                                          #Seeren henger etter, får hele tabellen i stedet for gamle endringer
+                    while not kø.empty():
+                        try:
+                            kø.get_nowait()
+                        except queue.Empty:
+                            break
+                    kø.put_nowait(sse("alle", list(self._rader.values())))
+                    self.stats["hentet_på_nytt"] += 1